@@ -12,7 +12,11 @@ from flask import Flask, Response, jsonify
 
 from config import NetworkConfig, load_settings
 from utils.blueprint_register import register_getters_blueprints
-from utils.utils import require_token
+from utils.lanes import LaneScheduler
+from utils.peercred import PeerCredMiddleware, peer_uid
+from utils.ratelimit import RateLimiter
+from utils.utils import is_internal_request, require_token
+from utils.wsgi_server import serve
 
 from __init__ import __version__
 
@@ -33,13 +37,36 @@ def create_app() -> Flask:
     # Crea la app
     app: Flask = Flask(__name__)
 
+    # Credenciales del cliente en el socket Unix (SO_PEERCRED)
+    app.wsgi_app = PeerCredMiddleware(app.wsgi_app)  # type: ignore[method-assign]
+    trusted_uids = cfg.unix.uids if cfg.unix is not None else frozenset()
+
+    # Admisión por cliente: rechaza antes de autenticar
+    limiter = RateLimiter(cfg.ratelimit)
+    app.before_request(limiter.check)
+
     # Define la autenticación global para cualquier request
     @app.before_request
     def _auth_guard() -> Optional[Response]:
-        """Hook global de autenticación (Bearer obligatorio)."""
+        """
+        Hook global de autenticación: Bearer obligatorio, salvo clientes
+        locales del socket Unix con uid autorizado y sub-requests de
+        ``/batch`` (el request externo ya se autenticó).
+        """
+        if is_internal_request() or peer_uid() in trusted_uids:
+            return None
         require_token()
         return None
 
+    # Cuota compartida de cada ruta: solo la pagan requests autenticados
+    app.before_request(limiter.check_route)
+
+    # Carriles de prioridad: /health no espera detrás del trabajo pesado
+    lanes = LaneScheduler(cfg.server.lanes)
+    app.before_request(lanes.before)
+    app.after_request(lanes.after)
+    app.teardown_request(lanes.teardown)
+
     # Agrega los blueprints
     register_getters_blueprints(app)
 
@@ -54,6 +81,21 @@ def create_app() -> Flask:
         """Devuelve la version de la API."""
         return jsonify({"version": __version__})
 
+    @app.get("/ratelimit")
+    def _ratelimit() -> Response:
+        """Devuelve los contadores de admisión (rechazos por cliente/ruta)."""
+        return jsonify(limiter.stats())
+
+    @app.get("/lanes")
+    def _lanes() -> Response:
+        """Devuelve el estado y la espera en cola de cada carril."""
+        return jsonify(lanes.stats())
+
+    # Un nombre de blueprint mal escrito dejaría rutas en otro carril
+    # o con otro costo
+    lanes.check_blueprints(app)
+    limiter.check_blueprints(app)
+
     # Configura el host y el port al que se va a escuchar
     app.config["HOST"] = cfg.host
     app.config["PORT"] = cfg.port
@@ -68,25 +110,19 @@ def main() -> None:
     # Configura el logging
     logging.basicConfig(level=logging.INFO, format=LOG_FMT)
 
-    # Crea la app de flask
-    app = create_app()
-
-    # Configura la app
-    host: str = app.config["HOST"]
-    port: int = app.config["PORT"]
+    # Carga las configuraciones
+    cfg: NetworkConfig = load_settings()
 
     # Arranca la app
     logging.info(
         "Levantando servicio guardian-rpi-api %s on %s:%s",
         __version__,
-        host,
-        port
+        cfg.host,
+        cfg.port
     )
 
-    app.run(
-        host=host,
-        port=port
-    )
+    # La app se crea dentro del servidor (en cada worker)
+    serve(create_app, cfg)
 
 
 if __name__ == "__main__":
@@ -3,15 +3,18 @@
 Configuración tipada y validada (sin pydantic).
 
 Lee variables desde entorno/.env, aplica defaults y valida
-estrictamente host/port. Falla rápido con mensajes claros.
+estrictamente host/port, el socket Unix local, los parámetros del
+servidor WSGI y los límites de admisión. Falla rápido con mensajes
+claros.
 """
 
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+import pwd
+from dataclasses import dataclass, field
 from ipaddress import ip_address
-from typing import Final, Optional
+from typing import Dict, Final, Optional
 from dotenv import load_dotenv  # type: ignore
 
 # pylint: disable= W0718
@@ -20,6 +23,115 @@ load_dotenv()
 DEFAULT_HOST: Final[str] = "0.0.0.0"
 DEFAULT_PORT: Final[int] = 5000
 
+# Servidores aceptados: ``auto`` usa gunicorn si está instalado
+SERVER_KINDS: Final[tuple[str, ...]] = ("auto", "gunicorn", "dev")
+
+# Carriles de prioridad configurables (ver ``utils.lanes``)
+LANE_NAMES: Final[tuple[str, ...]] = ("cheap", "expensive", "actions", "long")
+
+# Threads de cada worker que los carriles nunca pueden ocupar (health)
+HEALTH_RESERVED_THREADS: Final[int] = 2
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    """
+    Concurrencia de un carril de prioridad.
+
+    :ivar limit: Requests en ejecución a la vez.
+    :ivar queue: Requests que pueden esperar un lugar.
+    """
+
+    limit: int
+    queue: int = 0
+
+
+def _default_lanes() -> Dict[str, LaneConfig]:
+    # ``long`` admite tantos streams como suscripciones de inotify
+    return {
+        "cheap": LaneConfig(6, 6),
+        "expensive": LaneConfig(2, 4),
+        "actions": LaneConfig(2, 4),
+        "long": LaneConfig(64, 0),
+    }
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """
+    Parámetros del servidor WSGI.
+
+    Por defecto un solo proceso con varios threads: la cola de trabajos
+    GPIO, las llaves de idempotencia y los eventos de entradas viven en
+    memoria del proceso, con más workers cada uno ve solo lo suyo.
+
+    :ivar kind: ``auto``, ``gunicorn`` o ``dev`` (servidor de Flask).
+    :ivar workers: Procesos worker.
+    :ivar threads: Threads por worker.
+    :ivar keepalive: Segundos que se mantiene una conexión ociosa.
+    :ivar timeout: Segundos sin respuesta antes de reciclar un worker.
+    :ivar graceful_timeout: Segundos para terminar requests al apagar.
+    :ivar backlog: Conexiones pendientes en el socket.
+    :ivar shared_metrics: Un solo proceso recolector publica las
+        métricas en memoria compartida para todos los workers.
+    :ivar lanes: Límite y cola de cada carril de prioridad; en curso +
+        cola de todos deben dejar ``HEALTH_RESERVED_THREADS`` libres.
+    """
+
+    kind: str = "auto"
+    workers: int = 1
+    threads: int = 96
+    keepalive: int = 5
+    timeout: int = 60
+    graceful_timeout: int = 30
+    backlog: int = 64
+    shared_metrics: bool = False
+    lanes: Dict[str, LaneConfig] = field(default_factory=_default_lanes)
+
+
+@dataclass(frozen=True)
+class UnixSocketConfig:
+    """
+    Listener adicional en un socket Unix para consumidores locales.
+
+    Los clientes cuyo uid (``SO_PEERCRED``) está en ``uids`` no
+    necesitan token; el resto se autentica igual que por TCP.
+
+    :ivar path: Ruta del socket.
+    :ivar mode: Permisos del archivo del socket.
+    :ivar uids: Uids autorizados sin token.
+    """
+
+    path: str
+    mode: int = 0o660
+    uids: frozenset[int] = frozenset()
+
+
+@dataclass(frozen=True)
+class RateLimitConfig:
+    """
+    Admisión por *token bucket* (tokens por segundo; cada request cuesta
+    según la ruta, ver ``utils.ratelimit``).
+
+    :ivar enabled: Si se aplica el límite.
+    :ivar rate: Recarga del bucket de cada cliente.
+    :ivar burst: Capacidad del bucket de cada cliente.
+    :ivar route_rate: Recarga del bucket de cada cliente y ruta.
+    :ivar route_burst: Capacidad del bucket de cada cliente y ruta.
+    :ivar global_route_rate: Recarga del bucket de cada ruta, sumando
+        todos los clientes.
+    :ivar global_route_burst: Capacidad del bucket de cada ruta, sumando
+        todos los clientes.
+    """
+
+    enabled: bool = True
+    rate: int = 10
+    burst: int = 40
+    route_rate: int = 4
+    route_burst: int = 12
+    global_route_rate: int = 12
+    global_route_burst: int = 40
+
 
 @dataclass(frozen=True)
 class NetworkConfig:
@@ -29,10 +141,16 @@ class NetworkConfig:
 
     :ivar host: Dirección de escucha (IPv4 válida o 0.0.0.0).
     :ivar port: Puerto TCP (1..65535).
+    :ivar server: Parámetros del servidor WSGI.
+    :ivar unix: Socket Unix local (``None`` si está deshabilitado).
+    :ivar ratelimit: Límites de admisión por cliente.
     """
 
     host: str
     port: int
+    server: ServerConfig = field(default_factory=ServerConfig)
+    unix: Optional[UnixSocketConfig] = None
+    ratelimit: RateLimitConfig = field(default_factory=RateLimitConfig)
 
 
 def _parse_host(raw: Optional[str] , default: str) -> str:
@@ -76,6 +194,184 @@ def _parse_port(raw: str | None, default: int) -> int:
     return port
 
 
+def _parse_int(name: str, default: int, low: int, high: int) -> int:
+    """
+    Parsea un entero de entorno dentro de un rango.
+
+    :param name: Variable de entorno.
+    :param default: Valor si no está definida.
+    :param low: Mínimo aceptado.
+    :param high: Máximo aceptado.
+    :returns: Entero válido.
+    :raises ValueError: Si no es entero o está fuera de rango.
+    """
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{name} debe ser entero.") from exc
+    if not low <= value <= high:
+        raise ValueError(f"{name} fuera de rango {low}..{high}.")
+    return value
+
+
+def _parse_bool(name: str, default: bool) -> bool:
+    """
+    Parsea un booleano de entorno (``1/0``, ``true/false``, ``on/off``).
+
+    :param name: Variable de entorno.
+    :param default: Valor si no está definida.
+    :returns: Booleano.
+    :raises ValueError: Si el valor no se reconoce.
+    """
+    raw = (os.getenv(name) or "").strip().lower()
+    if not raw:
+        return default
+    if raw in ("1", "true", "on", "yes"):
+        return True
+    if raw in ("0", "false", "off", "no"):
+        return False
+    raise ValueError(f"{name} debe ser booleano.")
+
+
+def _parse_lanes(threads: int) -> Dict[str, LaneConfig]:
+    """
+    Parsea ``GUARDIAN_API_LANE_<NOMBRE>=limite[:cola]`` de cada carril.
+
+    :param threads: Threads por worker (los carriles deben caber).
+    :returns: Configuración de cada carril.
+    :raises ValueError: Si un valor es inválido o no cabe en ``threads``.
+    """
+    lanes = _default_lanes()
+    for name in LANE_NAMES:
+        var = f"GUARDIAN_API_LANE_{name.upper()}"
+        raw = (os.getenv(var) or "").strip()
+        if not raw:
+            continue
+        limit_raw, _, queue_raw = raw.partition(":")
+        try:
+            limit = int(limit_raw)
+            queue = int(queue_raw) if queue_raw else 0
+        except ValueError as exc:
+            raise ValueError(f"{var} debe ser 'limite[:cola]'.") from exc
+        if limit < 1 or queue < 0:
+            raise ValueError(f"{var}: límite >= 1 y cola >= 0.")
+        lanes[name] = LaneConfig(limit, queue)
+
+    used = sum(lane.limit + lane.queue for lane in lanes.values())
+    if used + HEALTH_RESERVED_THREADS > threads:
+        raise ValueError(
+            f"Los carriles ocupan {used} threads y GUARDIAN_API_THREADS={threads}; "
+            f"se necesitan al menos {used + HEALTH_RESERVED_THREADS}."
+        )
+    return lanes
+
+
+def _parse_server() -> ServerConfig:
+    """
+    Parsea los parámetros del servidor WSGI.
+
+    :returns: Configuración del servidor.
+    :raises ValueError: Si algún valor es inválido.
+    """
+    kind = (os.getenv("GUARDIAN_API_SERVER") or "auto").strip().lower()
+    if kind not in SERVER_KINDS:
+        raise ValueError(f"GUARDIAN_API_SERVER debe ser uno de {SERVER_KINDS}.")
+    defaults = ServerConfig()
+    workers = _parse_int("GUARDIAN_API_WORKERS", defaults.workers, 1, 16)
+    threads = _parse_int("GUARDIAN_API_THREADS", defaults.threads, 1, 256)
+    return ServerConfig(
+        kind=kind,
+        workers=workers,
+        threads=threads,
+        keepalive=_parse_int("GUARDIAN_API_KEEPALIVE", defaults.keepalive, 0, 300),
+        timeout=_parse_int("GUARDIAN_API_TIMEOUT", defaults.timeout, 5, 3600),
+        graceful_timeout=_parse_int(
+            "GUARDIAN_API_GRACEFUL_TIMEOUT", defaults.graceful_timeout, 1, 300
+        ),
+        backlog=_parse_int("GUARDIAN_API_BACKLOG", defaults.backlog, 1, 4096),
+        # Por defecto solo vale la pena con más de un worker
+        shared_metrics=_parse_bool("GUARDIAN_API_SHARED_METRICS", workers > 1),
+        lanes=_parse_lanes(threads),
+    )
+
+
+def _parse_uids(raw: Optional[str]) -> frozenset[int]:
+    """
+    Parsea uids o nombres de usuario separados por coma.
+
+    :param raw: Valor crudo; vacío = el usuario del servicio.
+    :returns: Conjunto de uids.
+    :raises ValueError: Si un usuario no existe.
+    """
+    if not raw or not raw.strip():
+        return frozenset({os.getuid()})
+    uids: set[int] = set()
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item.isdigit():
+            uids.add(int(item))
+            continue
+        try:
+            uids.add(pwd.getpwnam(item).pw_uid)
+        except KeyError as exc:
+            raise ValueError(f"GUARDIAN_API_UNIX_UIDS: usuario {item!r} no existe.") from exc
+    return frozenset(uids)
+
+
+def _parse_unix() -> Optional[UnixSocketConfig]:
+    """
+    Parsea el socket Unix local.
+
+    :returns: Configuración o ``None`` si no se definió la ruta.
+    :raises ValueError: Si algún valor es inválido.
+    """
+    path = (os.getenv("GUARDIAN_API_UNIX_SOCKET") or "").strip()
+    if not path:
+        return None
+    if not os.path.isabs(path):
+        raise ValueError("GUARDIAN_API_UNIX_SOCKET debe ser una ruta absoluta.")
+    raw_mode = (os.getenv("GUARDIAN_API_UNIX_SOCKET_MODE") or "660").strip()
+    try:
+        mode = int(raw_mode, 8)
+    except ValueError as exc:
+        raise ValueError("GUARDIAN_API_UNIX_SOCKET_MODE debe ser octal.") from exc
+    if not 0 <= mode <= 0o777:
+        raise ValueError("GUARDIAN_API_UNIX_SOCKET_MODE fuera de rango.")
+    return UnixSocketConfig(
+        path=path,
+        mode=mode,
+        uids=_parse_uids(os.getenv("GUARDIAN_API_UNIX_UIDS")),
+    )
+
+
+def _parse_ratelimit() -> RateLimitConfig:
+    """
+    Parsea los límites de admisión.
+
+    :returns: Configuración validada.
+    :raises ValueError: Si algún valor es inválido.
+    """
+    defaults = RateLimitConfig()
+    return RateLimitConfig(
+        enabled=_parse_bool("GUARDIAN_API_RATELIMIT", defaults.enabled),
+        rate=_parse_int("GUARDIAN_API_RATE", defaults.rate, 1, 1000),
+        burst=_parse_int("GUARDIAN_API_BURST", defaults.burst, 1, 10000),
+        route_rate=_parse_int("GUARDIAN_API_ROUTE_RATE", defaults.route_rate, 1, 1000),
+        route_burst=_parse_int("GUARDIAN_API_ROUTE_BURST", defaults.route_burst, 1, 10000),
+        global_route_rate=_parse_int(
+            "GUARDIAN_API_GLOBAL_ROUTE_RATE", defaults.global_route_rate, 1, 1000
+        ),
+        global_route_burst=_parse_int(
+            "GUARDIAN_API_GLOBAL_ROUTE_BURST", defaults.global_route_burst, 1, 10000
+        ),
+    )
+
+
 def load_settings() -> NetworkConfig:
     """
     Carga y valida configuración desde entorno/.env.
@@ -87,7 +383,13 @@ def load_settings() -> NetworkConfig:
     try:
         host = _parse_host(os.getenv("GUARDIAN_API_HOST"), DEFAULT_HOST)
         port = _parse_port(os.getenv("GUARDIAN_API_PORT"), DEFAULT_PORT)
-        return NetworkConfig(host=host, port=port)
+        return NetworkConfig(
+            host=host,
+            port=port,
+            server=_parse_server(),
+            unix=_parse_unix(),
+            ratelimit=_parse_ratelimit(),
+        )
     except ValueError as err:
         # Falla rápido; systemd lo verá como on-failure si así lo configuras
         raise SystemExit(f"Configuración inválida: {err}") from err
@@ -47,11 +47,13 @@ After=network.target
 
 [Service]
 WorkingDirectory=${PROJECT_DIR}
-ExecStart=${PYTHON_BIN} -m flask run --host=0.0.0.0 --port=5000
-Environment="FLASK_APP=${APP_FILE}"
-Environment="FLASK_END=production"
+ExecStart=${PYTHON_BIN} ${APP_FILE}
 Environment="PYTHONUNBUFFERED=1"
+Environment="GUARDIAN_API_SERVER=gunicorn"
 Restart=on-failure
+# Apagado ordenado: gunicorn espera GUARDIAN_API_GRACEFUL_TIMEOUT (30 s)
+KillSignal=SIGTERM
+TimeoutStopSec=40
 StandardOutput=journal
 StandardError=journal
 User=pi
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Subida de archivos dentro de ``BASE_DIR``.
+
+- ``PUT /files/content/<path:raw_path>``: escribe el cuerpo del request
+  en el archivo destino.
+- ``GET /files/upload/<path:raw_path>``: consulta cuántos bytes lleva
+  una subida parcial (para reanudarla).
+
+El cuerpo se copia por bloques a ``.<nombre>.part`` en el mismo
+directorio (nunca entero en memoria), se verifica el SHA-256 opcional y
+recién entonces se renombra atómicamente sobre el destino. Para subidas
+reanudables se envían tramos con ``?offset=N&final=0`` y el último con
+``final=1`` (default).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import stat
+import threading
+from pathlib import Path
+from typing import Any, Final, Literal, Optional, Union
+from flask import Blueprint, Response, jsonify, request
+
+from routes.validations.files import resolve_safe_path
+from utils.hashing import sha256_file
+
+# Inicializa el blueprint
+bp: Blueprint = Blueprint("files_upload", __name__)
+
+# Bloque de copia del cuerpo a disco
+UPLOAD_CHUNK_SIZE: Final[int] = 256 * 1024
+
+# Margen libre que se deja en la SD al aceptar una subida
+_MIN_FREE_BYTES: Final[int] = 64 * 1024 * 1024
+
+# Destinos con subida en curso (evita dos escrituras al mismo .part)
+_ACTIVE: set[Path] = set()
+_ACTIVE_LOCK = threading.Lock()
+
+
+# region helpers
+def _part_path(target: Path) -> Path:
+    """Archivo temporal de una subida, junto al destino."""
+    return target.with_name(f".{target.name}.part")
+
+
+def _resolve_target(
+    raw_path: str,
+) -> Union[Path, tuple[Response, Literal[400, 403, 404, 409]]]:
+    """
+    Resuelve y valida el destino de una subida.
+
+    :param raw_path: Ruta cruda provista por el cliente.
+    :returns: Ruta destino o respuesta de error lista para devolver.
+    """
+    # resuelve y valida la ruta contra el chroot lógico
+    resolved: Optional[Path] = resolve_safe_path(raw_path)
+
+    # input mal formado da error 400
+    if resolved is None:
+        return jsonify({"error": "Ruta inválida"}), 400
+
+    # fuera del scope permitido retorna error 403
+    if resolved == Path():
+        return jsonify({"error": "Ruta no autorizada"}), 403
+
+    # el directorio padre debe existir y el destino no puede ser dir
+    if not resolved.parent.is_dir():
+        return jsonify({"error": "Directorio destino no existe"}), 404
+    if resolved.is_dir():
+        return jsonify({"error": "El destino es un directorio"}), 409
+    return resolved
+
+
+def _part_size(part: Path) -> int:
+    """Tamaño actual de la subida parcial (0 si no hay)."""
+    try:
+        return part.lstat().st_size
+    except OSError:
+        return 0
+
+
+def _fsync_dir(path: Path) -> None:
+    """Persiste el rename en el directorio (importante en SD)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+# endregion
+
+
+# region endpoints
+@bp.route("/upload/<path:raw_path>", methods=["GET"])
+def upload_status(
+    raw_path: str,
+) -> Union[Response, tuple[Response, Literal[400, 403, 404, 409]]]:
+    """
+    Informa el avance de una subida parcial.
+
+    :param raw_path: Ruta destino (relativa o absoluta).
+    :returns: JSON ``{"offset": int, "in_progress": bool}``.
+    """
+    target = _resolve_target(raw_path)
+    if isinstance(target, tuple):
+        return target
+
+    part = _part_path(target)
+    with _ACTIVE_LOCK:
+        active = target in _ACTIVE
+    return jsonify({
+        "path": raw_path,
+        "offset": _part_size(part),
+        "in_progress": active,
+    })
+
+
+@bp.route("/content/<path:raw_path>", methods=["PUT"])
+def upload_file(
+    raw_path: str,
+) -> Union[Response, tuple[Response, int]]:
+    """
+    Sube (o continúa subiendo) un archivo dentro de ``BASE_DIR``.
+
+    Query:
+    - ``offset``: byte desde el que continúa este tramo (default 0).
+    - ``final``: ``0`` deja la subida abierta para más tramos.
+    - ``sha256``: digest esperado del archivo completo (también vía
+      header ``X-Content-SHA256``).
+
+    :param raw_path: Ruta destino (relativa o absoluta).
+    :returns: JSON con el resultado o error ``{"error": str}``.
+    """
+    target = _resolve_target(raw_path)
+    if isinstance(target, tuple):
+        return target
+
+    # Parámetros
+    try:
+        offset = int(request.args.get("offset", "0"))
+    except ValueError:
+        return jsonify({"error": "'offset' debe ser entero"}), 400
+    if offset < 0:
+        return jsonify({"error": "'offset' debe ser >= 0"}), 400
+    final: bool = request.args.get("final", "1").lower() not in (
+        "0", "false", "no"
+    )
+    expected: str = (
+        request.args.get("sha256")
+        or request.headers.get("X-Content-SHA256", "")
+    ).strip().lower()
+
+    # Verifica que quepa antes de escribir nada
+    length: Optional[int] = request.content_length
+    if length is not None:
+        free = shutil.disk_usage(target.parent).free
+        if length + _MIN_FREE_BYTES > free:
+            return jsonify({"error": "Espacio insuficiente"}), 507
+
+    # Una sola subida por destino a la vez
+    with _ACTIVE_LOCK:
+        if target in _ACTIVE:
+            return jsonify({"error": "Subida en curso para ese destino"}), 423
+        _ACTIVE.add(target)
+
+    try:
+        return _write_upload(target, offset, final, expected, raw_path)
+    finally:
+        with _ACTIVE_LOCK:
+            _ACTIVE.discard(target)
+# endregion
+
+
+def _write_upload(
+    target: Path,
+    offset: int,
+    final: bool,
+    expected: str,
+    raw_path: str,
+) -> Union[Response, tuple[Response, int]]:
+    """
+    Copia el cuerpo al ``.part`` y, si es el tramo final, lo publica.
+
+    :param target: Destino ya validado.
+    :param offset: Byte desde el que continúa el tramo.
+    :param final: Si se debe verificar y renombrar al terminar.
+    :param expected: SHA-256 esperado (vacío = no verificar).
+    :param raw_path: Ruta original, solo para la respuesta.
+    :returns: Respuesta Flask.
+    """
+    part = _part_path(target)
+
+    # Un tramo intermedio debe continuar exactamente donde quedó
+    current = _part_size(part)
+    if offset and offset != current:
+        return jsonify({
+            "error": "Offset no coincide con la subida parcial",
+            "offset": current,
+        }), 409
+
+    # Si parte de 0 se puede hashear en la misma pasada
+    digest: Optional[Any] = hashlib.sha256() if offset == 0 else None
+
+    # El .part debe ser un archivo regular: un symlink escribiría fuera
+    # de BASE_DIR y un FIFO bloquearía el open
+    try:
+        if not stat.S_ISREG(os.lstat(part).st_mode):
+            return jsonify({"error": "Archivo parcial inválido"}), 409
+    except FileNotFoundError:
+        pass
+    try:
+        fd = os.open(
+            part, os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW | os.O_NONBLOCK, 0o644
+        )
+    except OSError:
+        # ELOOP: apareció un symlink entre el lstat y el open
+        return jsonify({"error": "Archivo parcial inválido"}), 409
+    written = 0
+    try:
+        if not stat.S_ISREG(os.fstat(fd).st_mode):
+            return jsonify({"error": "Archivo parcial inválido"}), 409
+        os.set_blocking(fd, True)
+        # Se trunca recién después de confirmar que es regular
+        if offset == 0:
+            os.ftruncate(fd, 0)
+        os.lseek(fd, offset, os.SEEK_SET)
+
+        # Copia por bloques con un buffer reutilizado
+        buf = bytearray(UPLOAD_CHUNK_SIZE)
+        view = memoryview(buf)
+        stream = request.stream
+        while True:
+            n = stream.readinto(buf)  # type: ignore[attr-defined]
+            if not n:
+                break
+            chunk = view[:n]
+            while chunk:
+                sent = os.write(fd, chunk)
+                chunk = chunk[sent:]
+            if digest is not None:
+                digest.update(view[:n])
+            written += n
+
+        # Descarta basura de un intento anterior más largo
+        os.ftruncate(fd, offset + written)
+        if final:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    size = offset + written
+    if not final:
+        return jsonify({
+            "path": raw_path,
+            "offset": size,
+            "complete": False,
+        }), 202
+
+    # Verifica integridad (si fue reanudada se relee el .part)
+    actual: str = (
+        digest.hexdigest() if digest is not None else sha256_file(part)[0]
+    )
+    if expected and actual != expected:
+        part.unlink(missing_ok=True)
+        return jsonify({
+            "error": "SHA-256 no coincide",
+            "expected": expected,
+            "actual": actual,
+        }), 422
+
+    # Publica atómicamente
+    os.replace(part, target)
+    _fsync_dir(target.parent)
+
+    return jsonify({
+        "path": raw_path,
+        "size": size,
+        "sha256": actual,
+        "complete": True,
+    }), 201
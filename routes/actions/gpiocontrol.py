@@ -1,21 +1,95 @@
 """
 Rutas para controlar pines GPIO
+
+Las acciones se ejecutan en segundo plano: el POST responde ``202`` con
+el id del trabajo y su estado se consulta en ``/jobs/<job_id>``.
+
+- POST /<action>: Encola on/off/reboot/test (body ``{"pins": [...]}``)
+- POST /sequence: Encola una secuencia de pasos con tiempos relativos
+- POST /inputs: Registra entradas con detección de flancos
+- DELETE /inputs/<pin>: Libera una entrada
+- GET /jobs: Historial de trabajos recientes
+- GET /jobs/<job_id>: Estado de un trabajo
+- DELETE /jobs/<job_id>: Cancela un trabajo
+
+``/<action>`` y ``/sequence`` respetan el header ``Idempotency-Key``: un
+reintento con la misma llave devuelve el mismo trabajo.
 """
 
 # Librerias
-from typing import List, Optional, Union
-from flask import Blueprint, jsonify, request
-from utils.gpio import GPIOController
+from typing import Any, Callable, Dict, List, Optional, Union
+from flask import Blueprint, jsonify, request, url_for
+from utils.gpio_actions import (
+    ACTIONS, PinsBusy, action_func, sequence_func, submit,
+)
+from utils.gpio_events import inputs
+from utils.idempotency import idempotent
+from utils.gpio_sequence import parse_steps, sequence_pins
+from utils.jobs import CANCELLED, FAILED, SUCCEEDED, Job, gpio_jobs
 
 # Inicializa el blueprint
 bp: Blueprint = Blueprint("gpiocontrol", __name__)
 
+# Máximo de segundos que se puede esperar el resultado con ?wait=
+_MAX_WAIT: float = 60.0
+
+# Código HTTP de un trabajo terminado con ``?wait=``: cancelarlo es un
+# resultado esperado (409), no un error del servidor
+_FINISHED_CODES: Dict[str, int] = {SUCCEEDED: 200, CANCELLED: 409, FAILED: 500}
+
+
+def _submit(
+    action: str, pins: List[int], func: Callable[[Job], Any], wait: float,
+) -> Any:
+    """
+    Encola el trabajo y arma la respuesta.
+
+    :param action: Nombre de la acción
+    :param pins: Pines a reservar
+    :param func: Función del trabajo
+    :param wait: Segundos a esperar el resultado (0 = no esperar)
+    """
+    try:
+        job = submit(action, pins, func)
+    except PinsBusy as e:
+        return jsonify({"error": str(e)}), 423  # 423 Locked
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+
+    # Espera opcional al resultado
+    if wait and job.done_event.wait(wait):
+        return _job_response(job, _FINISHED_CODES.get(job.status, 500))
+
+    return _job_response(job, 202)
+
+
+def _parse_wait() -> Optional[float]:
+    """Lee ``?wait=`` acotado; ``None`` si es inválido."""
+    try:
+        return min(max(float(request.args.get("wait", "0")), 0.0), _MAX_WAIT)
+    except ValueError:
+        return None
+
+
+def _job_response(job: Job, code: int) -> Any:
+    """Respuesta JSON uniforme para un trabajo."""
+    body: Dict[str, Any] = job.to_dict()
+    body["status_url"] = url_for(".job_status", job_id=job.id)
+    resp = jsonify(body)
+    resp.headers["Location"] = body["status_url"]
+    return resp, code
+
+
 @bp.route("/<action>", methods=["POST"])
+@idempotent
 def control_gpio(action: str):
     """
     Controla pines GPIO mediante HTTP.
 
-    Requiere JSON en el body con `pins: List[int]`
+    Requiere JSON en el body con `pins: List[int]`. Responde ``202`` con
+    el trabajo encolado; con ``?wait=<segundos>`` espera hasta ese
+    tiempo a que termine (``200`` si terminó bien, ``409`` si se
+    canceló, ``500`` si falló).
     """
 
     # Obtiene los datos
@@ -25,35 +99,147 @@ def control_gpio(action: str):
     pins: Optional[Union[List[int], int]] = data.get("pins", [])
 
     # Verifica el formato
-    if not isinstance(pins, list):
+    if (
+        not isinstance(pins, list)
+        or not pins
+        or not all(isinstance(p, int) and not isinstance(p, bool) for p in pins)
+    ):
         return jsonify(
             {"error": "Formato inválido. Se requiere 'pins': List[int]"}
         ), 400
 
+    # Acción no reconocida
+    if action not in ACTIONS:
+        return jsonify({"error": f"Acción '{action}' no válida"}), 400
+    if action == "test" and len(pins) != 1:
+        return jsonify(
+            {"error": "Test requiere exactamente un pin."}
+        ), 400
+
+    wait = _parse_wait()
+    if wait is None:
+        return jsonify({"error": "'wait' debe ser numérico"}), 400
+
+    return _submit(action, pins, action_func(action, pins), wait)
+
+
+@bp.route("/sequence", methods=["POST"])
+@idempotent
+def gpio_sequence():
+    """
+    Encola una secuencia de cambios de GPIO.
+
+    Body JSON::
+
+        {"steps": [{"set": {"11": "off", "13": "off"}},
+                   {"set": {"11": "on", "13": "on"}, "after": 5}]}
+
+    Cada paso cambia su grupo de pines a la vez; ``after`` es relativo
+    al paso anterior y ``at`` relativo al inicio. El resultado del
+    trabajo incluye el retraso real de cada paso.
+    """
+    data = request.get_json(force=True)
     try:
-        # Realiza la operación
-        with GPIOController(pins) as gpio:
-            if action == "off":
-                success = gpio.change_state("off")
-            elif action == "on":
-                success = gpio.change_state("on")
-            elif action == "reboot":
-                success = gpio.reboot()
-            elif action == "test":
-                if len(pins) != 1:
-                    return jsonify(
-                        {"error": "Test requiere exactamente un pin."}
-                    ), 400
-                success = gpio.test(pins[0])
-            # Acción no reconocida
-            else:
-                return jsonify({"error": f"Acción '{action}' no válida"}), 400
+        steps = parse_steps(data.get("steps") if isinstance(data, dict) else None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    wait = _parse_wait()
+    if wait is None:
+        return jsonify({"error": "'wait' debe ser numérico"}), 400
+
+    pins = sequence_pins(steps)
+    return _submit("sequence", pins, sequence_func(pins, steps), wait)
+
+
+@bp.route("/inputs", methods=["POST"])
+def register_inputs():
+    """
+    Registra pines como entradas con detección de flancos.
+
+    Body JSON::
+
+        {"pins": [29, 31], "edge": "both", "debounce_ms": 50, "pull": "up"}
+
+    Los flancos se consultan en ``/gpio/events``.
+    """
+    data = request.get_json(force=True)
+    pins = data.get("pins") if isinstance(data, dict) else None
+    if (
+        not isinstance(pins, list)
+        or not pins
+        or not all(isinstance(p, int) and not isinstance(p, bool) for p in pins)
+    ):
+        return jsonify(
+            {"error": "Formato inválido. Se requiere 'pins': List[int]"}
+        ), 400
+
+    try:
+        configs = inputs.register(
+            pins,
+            edge=str(data.get("edge", "both")),
+            debounce_ms=int(data.get("debounce_ms", 0)),
+            pull=str(data.get("pull", "off")),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
     except RuntimeError as e:
         return jsonify({"error": str(e)}), 423  # 423 Locked
+    except OSError as e:
+        # La línea la retiene otro consumidor (EBUSY) o falta el chip
+        return jsonify({"error": f"No se pudo configurar la entrada: {e}"}), 409
+
+    return jsonify({"inputs": [cfg.to_dict() for cfg in configs]}), 201
 
-    # Si no registra el exito, devuelve un error
-    if not success:
-        return jsonify({"error": "Fallo la operación"}), 500
 
-    # Si llega hasta aca, todo va bien
-    return jsonify({"status": "ok", "action": action, "pins": pins}), 200
+@bp.route("/inputs/<int:pin>", methods=["DELETE"])
+def unregister_input(pin: int):
+    """
+    Deja de capturar flancos de una entrada y libera el pin.
+    """
+    try:
+        found = inputs.unregister(pin)
+    except (OSError, RuntimeError) as e:
+        return jsonify({"error": f"No se pudo liberar la entrada: {e}"}), 409
+    if not found:
+        return jsonify({"error": f"Pin {pin} no es una entrada registrada"}), 404
+    return jsonify({"pin": pin, "released": True})
+
+
+@bp.route("/jobs", methods=["GET"])
+def list_jobs():
+    """
+    Devuelve el historial de trabajos recientes (más nuevo primero).
+    """
+    return jsonify({"jobs": [job.to_dict() for job in gpio_jobs.list()]})
+
+
+@bp.route("/jobs/<string:job_id>", methods=["GET"])
+def job_status(job_id: str):
+    """
+    Devuelve el estado de un trabajo.
+    """
+    job = gpio_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Trabajo '{job_id}' no encontrado"}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route("/jobs/<string:job_id>", methods=["DELETE"])
+def cancel_job(job_id: str):
+    """
+    Cancela un trabajo en cola o en curso.
+
+    Un trabajo en curso se detiene en su próxima espera; los pines
+    quedan en el último estado aplicado.
+    """
+    job = gpio_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Trabajo '{job_id}' no encontrado"}), 404
+    if job.finished:
+        return jsonify({
+            "error": f"Trabajo '{job_id}' ya terminó",
+            "job": job.to_dict(),
+        }), 409
+    gpio_jobs.cancel(job_id)
+    return jsonify(job.to_dict()), 202
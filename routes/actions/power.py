@@ -1,18 +1,24 @@
 """
 Controlar reinicio de la Raspberry Pi vía API HTTP.
 
-Este endpoint ejecuta comandos de reinicio en la Raspberry
-y verifica si alguno tiene éxito.
+El reinicio es diferido: el request responde de inmediato y, pasado el
+retardo, se ejecutan los flush hooks y luego los comandos de reinicio.
 
-POST /reboot
+POST /reboot?delay=<s>: Programa el reinicio (default 3 s)
+DELETE /reboot: Cancela un reinicio programado que aún no empezó
+GET /last_reboot: Resultado del último reinicio pedido
 Requiere: Header con X-API-TOKEN
+Respeta el header ``Idempotency-Key`` (un reintento no reinicia dos veces).
 """
 
-from time import sleep
-from typing import Literal, Union
-from flask import Blueprint, jsonify
+from os import environ
+from pathlib import Path
+from typing import Final, Literal, Union
+from flask import Blueprint, jsonify, request
 from flask.wrappers import Response
-from utils.utils import run_cmd_raiser
+from utils.idempotency import idempotent
+from utils.peercred import peer_uid
+from utils.reboot import RebootManager
 
 # Inicializa el blueprint
 bp: Blueprint = Blueprint("power", __name__)
@@ -26,29 +32,62 @@ REBOOT_COMMANDS: list[str] = [
     "sudo systemctl --force --force reboot",
 ]
 
+# Retardo por defecto y máximo antes de reiniciar (s)
+_DEFAULT_DELAY: Final[float] = 3.0
+_MAX_DELAY: Final[float] = 300.0
 
-@bp.route("/reboot", methods=["GET"])
-def reboot() -> Union[Response, tuple[Response, Literal[500]]]:
+# Reinicio diferido del proceso
+reboot_manager: Final[RebootManager] = RebootManager(
+    Path(environ.get("REBOOT_STATE_PATH", "./last_reboot.json")),
+    REBOOT_COMMANDS,
+)
+
+
+@bp.route("/reboot", methods=["GET", "POST"])
+@idempotent
+def reboot() -> Union[Response, tuple[Response, Literal[202, 400]]]:
+    """
+    Programa el reinicio de la Raspberry.
+
+    Responde ``202`` de inmediato. Si ya había un reinicio programado
+    se devuelve ese (``scheduled: false``).
+
+    :return: JSON con el reinicio programado
+    :rtype: Union[Response, tuple[Response, Literal[202, 400]]]
     """
-    Reinicia la Raspberry localmente.
+    try:
+        delay = float(request.args.get("delay", _DEFAULT_DELAY))
+    except ValueError:
+        return jsonify({"error": "'delay' debe ser numérico"}), 400
+    delay = min(max(delay, 0.0), _MAX_DELAY)
 
-    Intenta varios comandos hasta que uno tenga éxito.
+    # Por el socket Unix no hay IP: se registra el uid del cliente
+    uid = peer_uid()
+    source = request.remote_addr or (f"unix:uid={uid}" if uid is not None else "")
+    record, created = reboot_manager.schedule(delay, source=source)
+    return jsonify({**record, "scheduled": created}), 202
 
-    :return: JSON con resultado de la operación
-    :rtype: Union[Response, tuple[Response, Literal[500]]]
+
+@bp.route("/reboot", methods=["DELETE"])
+def cancel_reboot() -> Union[Response, tuple[Response, Literal[409]]]:
+    """
+    Cancela el reinicio programado si todavía no empezó.
     """
+    if not reboot_manager.cancel():
+        return jsonify({"error": "No hay reinicio programado"}), 409
+    return jsonify({"status": "cancelled"})
+
 
-    for command in REBOOT_COMMANDS:
-        try:
-            run_cmd_raiser(command)
-            sleep(0.5)
-            return jsonify({"status": "rebooting", "command": command})
-        # Si lanza una excepción intentará con el siguiente comando
-        except Exception as e: # pylint: disable=broad-except
-            # Imprime el error
-            print(e)
-            # Intenta siguiente comando
-            continue
-
-    # Si llegó hasta aquí, todos fallaron
-    return jsonify({"error": "Todos los métodos de reinicio fallaron."}), 500
+@bp.route("/last_reboot", methods=["GET"])
+def last_reboot() -> Union[Response, tuple[Response, Literal[404]]]:
+    """
+    Devuelve el último reinicio pedido: etapas, flush hooks, comando
+    usado y si el equipo efectivamente reinició (``rebooted``).
+    """
+    pending = reboot_manager.pending()
+    if pending is not None:
+        return jsonify(pending)
+    record = reboot_manager.last()
+    if record is None:
+        return jsonify({"error": "Sin reinicios registrados"}), 404
+    return jsonify(record)
@@ -0,0 +1,172 @@
+"""
+Rutas para planificar acciones GPIO recurrentes.
+
+- GET /: Lista las planificaciones (con ``next_run`` y ``last_run``)
+- POST /: Crea una planificación
+- GET /<id>: Detalle de una planificación
+- PATCH /<id>: Modifica campos (cron, pins, enabled...)
+- DELETE /<id>: Borra una planificación
+- POST /<id>/run: Ejecuta ya mismo (sin alterar el calendario)
+
+Body de ejemplo::
+
+    {"name": "reinicio router", "cron": "0 4 * * *",
+     "action": "reboot", "pins": [11]}
+"""
+
+from datetime import datetime
+from typing import Any, Dict
+from flask import Blueprint, jsonify, request
+
+from utils.gpio_actions import ACTIONS, action_func, sequence_func, submit
+from utils.gpio_sequence import parse_steps, sequence_pins
+from utils.jobs import Job
+from utils.scheduler import CronExpr, Schedule, scheduler
+
+# Inicializa el blueprint
+bp: Blueprint = Blueprint("schedules", __name__)
+
+# Campos editables
+_FIELDS = ("name", "cron", "action", "pins", "steps", "enabled")
+
+
+def dispatch_schedule(sch: Schedule) -> Job:
+    """
+    Encola la acción de una planificación en ``gpio_jobs``.
+
+    :raises PinsBusy | RuntimeError: Si no se pudo encolar.
+    """
+    if sch.action == "sequence":
+        steps = parse_steps(sch.steps)
+        pins = sequence_pins(steps)
+        return submit("sequence", pins, sequence_func(pins, steps))
+    return submit(sch.action, sch.pins, action_func(sch.action, sch.pins))
+
+
+# El temporizador arranca al registrar el blueprint
+bp.record_once(lambda _state: scheduler.start(dispatch_schedule))
+
+
+def _validate(data: Any, current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida los campos recibidos sobre el estado actual.
+
+    :param data: Body JSON.
+    :param current: Valores actuales (``{}`` al crear).
+    :returns: Campos limpios a guardar.
+    :raises ValueError: Si algo es inválido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Se requiere un objeto JSON")
+    unknown = set(data) - set(_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {sorted(unknown)}")
+
+    clean: Dict[str, Any] = {k: data[k] for k in _FIELDS if k in data}
+    merged = {**current, **clean}
+
+    if not isinstance(merged.get("name", ""), str):
+        raise ValueError("'name' debe ser texto")
+    if not isinstance(merged.get("enabled", True), bool):
+        raise ValueError("'enabled' debe ser booleano")
+    if not isinstance(merged.get("cron"), str):
+        raise ValueError("Se requiere 'cron'")
+    # Falla si la expresión es inválida o nunca se cumple
+    CronExpr(merged["cron"]).next_after(datetime.now())
+
+    action = merged.get("action")
+    if action == "sequence":
+        parse_steps(merged.get("steps"))
+        clean.setdefault("pins", [])
+    elif action in ACTIONS:
+        pins = merged.get("pins")
+        if (
+            not isinstance(pins, list)
+            or not pins
+            or not all(isinstance(p, int) and not isinstance(p, bool) for p in pins)
+        ):
+            raise ValueError("Se requiere 'pins': List[int]")
+        if action == "test" and len(pins) != 1:
+            raise ValueError("Test requiere exactamente un pin.")
+    else:
+        raise ValueError(f"Acción {action!r} no válida")
+
+    if not current:
+        clean.setdefault("name", action)
+    return clean
+
+
+@bp.route("/", methods=["GET"])
+def list_schedules():
+    """
+    Lista las planificaciones, la próxima a ejecutarse primero.
+    """
+    return jsonify({"schedules": scheduler.list()})
+
+
+@bp.route("/", methods=["POST"])
+def create_schedule():
+    """
+    Crea una planificación.
+    """
+    try:
+        data = _validate(request.get_json(force=True), {})
+        sch = scheduler.create(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(sch), 201
+
+
+@bp.route("/<string:schedule_id>", methods=["GET"])
+def get_schedule(schedule_id: str):
+    """
+    Devuelve una planificación.
+    """
+    sch = scheduler.get(schedule_id)
+    if sch is None:
+        return jsonify({"error": f"Planificación '{schedule_id}' no encontrada"}), 404
+    return jsonify(sch)
+
+
+@bp.route("/<string:schedule_id>", methods=["PATCH"])
+def update_schedule(schedule_id: str):
+    """
+    Modifica campos de una planificación.
+    """
+    current = scheduler.get(schedule_id)
+    if current is None:
+        return jsonify({"error": f"Planificación '{schedule_id}' no encontrada"}), 404
+    try:
+        data = _validate(request.get_json(force=True), current)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # Otro request pudo borrarla entre la lectura y la escritura
+    sch = scheduler.update(schedule_id, data)
+    if sch is None:
+        return jsonify({"error": f"Planificación '{schedule_id}' no encontrada"}), 404
+    return jsonify(sch)
+
+
+@bp.route("/<string:schedule_id>", methods=["DELETE"])
+def delete_schedule(schedule_id: str):
+    """
+    Borra una planificación.
+    """
+    if not scheduler.delete(schedule_id):
+        return jsonify({"error": f"Planificación '{schedule_id}' no encontrada"}), 404
+    return jsonify({"id": schedule_id, "deleted": True})
+
+
+@bp.route("/<string:schedule_id>/run", methods=["POST"])
+def run_schedule(schedule_id: str):
+    """
+    Ejecuta una planificación ya mismo.
+
+    ``last_status`` indica si se encoló (``queued``) o por qué se omitió.
+    """
+    sch = scheduler.run_now(schedule_id, dispatch_schedule)
+    if sch is None:
+        return jsonify({"error": f"Planificación '{schedule_id}' no encontrada"}), 404
+    return jsonify(sch), 202 if sch["last_status"] == "queued" else 409
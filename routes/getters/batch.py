@@ -0,0 +1,259 @@
+"""
+Varias consultas GET en un solo request.
+
+- POST /batch: Ejecuta una lista de rutas GET de la API y devuelve
+  todas las respuestas juntas
+
+Body::
+
+    {"requests": ["/system/getall", "/hardware/getall",
+                  {"id": "nginx", "path": "/services/status/nginx"}],
+     "timeout": 10}
+
+Respuesta::
+
+    {"responses": [{"id": ..., "path": ..., "status": 200,
+                    "body": {...}, "elapsed_ms": 12.3}, ...]}
+
+El request externo se autentica una vez; cada ruta se despacha dentro
+del proceso (sin red ni ``_auth_guard``) usando el mapa de URLs de la
+app, en paralelo. Las redirecciones internas (``/storage/usage`` ->
+``/storage/usage/``) se siguen dentro del batch. Solo se admiten
+respuestas JSON o texto (no streams SSE) y rutas sin efectos: un GET que
+también acepta POST/DELETE (``/power/reboot``) vuelve con ``405``.
+
+Un ítem que no termina a tiempo vuelve con ``504``. Si aún esperaba en
+el pool se cancela; si ya estaba corriendo no se puede interrumpir y
+termina en segundo plano. Esos ítems huérfanos quedan acotados por el
+tamaño del pool (``POOL_SIZE`` threads por worker): mientras lo ocupan,
+los ítems nuevos esperan y vencen con ``504`` en vez de sumar threads.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Final, List, Optional
+from urllib.parse import unquote, urlsplit
+
+from flask import Blueprint, Flask, Response, current_app, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+from utils.peercred import PEER_GID, PEER_PID, PEER_UID
+from utils.utils import INTERNAL_REQUEST
+
+# Inicializa el blueprint
+bp: Blueprint = Blueprint("batch", __name__)
+
+# Límites
+MAX_ITEMS: Final[int] = 20
+DEFAULT_TIMEOUT: Final[float] = 10.0
+MAX_TIMEOUT: Final[float] = 30.0
+POOL_SIZE: Final[int] = 8
+
+# Redirecciones internas que se siguen por ítem
+_MAX_REDIRECTS: Final[int] = 3
+_REDIRECT_CODES: Final[frozenset[int]] = frozenset({301, 302, 303, 307, 308})
+
+# Métodos sin efectos; una ruta que acepte otros no se despacha
+_SAFE_METHODS: Final[frozenset[str]] = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Headers del request externo que se pasan a cada ítem
+_FORWARDED_HEADERS: Final[tuple[str, ...]] = ("Accept", "Accept-Language", "User-Agent")
+
+# Llaves del environ externo que se copian (origen del cliente)
+_FORWARDED_ENVIRON: Final[tuple[str, ...]] = (
+    "REMOTE_ADDR", PEER_PID, PEER_UID, PEER_GID,
+)
+
+# Threads compartidos por todos los batch del proceso
+_POOL: Final[ThreadPoolExecutor] = ThreadPoolExecutor(
+    max_workers=POOL_SIZE, thread_name_prefix="batch"
+)
+
+
+def _parse_items(data: Any) -> List[Dict[str, str]]:
+    """
+    Valida la lista de rutas.
+
+    :param data: Body JSON.
+    :returns: ``[{"id", "path"}]``.
+    :raises ValueError: Si el body es inválido.
+    """
+    raw = data.get("requests") if isinstance(data, dict) else data
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("Se requiere 'requests': lista de rutas")
+    if len(raw) > MAX_ITEMS:
+        raise ValueError(f"Máximo {MAX_ITEMS} rutas por batch")
+
+    items: List[Dict[str, str]] = []
+    for i, item in enumerate(raw):
+        if isinstance(item, str):
+            item = {"path": item}
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise ValueError(f"Ítem {i}: se requiere 'path'")
+        path = item["path"]
+        if not path.startswith("/") or path.startswith("//"):
+            raise ValueError(f"Ítem {i}: 'path' debe empezar con '/'")
+        if path.split("?", 1)[0].rstrip("/") == request.path.rstrip("/"):
+            raise ValueError(f"Ítem {i}: no se admite /batch anidado")
+        items.append({"id": str(item.get("id", i)), "path": path})
+    return items
+
+
+def _parse_timeout(data: Any) -> float:
+    """Timeout total del batch (s)."""
+    raw = data.get("timeout", DEFAULT_TIMEOUT) if isinstance(data, dict) else DEFAULT_TIMEOUT
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)) or raw <= 0:
+        raise ValueError("'timeout' debe ser un número positivo")
+    return min(float(raw), MAX_TIMEOUT)
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milisegundos desde ``start`` (``time.monotonic``)."""
+    return round((time.monotonic() - start) * 1000, 1)
+
+
+def _redirect_environ(
+    environ: Dict[str, Any], location: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Environ para seguir una redirección dentro de la app.
+
+    :param environ: Environ del intento anterior.
+    :param location: Header ``Location`` de la respuesta.
+    :returns: Environ nuevo o ``None`` si apunta fuera de la app.
+    """
+    url = urlsplit(location)
+    if url.netloc and url.netloc != environ.get("HTTP_HOST", url.netloc):
+        return None
+    if not url.path.startswith("/"):
+        return None
+    return {
+        **environ,
+        # PATH_INFO va decodificado y en latin-1, como lo arma WSGI
+        "PATH_INFO": unquote(url.path).encode().decode("latin-1"),
+        "QUERY_STRING": url.query,
+    }
+
+
+def _dispatch(app: Flask, environ: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ejecuta un GET dentro del proceso.
+
+    :param app: Aplicación Flask.
+    :param environ: Environ WSGI del ítem.
+    :returns: ``{"status", "body", "elapsed_ms"}``.
+    """
+    start = time.monotonic()
+    result = _dispatch_once(app, environ)
+    for _ in range(_MAX_REDIRECTS):
+        location = result.pop("location", None)
+        if location is None:
+            break
+        redirected = _redirect_environ(environ, location)
+        if redirected is None:
+            result = {
+                "status": 502,
+                "body": {"error": f"Redirección fuera de la API: {location}"},
+            }
+            break
+        environ = redirected
+        result = _dispatch_once(app, environ)
+    else:
+        if result.pop("location", None) is not None:
+            result = {"status": 508, "body": {"error": "Demasiadas redirecciones"}}
+    result["elapsed_ms"] = _elapsed_ms(start)
+    return result
+
+
+def _dispatch_once(app: Flask, environ: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Un intento de :func:`_dispatch`.
+
+    :returns: ``{"status", "body"}`` más ``"location"`` si la respuesta
+        es una redirección.
+    """
+    with app.request_context(environ):
+        rule = request.url_rule
+        if rule is not None and rule.methods and rule.methods - _SAFE_METHODS:
+            # GET que también es acción (p. ej. /power/reboot)
+            return {"status": 405, "body": {"error": "Ruta con efectos; no se admite en batch"}}
+        resp: Response = app.make_response(app.full_dispatch_request())
+    try:
+        if resp.status_code in _REDIRECT_CODES and resp.location:
+            return {"status": resp.status_code, "body": None, "location": resp.location}
+        if resp.mimetype == "text/event-stream":
+            return {"status": 400, "body": {"error": "Respuestas en stream no soportadas"}}
+        if resp.is_json:
+            body: Any = resp.get_json(silent=True)
+        elif resp.mimetype.startswith("text/"):
+            body = resp.get_data(as_text=True)
+        else:
+            return {"status": 415, "body": {"error": f"Tipo {resp.mimetype} no soportado en batch"}}
+        return {"status": resp.status_code, "body": body}
+    finally:
+        resp.close()
+
+
+@bp.route("", methods=["POST"])
+def run_batch():
+    """
+    Ejecuta varias rutas GET y devuelve sus respuestas en orden.
+    """
+    data = request.get_json(force=True, silent=True)
+    try:
+        items = _parse_items(data)
+        timeout = _parse_timeout(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    app: Flask = current_app._get_current_object()  # type: ignore[attr-defined]  # pylint: disable=protected-access
+    base: Dict[str, Any] = {
+        key: request.environ[key]
+        for key in _FORWARDED_ENVIRON
+        if key in request.environ
+    }
+    base[INTERNAL_REQUEST] = True
+    headers = {
+        name: request.headers[name]
+        for name in _FORWARDED_HEADERS
+        if name in request.headers
+    }
+
+    start = time.monotonic()
+    futures = []
+    for item in items:
+        path, _, query = item["path"].partition("?")
+        environ = EnvironBuilder(
+            path=path,
+            query_string=query,
+            method="GET",
+            headers=headers,
+            environ_base=base,
+        ).get_environ()
+        futures.append(_POOL.submit(_dispatch, app, environ))
+
+    wait(futures, timeout=timeout)
+
+    responses: List[Dict[str, Any]] = []
+    for item, future in zip(items, futures):
+        result: Dict[str, Any]
+        if not future.done():
+            # Si ya corría sigue en el pool hasta terminar (ver docstring)
+            future.cancel()
+            result = {
+                "status": 504,
+                "body": {"error": "Timeout"},
+                "elapsed_ms": _elapsed_ms(start),
+            }
+        elif future.exception() is not None:
+            result = {
+                "status": 500,
+                "body": {"error": str(future.exception())},
+                "elapsed_ms": _elapsed_ms(start),
+            }
+        else:
+            result = future.result()
+        responses.append({**item, **result})
+    return jsonify({"responses": responses})
@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+"""
+Consultas de metadatos y contenido de archivos dentro de ``BASE_DIR``.
+
+- ``GET /files/stat/<path:raw_path>``: ``stat`` + SHA-256 de un archivo.
+- ``POST /files/stat``: lo mismo para una lista de rutas.
+- ``GET /files/content/<path:raw_path>``: descarga con soporte de
+  ``Range``, GET condicional y gzip opcional para texto.
+- ``GET /files/list/<path:raw_path>``: listado paginado de un
+  directorio (``cursor``, ``limit``, ``sort``).
+- ``GET /files/watch/<path:raw_path>``: espera cambios (inotify) en
+  long-poll, o como stream SSE con ``stream=1``.
+
+El SHA-256 se cachea por ``(dispositivo, inodo, tamaño, mtime_ns)``,
+así los archivos que no cambiaron nunca se vuelven a leer. Todas las
+rutas pasan por el confinamiento de ``resolve_safe_path``.
+"""
+
+from __future__ import annotations
+
+import base64
+import heapq
+import json
+import mimetypes
+import os
+import stat
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Final, Iterator, Literal, Optional, Union
+from flask import Blueprint, Response, jsonify, request, send_file
+
+from routes.validations.files import (
+    resolve_safe_path, resolve_safe_paths, stat_to_dict,
+)
+from utils.hashing import sha256_file
+from utils.inotify import FileEvent, Subscription, watcher
+
+# Inicializa el blueprint
+bp: Blueprint = Blueprint("filesystem", __name__)
+
+# Máximo de rutas por consulta en lote
+_BATCH_MAX_PATHS: Final[int] = 256
+
+# Bloque de lectura al comprimir al vuelo
+_GZIP_CHUNK_SIZE: Final[int] = 64 * 1024
+
+# Por debajo de esto no vale la pena comprimir
+_GZIP_MIN_SIZE: Final[int] = 1024
+
+# Paginación del listado de directorios
+_LIST_DEFAULT_LIMIT: Final[int] = 100
+_LIST_MAX_LIMIT: Final[int] = 1000
+
+# Long-poll / SSE de cambios
+_WATCH_DEFAULT_TIMEOUT: Final[float] = 30.0
+_WATCH_MAX_TIMEOUT: Final[float] = 300.0
+_WATCH_STREAM_MAX: Final[float] = 3600.0
+_WATCH_HEARTBEAT: Final[float] = 15.0
+# Ventana para juntar ráfagas de eventos en una sola respuesta
+_WATCH_COALESCE: Final[float] = 0.05
+
+# Extensiones de texto que ``mimetypes`` no reconoce como tales
+_TEXT_SUFFIXES: Final[frozenset[str]] = frozenset({
+    ".log", ".conf", ".cfg", ".ini", ".env", ".rsc", ".service",
+    ".yaml", ".yml", ".toml", ".md", ".csv", ".sh",
+})
+
+
+# region helpers
+def _flag(raw: Any) -> bool:
+    """Interpreta un flag booleano (query o JSON); por defecto es ``True``."""
+    if isinstance(raw, bool):
+        return raw
+    if raw is None:
+        return True
+    return str(raw).strip().lower() not in ("0", "false", "no")
+
+
+def _describe(real: Path, with_hash: bool) -> dict[str, Any]:
+    """
+    Arma metadatos (y hash si aplica) de una ruta ya confinada.
+
+    :param real: Ruta resuelta dentro de ``BASE_DIR``.
+    :param with_hash: Si se calcula SHA-256 para archivos regulares.
+    :returns: Dict con ``exists``, ``stat`` y opcionalmente ``sha256``.
+    """
+    try:
+        st = os.stat(real)
+    except OSError:
+        return {"exists": False}
+
+    result: dict[str, Any] = {"exists": True, "stat": stat_to_dict(st)}
+    result["stat"]["mtime_ns"] = st.st_mtime_ns
+
+    if with_hash and stat.S_ISREG(st.st_mode):
+        try:
+            digest, cached = sha256_file(real)
+            result["sha256"] = digest
+            result["hash_cached"] = cached
+        except (OSError, ValueError) as e:
+            result["hash_error"] = str(e)
+    return result
+
+
+def _is_text(path: Path) -> bool:
+    """Heurística por extensión para decidir si conviene gzip."""
+    if path.suffix.lower() in _TEXT_SUFFIXES:
+        return True
+    mime, _ = mimetypes.guess_type(path.name)
+    return bool(mime) and (
+        mime.startswith("text/")
+        or mime in ("application/json", "application/xml")
+    )
+
+
+def _gzip_stream(path: Path) -> Iterator[bytes]:
+    """
+    Comprime un archivo al vuelo en bloques, sin cargarlo entero.
+
+    :param path: Archivo a comprimir.
+    :returns: Generador de bloques en formato gzip.
+    """
+    # wbits=31 => cabecera y trailer gzip
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(_GZIP_CHUNK_SIZE)
+            if not chunk:
+                break
+            out = comp.compress(chunk)
+            if out:
+                yield out
+    yield comp.flush()
+
+
+def _entry_type(entry: os.DirEntry[str]) -> str:
+    """Tipo de la entrada usando el ``d_type`` del dirent (sin stat)."""
+    if entry.is_symlink():
+        return "symlink"
+    if entry.is_dir(follow_symlinks=False):
+        return "dir"
+    if entry.is_file(follow_symlinks=False):
+        return "file"
+    return "other"
+
+
+def _entry_key(sort: str) -> Callable[[os.DirEntry[str]], tuple[Any, str]]:
+    """
+    Llave de orden ``(valor, nombre)`` para un criterio de ``sort``.
+
+    Ordenar por nombre no necesita ``stat``; por tamaño o mtime se usa
+    ``entry.stat()``, que queda cacheado en el ``DirEntry``.
+    """
+    if sort == "name":
+        return lambda e: ("", e.name)
+    if sort == "size":
+        return lambda e: (e.stat(follow_symlinks=False).st_size, e.name)
+    return lambda e: (e.stat(follow_symlinks=False).st_mtime_ns, e.name)
+
+
+def _encode_cursor(sort: str, key: tuple[Any, str]) -> str:
+    """Cursor opaco con la última llave entregada."""
+    raw = json.dumps([sort, key[0], key[1]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str, sort: str) -> Optional[tuple[Any, str]]:
+    """
+    Decodifica un cursor emitido por :func:`_encode_cursor`.
+
+    :raises ValueError: Si el cursor es inválido o de otro ``sort``.
+    """
+    try:
+        c_sort, value, name = json.loads(base64.urlsafe_b64decode(cursor))
+    except Exception as e:  # pylint: disable=broad-except
+        raise ValueError("Cursor inválido") from e
+    if c_sort != sort or not isinstance(name, str):
+        raise ValueError("Cursor inválido")
+    return (value, name)
+
+
+def _sse_events(sub: Subscription, duration: float) -> Iterator[str]:
+    """
+    Genera el stream SSE de una suscripción.
+
+    Manda un comentario de *heartbeat* periódico para detectar clientes
+    desconectados; la suscripción se cierra al terminar el generador.
+
+    :param sub: Suscripción ya abierta.
+    :param duration: Segundos máximos de stream.
+    """
+    deadline = time.monotonic() + duration
+    try:
+        yield ": watching\n\n"
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            event: Optional[FileEvent] = sub.get(min(left, _WATCH_HEARTBEAT))
+            if event is None:
+                yield ": heartbeat\n\n"
+                continue
+            yield (
+                f"event: {event.event}\n"
+                f"data: {json.dumps(event.to_dict())}\n\n"
+            )
+    finally:
+        sub.close()
+# endregion
+
+
+# region endpoints
+@bp.route("/stat/<path:raw_path>", methods=["GET"])
+def file_stat(
+    raw_path: str,
+) -> Union[Response, tuple[Response, Literal[400, 403, 404]]]:
+    """
+    Devuelve tamaño, modo, mtime y SHA-256 de una ruta.
+
+    Query: ``hash=0`` evita calcular el SHA-256.
+
+    :param raw_path:
+        Ruta (relativa o absoluta).
+    :returns:
+        JSON con metadatos o error ``{"error": str}``.
+    """
+    # resuelve y valida la ruta contra el chroot lógico
+    resolved: Optional[Path] = resolve_safe_path(raw_path)
+
+    # input mal formado da error 400
+    if resolved is None:
+        return jsonify({"error": "Ruta inválida"}), 400
+
+    # fuera del scope permitido retorna error 403
+    if resolved == Path():
+        return jsonify({"error": "Ruta no autorizada"}), 403
+
+    result = _describe(resolved, _flag(request.args.get("hash")))
+    if not result["exists"]:
+        return jsonify({"path": raw_path, "exists": False}), 404
+
+    return jsonify({"path": raw_path, **result})
+
+
+@bp.route("/stat", methods=["POST"])
+def files_stat() -> Union[Response, tuple[Response, Literal[400]]]:
+    """
+    Metadatos y SHA-256 de varias rutas en una sola consulta.
+
+    Body JSON: ``{"paths": ["a.bin", "b.bin"], "hash": true}``.
+
+    :returns:
+        JSON ``{"results": [...]}`` con un resultado por ruta.
+    """
+    # Obtiene los datos
+    data: Any = request.get_json(silent=True) or {}
+    paths: Any = data.get("paths") if isinstance(data, dict) else None
+
+    # Verifica el formato
+    if (
+        not isinstance(paths, list)
+        or not paths
+        or not all(isinstance(p, str) for p in paths)
+    ):
+        return jsonify({"error": "Se requiere 'paths': List[str]"}), 400
+    if len(paths) > _BATCH_MAX_PATHS:
+        return jsonify(
+            {"error": f"Máximo {_BATCH_MAX_PATHS} rutas por consulta"}
+        ), 400
+
+    with_hash = _flag(data.get("hash"))
+
+    results: list[dict[str, Any]] = []
+    for raw, real in zip(paths, resolve_safe_paths(paths)):
+        if real is None:
+            results.append({"path": raw, "error": "Ruta inválida"})
+        elif real == Path():
+            results.append({"path": raw, "error": "Ruta no autorizada"})
+        else:
+            results.append({"path": raw, **_describe(real, with_hash)})
+
+    return jsonify({"results": results})
+
+
+@bp.route("/content/<path:raw_path>", methods=["GET"])
+def file_content(
+    raw_path: str,
+) -> Union[Response, tuple[Response, Literal[400, 403, 404]]]:
+    """
+    Descarga un archivo dentro de ``BASE_DIR``.
+
+    - El cuerpo se entrega como *file wrapper* del servidor WSGI (que
+      usa ``sendfile`` cuando lo soporta), nunca entero en memoria.
+    - ``Range`` para reanudar o leer la cola (``bytes=-65536``).
+    - GET condicional por ``If-Modified-Since`` / ``If-None-Match``.
+    - gzip al vuelo para texto si el cliente lo acepta y no pidió
+      ``Range``; ``gzip=0`` lo desactiva.
+
+    :param raw_path:
+        Ruta del archivo (relativa o absoluta).
+    :returns:
+        Contenido del archivo o error ``{"error": str}``.
+    """
+    # resuelve y valida la ruta contra el chroot lógico
+    resolved: Optional[Path] = resolve_safe_path(raw_path)
+
+    # input mal formado da error 400
+    if resolved is None:
+        return jsonify({"error": "Ruta inválida"}), 400
+
+    # fuera del scope permitido retorna error 403
+    if resolved == Path():
+        return jsonify({"error": "Ruta no autorizada"}), 403
+
+    try:
+        st = os.stat(resolved)
+    except OSError:
+        return jsonify({"error": "Archivo no encontrado"}), 404
+    if not stat.S_ISREG(st.st_mode):
+        return jsonify({"error": "No es un archivo regular"}), 400
+
+    # gzip solo para texto, sin Range y si el cliente lo acepta
+    use_gzip = (
+        _flag(request.args.get("gzip"))
+        and "Range" not in request.headers
+        and st.st_size >= _GZIP_MIN_SIZE
+        and "gzip" in request.accept_encodings
+        and _is_text(resolved)
+    )
+
+    if not use_gzip:
+        # send_file maneja Range, ETag y Last-Modified
+        return send_file(
+            resolved,
+            conditional=True,
+            etag=True,
+            last_modified=st.st_mtime,
+            max_age=0,
+        )
+
+    resp = Response(
+        _gzip_stream(resolved),
+        mimetype=mimetypes.guess_type(resolved.name)[0] or "text/plain",
+        direct_passthrough=True,
+    )
+    resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.last_modified = st.st_mtime  # type: ignore[assignment]
+    resp.set_etag(f"{st.st_mtime_ns:x}-{st.st_size:x}-gz")
+    return resp.make_conditional(request)
+
+
+@bp.route("/list/<path:raw_path>", methods=["GET"])
+def list_directory(
+    raw_path: str,
+) -> Union[Response, tuple[Response, Literal[400, 403, 404]]]:
+    """
+    Lista un directorio dentro de ``BASE_DIR`` de forma paginada.
+
+    Query:
+    - ``sort``: ``name`` (default), ``size`` o ``mtime``; con ``-``
+      adelante ordena descendente (ej: ``-mtime`` = más nuevos primero).
+    - ``limit``: entradas por página (1..1000, default 100).
+    - ``cursor``: valor ``next_cursor`` de la página anterior.
+
+    Usa ``os.scandir``: el tipo sale del dirent y solo se hace un
+    ``lstat`` por entrada cuando hace falta (orden por tamaño/mtime o
+    entradas devueltas).
+
+    :param raw_path:
+        Ruta del directorio (relativa o absoluta).
+    :returns:
+        JSON ``{"entries": [...], "next_cursor": str|null}``.
+    """
+    # resuelve y valida la ruta contra el chroot lógico
+    resolved: Optional[Path] = resolve_safe_path(raw_path)
+
+    # input mal formado da error 400
+    if resolved is None:
+        return jsonify({"error": "Ruta inválida"}), 400
+
+    # fuera del scope permitido retorna error 403
+    if resolved == Path():
+        return jsonify({"error": "Ruta no autorizada"}), 403
+
+    # Parámetros
+    sort_arg: str = request.args.get("sort", "name")
+    descending = sort_arg.startswith("-")
+    sort = sort_arg.lstrip("-")
+    if sort not in ("name", "size", "mtime"):
+        return jsonify({"error": "'sort' debe ser name, size o mtime"}), 400
+    try:
+        limit = int(request.args.get("limit", _LIST_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "'limit' debe ser entero"}), 400
+    limit = min(max(limit, 1), _LIST_MAX_LIMIT)
+
+    after: Optional[tuple[Any, str]] = None
+    cursor: str = request.args.get("cursor", "")
+    if cursor:
+        try:
+            after = _decode_cursor(cursor, sort_arg)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    key = _entry_key(sort)
+
+    def _keep(entry: os.DirEntry[str]) -> bool:
+        """Filtra las entradas ya entregadas en páginas anteriores."""
+        if after is None:
+            return True
+        try:
+            k = key(entry)
+        except OSError:
+            return False
+        return k < after if descending else k > after
+
+    def _safe_key(entry: os.DirEntry[str]) -> tuple[Any, str]:
+        try:
+            return key(entry)
+        except OSError:
+            return (0, entry.name)
+
+    try:
+        with os.scandir(resolved) as it:
+            # Solo se ordena lo necesario para la página (+1 para saber
+            # si quedan más)
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            page = pick(limit + 1, filter(_keep, it), key=_safe_key)
+
+            entries: list[dict[str, Any]] = []
+            for entry in page[:limit]:
+                item: dict[str, Any] = {
+                    "name": entry.name,
+                    "type": _entry_type(entry),
+                }
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    item["size"] = st.st_size
+                    item["mtime"] = st.st_mtime
+                except OSError:
+                    item["size"] = None
+                    item["mtime"] = None
+                entries.append(item)
+    except NotADirectoryError:
+        return jsonify({"error": "No es un directorio"}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Directorio no encontrado"}), 404
+    except PermissionError:
+        return jsonify({"error": "Sin permisos de lectura"}), 403
+
+    next_cursor: Optional[str] = None
+    if len(page) > limit:
+        next_cursor = _encode_cursor(sort_arg, _safe_key(page[limit - 1]))
+
+    return jsonify({
+        "path": raw_path,
+        "sort": sort_arg,
+        "entries": entries,
+        "next_cursor": next_cursor,
+    })
+
+
+@bp.route("/watch/<path:raw_path>", methods=["GET"])
+def watch_path(
+    raw_path: str,
+) -> Union[Response, tuple[Response, Literal[400, 403, 404, 501, 503]]]:
+    """
+    Espera cambios sobre un archivo o directorio dentro de ``BASE_DIR``.
+
+    Si la ruta no existe todavía se observa su directorio padre, así se
+    puede esperar a que un proceso deje un archivo de salida.
+
+    Query:
+    - ``timeout``: segundos de espera del long-poll (default 30, máx
+      300). En modo SSE es la duración del stream (default 1 h).
+    - ``stream=1`` (o ``Accept: text/event-stream``): modo SSE.
+
+    :param raw_path:
+        Ruta a observar (relativa o absoluta).
+    :returns:
+        JSON ``{"events": [...], "timed_out": bool, "exists": bool}`` o
+        un stream ``text/event-stream``.
+    """
+    # resuelve y valida la ruta contra el chroot lógico
+    resolved: Optional[Path] = resolve_safe_path(raw_path)
+
+    # input mal formado da error 400
+    if resolved is None:
+        return jsonify({"error": "Ruta inválida"}), 400
+
+    # fuera del scope permitido retorna error 403
+    if resolved == Path():
+        return jsonify({"error": "Ruta no autorizada"}), 403
+
+    stream = (
+        request.args.get("stream", "0").lower() in ("1", "true")
+        or request.accept_mimetypes.best == "text/event-stream"
+    )
+    try:
+        timeout = float(request.args.get(
+            "timeout",
+            _WATCH_STREAM_MAX if stream else _WATCH_DEFAULT_TIMEOUT,
+        ))
+    except ValueError:
+        return jsonify({"error": "'timeout' debe ser numérico"}), 400
+    timeout = min(
+        max(timeout, 0.0),
+        _WATCH_STREAM_MAX if stream else _WATCH_MAX_TIMEOUT,
+    )
+
+    try:
+        sub = watcher.subscribe(str(resolved))
+    except FileNotFoundError:
+        return jsonify({"error": "Directorio no encontrado"}), 404
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+    except OSError as e:
+        return jsonify({"error": f"inotify no disponible: {e}"}), 501
+
+    if stream:
+        resp = Response(_sse_events(sub, timeout), mimetype="text/event-stream")
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.headers["X-Accel-Buffering"] = "no"
+        return resp
+
+    with sub:
+        first = sub.get(timeout)
+        events: list[FileEvent] = []
+        if first is not None:
+            # Junta la ráfaga (ej: create + modify + close_write)
+            time.sleep(_WATCH_COALESCE)
+            events = [first, *sub.drain()]
+
+    return jsonify({
+        "path": raw_path,
+        "events": [e.to_dict() for e in events],
+        "timed_out": first is None,
+        "exists": resolved.exists(),
+    })
+# endregion
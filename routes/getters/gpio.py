@@ -1,14 +1,178 @@
-from flask import Blueprint, Response, jsonify
-from utils.utils import run_cmd
+"""
+Estado de los pines GPIO.
+
+Lee dirección, nivel y dueño de los pines del header a través del
+backend GPIO (sin lanzar procesos). El resultado se cachea un instante
+para que varios clientes consultando a la vez no repitan la lectura.
+
+También expone los flancos capturados en las entradas registradas
+(``/gpio/events`` y su versión SSE ``/gpio/events/stream``).
+"""
+
+import json
+import time
+from typing import Any, Dict, Final, Iterator, List, Optional, Tuple
+from flask import Blueprint, Response, jsonify, request
+
+from utils.cache import TTLCache
+from utils.gpio import backend, registry
+from utils.gpio_backends import BOARD_TO_BCM
+from utils.gpio_events import RING_SIZE, edge_events, inputs
 
 bp = Blueprint("gpio", __name__)
 
+# Segundos que se reutiliza una lectura
+_STATUS_TTL: Final[float] = 0.5
+_STATUS_CACHE: Final[TTLCache[Tuple[int, ...], Dict[str, Any]]] = TTLCache(
+    maxsize=16, ttl=_STATUS_TTL
+)
+
+# Límites de espera de eventos
+_EVENTS_MAX_WAIT: Final[float] = 60.0
+_STREAM_MAX_SECONDS: Final[float] = 3600.0
+_STREAM_HEARTBEAT: Final[float] = 15.0
+
+
+def _parse_pins(raw: Optional[str]) -> Optional[List[int]]:
+    """
+    Lee ``?pins=11,13``; por defecto todos los GPIO del header.
+
+    :returns: Pines ordenados o ``None`` si el formato es inválido.
+    """
+    if not raw:
+        return sorted(BOARD_TO_BCM)
+    try:
+        return sorted({int(p) for p in raw.split(",") if p.strip()})
+    except ValueError:
+        return None
+
+
+def read_status(pins: List[int]) -> Dict[str, Any]:
+    """
+    Lee el estado de ``pins`` en una sola pasada por el backend.
+
+    :param pins: Pines BOARD.
+    :returns: ``{"backend", "pins": [...]}``.
+    """
+    states = backend.status(pins)
+    owners = registry.owners()
+    return {
+        "backend": backend.name,
+        "pins": [
+            {
+                "pin": pin,
+                "bcm": BOARD_TO_BCM.get(pin),
+                **states.get(pin, {"direction": None, "value": None}),
+                "owner": owners.get(pin),
+            }
+            for pin in pins
+        ],
+    }
+
+
 @bp.route("/status")
 def gpio_status() -> Response:
     """
-    Obtiene el estado de los pines GPIO
+    Obtiene el estado de los pines GPIO.
+
+    Query:
+    - ``pins``: lista separada por comas (default: todo el header).
     """
+    pins = _parse_pins(request.args.get("pins"))
+    if pins is None:
+        return jsonify({"error": "'pins' debe ser una lista de enteros"}), 400
+
+    key = tuple(pins)
+    cached = _STATUS_CACHE.get(key)
+    if cached is None:
+        try:
+            body = read_status(pins)
+        except (OSError, RuntimeError) as e:
+            return jsonify({"error": f"No se pudo leer GPIO: {e}"}), 500
+        _STATUS_CACHE.set(key, body)
+    else:
+        body = cached
+    return jsonify({**body, "cached": cached is not None})
+
+
+@bp.route("/inputs")
+def gpio_inputs() -> Response:
+    """
+    Lista las entradas registradas y la última secuencia de eventos.
+    """
+    return jsonify({
+        "inputs": [cfg.to_dict() for cfg in inputs.list()],
+        "last_seq": edge_events.last_seq,
+    })
+
+
+@bp.route("/events")
+def gpio_events() -> Response:
+    """
+    Devuelve los flancos posteriores a ``since``.
+
+    Query:
+    - ``since``: última secuencia vista (default 0 = todo el buffer).
+    - ``limit``: máximo de eventos (default y máx: tamaño del buffer).
+    - ``wait``: segundos a esperar si no hay eventos nuevos.
+
+    ``lost`` indica que el buffer ya descartó eventos posteriores a
+    ``since``; ``next`` es el valor a usar como ``since`` la próxima vez.
+    """
+    try:
+        since = max(int(request.args.get("since", 0)), 0)
+        limit = min(max(int(request.args.get("limit", RING_SIZE)), 1), RING_SIZE)
+        wait = min(max(float(request.args.get("wait", 0)), 0.0), _EVENTS_MAX_WAIT)
+    except ValueError:
+        return jsonify({"error": "'since', 'limit' y 'wait' deben ser numéricos"}), 400
+
+    if wait and edge_events.last_seq <= since:
+        edge_events.wait(since, wait)
+
+    events, lost = edge_events.since(since, limit)
     return jsonify({
-        "values": run_cmd("gpio readall"),
-        "bcm_board": run_cmd("gpio readall | head -n 1")
+        "events": [ev.to_dict() for ev in events],
+        "lost": lost,
+        "next": events[-1].seq if events else max(since, 0),
     })
+
+
+def _event_stream(since: int, duration: float) -> Iterator[str]:
+    """Stream SSE de flancos a partir de ``since``."""
+    deadline = time.monotonic() + duration
+    while True:
+        events, lost = edge_events.since(since)
+        if lost:
+            yield "event: lost\ndata: {}\n\n"
+        for ev in events:
+            yield f"id: {ev.seq}\ndata: {json.dumps(ev.to_dict())}\n\n"
+            since = ev.seq
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return
+        if not edge_events.wait(since, min(left, _STREAM_HEARTBEAT)):
+            yield ": heartbeat\n\n"
+
+
+@bp.route("/events/stream")
+def gpio_events_stream() -> Response:
+    """
+    Stream SSE de flancos.
+
+    Query:
+    - ``since``: última secuencia vista (también vale el header
+      ``Last-Event-ID`` al reconectar). Default: solo eventos nuevos.
+    - ``timeout``: duración máxima del stream en segundos.
+    """
+    raw = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        since = max(int(raw), 0) if raw else edge_events.last_seq
+        duration = float(request.args.get("timeout", _STREAM_MAX_SECONDS))
+    except ValueError:
+        return jsonify({"error": "'since' y 'timeout' deben ser numéricos"}), 400
+    duration = min(max(duration, 0.0), _STREAM_MAX_SECONDS)
+
+    resp = Response(_event_stream(since, duration), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
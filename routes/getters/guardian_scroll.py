@@ -3,16 +3,20 @@
 Contiene la consulta unica que entregará todos los datos que necesita 
 Grid Guardian, es más que nada para poder obtener todo lo que necesita
 solo con una consulta.
+
+Las métricas de CPU, RAM, disco y temperatura salen de
+``utils.metrics`` (memoria compartida si hay recolector).
 """
 
 from __future__ import annotations
 import os
 import platform
-import shutil
 import time
 from pathlib import Path
 from typing import Final
 from flask import Blueprint, Response, jsonify
+from utils import metrics
+from utils.metrics import MetricsSnapshot
 from utils.utils import run_cmd
 
 # pylint: disable=W0718
@@ -23,19 +27,6 @@ bp: Blueprint = Blueprint("guardian", __name__)
 # Comandos de interes
 _OS_RELEASE: Final[Path] = Path("/etc/os-release")
 _DT_MODEL: Final[Path] = Path("/proc/device-tree/model")
-_UPTIME: Final[Path] = Path("/proc/uptime")
-_CPU_STAT: Final[Path] = Path("/proc/stat")
-
-_TEMP0: Final[Path] = Path(
-    "/sys/class/thermal/thermal_zone0/temp"
-)
-_CPUFREQ_CUR: Final[Path] = Path(
-    "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
-)
-_CPUFREQ_MAX: Final[Path] = Path(
-    "/sys/devices/system/cpu/cpu0/cpufreq/scaling_max_freq"
-)
-_MEMINFO: Final[Path] = Path("/proc/meminfo")
 
 # region Helpers
 def _clean(s: str) -> str:
@@ -122,14 +113,9 @@ def _model() -> str:
         return "unknown"
 
 
-def _uptime() -> str:
-    try:
-        if _UPTIME.exists():
-            raw = _UPTIME.read_text(encoding="utf-8", errors="ignore")
-            secs = float(raw.split()[0])
-            return _uptime_human(secs)
-    except Exception:
-        pass
+def _uptime(snap: MetricsSnapshot) -> str:
+    if snap.uptime_s >= 0:
+        return _uptime_human(snap.uptime_s)
     out = run_cmd("uptime -p")
     if out != "error":
         return _clean(
@@ -143,149 +129,52 @@ def _uptime() -> str:
     return _uptime_human(time.monotonic())
 
 
-def _disk_root() -> dict[str, str]:
+def _disk_root(snap: MetricsSnapshot) -> dict[str, str]:
     """
-    Usa shutil.disk_usage('/') (bytes) y formatea humano.
+    Uso de '/' (bytes) formateado humano.
     """
-    total, used, free = shutil.disk_usage("/")
     return {
-        "total": _human_bytes(total),
-        "used": _human_bytes(used),
-        "free": _human_bytes(free),
+        "total": _human_bytes(snap.disk_total),
+        "used": _human_bytes(snap.disk_used),
+        "free": _human_bytes(snap.disk_free),
     }
 
 
-def _ram_info() -> dict[str, str]:
+def _ram_info(snap: MetricsSnapshot) -> dict[str, str]:
     """
-    Lee /proc/meminfo; calcula used = total - available.
+    used = total - available (de /proc/meminfo).
     """
-    total = 0
-    avail = 0
-    try:
-        for line in _MEMINFO.read_text(encoding="utf-8", errors="ignore").splitlines():
-            if line.startswith("MemTotal:"):
-                total = int(line.split()[1]) * 1024
-            elif line.startswith("MemAvailable:"):
-                avail = int(line.split()[1]) * 1024
-        used = max(0, total - avail)
-        return {
-            "used": _human_bytes(used),
-            "total": _human_bytes(total),
-        }
-    except Exception:
-        out = run_cmd("free -b")
-        if out != "error":
-            try:
-                for line in out.splitlines():
-                    if line.startswith("Mem:") or line.lower().startswith("mem:"):
-                        parts = [p for p in line.split() if p]
-                        total_b = int(parts[1])
-                        used_b = int(parts[2]) if len(parts) > 2 else 0
-                        return {
-                            "used": _human_bytes(used_b),
-                            "total": _human_bytes(total_b),
-                        }
-            except Exception:
-                pass
+    if snap.ram_total < 0 or snap.ram_available < 0:
         return {"used_total": "unknown"}
+    return {
+        "used": _human_bytes(max(0, snap.ram_total - snap.ram_available)),
+        "total": _human_bytes(snap.ram_total),
+    }
 
 
-
-def _cpu_usage_pct(sample_sec: float = 0.2) -> str:
+def _cpu_usage_pct(snap: MetricsSnapshot) -> str:
     """
-    Estima % de uso con delta en /proc/stat (sample corto).
+    % de uso desde la muestra anterior de /proc/stat.
     """
-    try:
-        def _read() -> tuple[int, int]:
-            parts = _CPU_STAT.read_text(encoding="utf-8").splitlines()[0].split()
-            vals = list(map(int, parts[1:]))
-            idle = vals[3] + vals[4]
-            total = sum(vals)
-            return idle, total
-
-        idle1, total1 = _read()
-        time.sleep(sample_sec)
-        idle2, total2 = _read()
-        didle = idle2 - idle1
-        dtotal = total2 - total1
-        usage = 0.0 if dtotal <= 0 else (1.0 - didle / dtotal) * 100.0
-        return f"{usage:.0f}%"
-    except Exception:
-        out = run_cmd("top -bn1")
-        if out != "error":
-            try:
-                for ln in out.splitlines():
-                    if "Cpu(s)" in ln or "CPU:" in ln:
-                        txt = ln.replace(",", " ")
-                        fields = txt.split()
-                        idle = None
-                        for i, tok in enumerate(fields):
-                            if tok.endswith("%id"):
-                                val = fields[i - 1].strip("%")
-                                idle = float(val)
-                                break
-                        if idle is not None:
-                            usage = 100.0 - idle
-                            return f"{usage:.0f}%"
-            except Exception:
-                pass
-        return "error"
-
-
-def _cpu_freq() -> str:
+    return f"{snap.cpu_usage:.0f}%"
+
+
+def _cpu_freq(snap: MetricsSnapshot) -> str:
     """
     Frecuencia actual (y máx si está disponible), en MHz.
     """
-    try:
-        cur = None
-        mx = None
-        if _CPUFREQ_CUR.exists():
-            cur = int(_CPUFREQ_CUR.read_text(encoding="utf-8").strip()) / 1000.0
-        if _CPUFREQ_MAX.exists():
-            mx = int(_CPUFREQ_MAX.read_text(encoding="utf-8").strip()) / 1000.0
-        if cur and mx:
-            return f"{cur:.0f}/{mx:.0f} MHz"
-        if cur:
-            return f"{cur:.0f} MHz"
-    except Exception:
-        pass
-    out = run_cmd("lscpu")
-    if out != "error":
-        try:
-            cur = None
-            mx = None
-            for ln in out.splitlines():
-                if "CPU max MHz" in ln:
-                    mx = float(ln.split(":", 1)[1].strip())
-                elif "CPU MHz" in ln:
-                    cur = float(ln.split(":", 1)[1].strip())
-            if cur and mx:
-                return f"{cur:.0f}/{mx:.0f} MHz"
-            if cur:
-                return f"{cur:.0f} MHz"
-        except Exception:
-            pass
+    cur, mx = snap.cpu_freq_mhz, snap.cpu_freq_max_mhz
+    if cur > 0 and mx > 0:
+        return f"{cur:.0f}/{mx:.0f} MHz"
+    if cur > 0:
+        return f"{cur:.0f} MHz"
     return "unknown"
 
 
-def _cpu_cores() -> int:
-    return os.cpu_count() or 1
-
-
-def _temp_c() -> str:
-    try:
-        if _TEMP0.exists():
-            milli = int(_TEMP0.read_text(encoding="utf-8").strip())
-            return f"{milli / 1000.0:.1f} °C"
-    except Exception:
-        pass
-    out = run_cmd("cat /sys/class/thermal/thermal_zone0/temp")
-    if out != "error":
-        try:
-            return f"{int(out) / 1000.0:.1f} °C"
-        except Exception:
-            return _clean(out)
-    return "unknown"
+def _temp_c(snap: MetricsSnapshot) -> str:
+    if snap.temp_c < 0:
+        return "unknown"
+    return f"{snap.temp_c:.1f} °C"
 
 
 def _py3_version() -> str:
@@ -303,13 +192,15 @@ def get_data() -> Response:
     """
     Devuelve datos agregados con salida **humana y limpia**.
     """
-    disk = _disk_root()
-    ram = _ram_info()
+    # Muestra compartida (recolector) o local
+    snap = metrics.current()
+    disk = _disk_root(snap)
+    ram = _ram_info(snap)
     return jsonify(
         {
             # Sistema
             "os": _os_description(),
-            "uptime": _uptime(),
+            "uptime": _uptime(snap),
             "kernel": _kernel(),
             "model": _model(),
 
@@ -322,12 +213,12 @@ def get_data() -> Response:
             "ram": f"{ram.get('used','?')} / {ram.get('total','?')}",
 
             # CPU
-            "cpu_cores": _cpu_cores(),
-            "cpu_freq": _cpu_freq(),
-            "cpu_usage": _cpu_usage_pct(),
+            "cpu_cores": snap.cpu_cores,
+            "cpu_freq": _cpu_freq(snap),
+            "cpu_usage": _cpu_usage_pct(snap),
 
             # Temp
-            "temp": _temp_c(),
+            "temp": _temp_c(snap),
 
             # Python
             "python3_version": _py3_version(),
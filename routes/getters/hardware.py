@@ -7,40 +7,50 @@ Consultas relacionadas con información de hardware.
 - /cpu_cores: Número de núcleos
 - /cpu_freq: Frecuencia actual de CPU
 - /getall: Todos los datos anteriores en una sola respuesta
+
+Los valores salen de la última muestra de ``utils.metrics``: con varios
+workers la lee de memoria compartida en vez de consultar ``/proc`` en
+cada request.
 """
 
 # Librerias
+from typing import Callable, Dict
 from flask import Blueprint, jsonify
-from utils.utils import run_cmd
+from utils import metrics
+from utils.metrics import MetricsSnapshot
 
 # Inicializa el blueprint
 bp = Blueprint("hardware", __name__)
 
-# Mapeo de campos a comandos, mas pythoneano para
-# dejar el codigo wonito
-_HARDWARE_COMMANDS: dict[str, str] = {
-    "cpu_usage":
-        "top -bn1 | grep 'Cpu(s)' | awk '{print $2+$4}'",
-    "temp":
-        "cat /sys/class/thermal/thermal_zone0/temp | awk '{print $1/1000}'",
-    "ram":
-        "free -h | grep Mem | awk '{print $3\"/\"$2}'",
-    "cpu_cores": "nproc",
-    "cpu_freq":
-        "lscpu | grep 'MHz' | awk '{print $NF}'"
+
+def _gib(n: int) -> str:
+    """Bytes -> 'X.YGi'."""
+    return f"{n / 1024 ** 3:.1f}Gi"
+
+
+# Mapeo de campos a su formato desde la muestra
+_HARDWARE_FIELDS: Dict[str, Callable[[MetricsSnapshot], str]] = {
+    "cpu_usage": lambda s: f"{s.cpu_usage:.1f}",
+    "temp": lambda s: f"{s.temp_c:.1f}" if s.temp_c >= 0 else "error",
+    "ram": lambda s: (
+        f"{_gib(s.ram_total - s.ram_available)}/{_gib(s.ram_total)}"
+        if s.ram_total >= 0 and s.ram_available >= 0 else "error"
+    ),
+    "cpu_cores": lambda s: str(s.cpu_cores),
+    "cpu_freq": lambda s: f"{s.cpu_freq_mhz:.0f}" if s.cpu_freq_mhz >= 0 else "error",
 }
 
 
 def get_info(field: str) -> str:
     """
-    Ejecuta el comando asociado a una métrica de hardware.
+    Devuelve una métrica de hardware desde la última muestra.
 
     :param field: Campo (cpu_usage, temp, etc.)
     :type field: str
     :return: Resultado en string plano
     :rtype: str
     """
-    return run_cmd(_HARDWARE_COMMANDS[field])
+    return _HARDWARE_FIELDS[field](metrics.current())
 
 
 @bp.route("/cpu_usage")
@@ -88,4 +98,5 @@ def get_all():
     """
     Devuelve todos los recursos de hardware en una sola respuesta.
     """
-    return jsonify({k: get_info(k) for k in _HARDWARE_COMMANDS})
+    snap = metrics.current()
+    return jsonify({k: fmt(snap) for k, fmt in _HARDWARE_FIELDS.items()})
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura de logs dentro de ``LOGS_PATH``.
+
+- ``GET /logs/``: lista los logs disponibles.
+- ``GET /logs/<name>/tail?lines=N``: últimas N líneas de un log.
+- ``GET /logs/<name>/tail?follow=1``: igual, y luego sigue enviando las
+  líneas nuevas como stream SSE.
+
+La cola se lee desde el final del archivo hacia atrás por bloques, así
+el costo es proporcional a N y no al tamaño del log.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from os import environ
+from pathlib import Path
+from typing import Final, Iterator, Literal, Optional, Union
+from flask import Blueprint, Response, jsonify, request
+
+from utils.inotify import Subscription, watcher
+
+# Inicializa el blueprint
+bp: Blueprint = Blueprint("logs", __name__)
+
+# Nombres de log aceptados (sin rutas)
+_LOG_NAME_RE: Final[re.Pattern[str]] = re.compile(r"^[\w][\w.-]*$")
+
+# Límites
+_TAIL_DEFAULT_LINES: Final[int] = 100
+_TAIL_MAX_LINES: Final[int] = 5000
+_TAIL_BLOCK_SIZE: Final[int] = 8 * 1024
+_FOLLOW_MAX_SECONDS: Final[float] = 3600.0
+_FOLLOW_POLL: Final[float] = 1.0
+_FOLLOW_READ_SIZE: Final[int] = 64 * 1024
+
+
+# region helpers
+def logs_dir() -> Path:
+    """Directorio de logs configurado (mismo que usa ``GPIOController``)."""
+    return Path(environ.get("LOGS_PATH", "./logs")).resolve()
+
+
+def resolve_log(name: str) -> Optional[Path]:
+    """
+    Resuelve el nombre de un log dentro de ``LOGS_PATH``.
+
+    Acepta el nombre con o sin ``.log``.
+
+    :param name: Nombre del log (ej: ``gpio_control``).
+    :returns: Ruta del archivo o ``None`` si no existe o no es válido.
+    """
+    if not _LOG_NAME_RE.match(name):
+        return None
+    base = logs_dir()
+    for candidate in (base / name, base / f"{name}.log"):
+        real = Path(os.path.realpath(candidate))
+        # no se permite escapar del directorio vía symlinks
+        if real.parent == base and real.is_file():
+            return real
+    return None
+
+
+def tail_lines(path: Path, count: int) -> tuple[list[str], int]:
+    """
+    Obtiene las últimas ``count`` líneas leyendo hacia atrás.
+
+    :param path: Archivo de log.
+    :param count: Cantidad de líneas.
+    :returns: ``(líneas, offset_final)``; el offset sirve para seguir
+        leyendo lo que se agregue después.
+    """
+    with open(path, "rb") as fh:
+        end = fh.seek(0, os.SEEK_END)
+        pos = end
+        blocks: list[bytes] = []
+        newlines = 0
+
+        # Se necesita una línea más para saber dónde empieza la primera
+        while pos > 0 and newlines <= count:
+            size = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= size
+            fh.seek(pos)
+            block = fh.read(size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    data = b"".join(reversed(blocks))
+    # El salto final no cuenta como línea vacía
+    if data.endswith(b"\n"):
+        data = data[:-1]
+    lines = data.split(b"\n")[-count:] if data and count else []
+    return [ln.decode("utf-8", errors="replace") for ln in lines], end
+
+
+def _follow(
+    path: Path, initial: list[str], offset: int, duration: float,
+) -> Iterator[str]:
+    """
+    Stream SSE: primero la cola, luego las líneas que se agreguen.
+
+    Usa inotify para despertar al instante; si no está disponible cae a
+    un polling de ``_FOLLOW_POLL`` segundos. Si el archivo se trunca
+    (rotación), vuelve a leer desde el inicio.
+    """
+    sub: Optional[Subscription]
+    try:
+        sub = watcher.subscribe(str(path))
+    except (OSError, RuntimeError):
+        sub = None
+
+    deadline = time.monotonic() + duration
+    pending = b""
+    try:
+        for line in initial:
+            yield f"data: {json.dumps(line)}\n\n"
+
+        while time.monotonic() < deadline:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                size = 0
+            if size < offset:
+                offset, pending = 0, b""
+
+            if size > offset:
+                with open(path, "rb") as fh:
+                    fh.seek(offset)
+                    chunk = fh.read(min(size - offset, _FOLLOW_READ_SIZE))
+                offset += len(chunk)
+                *complete, pending = (pending + chunk).split(b"\n")
+                for raw in complete:
+                    line = raw.decode("utf-8", errors="replace")
+                    yield f"data: {json.dumps(line)}\n\n"
+                continue
+
+            # Espera cambios (o el heartbeat)
+            wait = min(deadline - time.monotonic(), 15.0)
+            if sub is not None:
+                if sub.get(wait) is None:
+                    yield ": heartbeat\n\n"
+                sub.drain()
+            else:
+                time.sleep(min(wait, _FOLLOW_POLL))
+    finally:
+        if sub is not None:
+            sub.close()
+# endregion
+
+
+# region endpoints
+@bp.route("/", methods=["GET"])
+def list_logs() -> Response:
+    """
+    Lista los logs disponibles en ``LOGS_PATH``.
+    """
+    base = logs_dir()
+    try:
+        with os.scandir(base) as it:
+            names = sorted(
+                entry.name for entry in it
+                if entry.is_file(follow_symlinks=False)
+            )
+    except OSError:
+        names = []
+    return jsonify({"logs": names})
+
+
+@bp.route("/<string:name>/tail", methods=["GET"])
+def tail_log(
+    name: str,
+) -> Union[Response, tuple[Response, Literal[400, 404]]]:
+    """
+    Devuelve las últimas líneas de un log.
+
+    Query:
+    - ``lines``: cantidad de líneas (default 100, máx 5000).
+    - ``follow=1``: stream SSE con las líneas nuevas.
+    - ``timeout``: duración máxima del follow en segundos.
+
+    :param name: Nombre del log (ej: ``gpio_control``).
+    """
+    path = resolve_log(name)
+    if path is None:
+        return jsonify({"error": f"Log '{name}' no encontrado"}), 404
+
+    try:
+        count = int(request.args.get("lines", _TAIL_DEFAULT_LINES))
+        duration = float(request.args.get("timeout", _FOLLOW_MAX_SECONDS))
+    except ValueError:
+        return jsonify({"error": "'lines' y 'timeout' deben ser numéricos"}), 400
+    count = min(max(count, 0), _TAIL_MAX_LINES)
+    duration = min(max(duration, 0.0), _FOLLOW_MAX_SECONDS)
+
+    lines, offset = tail_lines(path, count)
+
+    if request.args.get("follow", "0").lower() in ("1", "true"):
+        resp = Response(
+            _follow(path, lines, offset, duration),
+            mimetype="text/event-stream",
+        )
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.headers["X-Accel-Buffering"] = "no"
+        return resp
+
+    return jsonify({"log": path.name, "lines": lines})
+# endregion
@@ -5,9 +5,15 @@ Comandos relacionados con almacenamiento.
 - /used: Obtiene el espacio usado de la memoria
 - /free: Obtiene el espacio libre de la memoria
 - /get_all: Obtiene el espacio total, usado y libre
+- /usage/<path>: Árbol de uso de disco de un directorio (``?depth=``)
 """
 
-from flask import Blueprint, jsonify
+from pathlib import Path
+from typing import Literal, Optional, Union
+from flask import Blueprint, jsonify, request
+from flask.wrappers import Response
+from routes.validations.files import BASE_DIR, resolve_safe_path
+from utils.disk_usage import disk_usage_cache
 from utils.utils import run_cmd
 
 # Inicializa el blueprint
@@ -60,3 +66,44 @@ def get_all():
         "used": get_storage_value(3),
         "free": get_storage_value(4),
     })
+
+
+@bp.route("/usage/", defaults={"raw_path": "."})
+@bp.route("/usage/<path:raw_path>")
+def usage(
+    raw_path: str,
+) -> Union[Response, tuple[Response, Literal[400, 403, 404]]]:
+    """
+    Obtiene el árbol de uso de disco de un directorio (en bytes).
+
+    Query:
+    - ``depth``: niveles de subdirectorios en la respuesta (0..8).
+    - ``refresh=1``: ignora la cache y rescanea todo.
+
+    Solo se rescanean los directorios cuyo mtime cambió desde la última
+    consulta, con un presupuesto de IO por request. Los ``path`` del
+    árbol son relativos a ``BASE_DIR``.
+    """
+    # resuelve y valida la ruta contra el chroot lógico
+    resolved: Optional[Path] = resolve_safe_path(raw_path)
+    if resolved is None:
+        return jsonify({"error": "Ruta inválida"}), 400
+    if resolved == Path():
+        return jsonify({"error": "Ruta no autorizada"}), 403
+
+    try:
+        depth = min(max(int(request.args.get("depth", "1")), 0), 8)
+    except ValueError:
+        return jsonify({"error": "'depth' debe ser entero"}), 400
+    refresh = request.args.get("refresh", "0").lower() in ("1", "true")
+
+    try:
+        tree = disk_usage_cache.usage(
+            str(resolved), depth, refresh, base=str(BASE_DIR)
+        )
+    except NotADirectoryError:
+        return jsonify({"error": "No es un directorio"}), 400
+    except OSError:
+        return jsonify({"error": "Directorio no encontrado"}), 404
+
+    return jsonify(tree)
@@ -3,25 +3,146 @@ Comandos relacionados con binarios.
 
 - /version/<string:bin_name>: Obtiene la versión de un binario
 - /exists/<string:bin_name>: Verifica si un binario existe
+- /probe: Existencia, ruta y versión de varios binarios en una consulta
+- /packages: Paquetes instalados según la base de datos de dpkg
 - /install/<string:package_name>: Instala un paquete del sistema
 
 ejemplos:
 - /version/python3
 - /exists/ffmpeg
+- /probe  (POST ``{"binaries": ["git", "ffmpeg"]}``)
+- /packages?name=nmap  /packages?prefix=python3-
+- /packages  (POST ``{"packages": ["nmap", "curl"]}``)
 - /install/nmap
 """
 
 # Librerias
-import shlex
+import os
 import re
-from typing import Literal, Union
-from flask import Blueprint, jsonify
+import shutil
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Final, Literal, Optional, Union
+from flask import Blueprint, jsonify, request
 from flask.wrappers import Response
-from utils.utils import run_cmd
+from utils.cache import TTLCache
+from utils.dpkg import dpkg_index
 
 # Inicializa el blueprint
 bp = Blueprint("binaries", __name__)
 
+# Nombres de binario aceptados (sin rutas ni metacaracteres)
+_BIN_NAME_RE: Final[re.Pattern[str]] = re.compile(r"^[\w.-]+$")
+
+# Nombres de paquete de dpkg (admiten '+', ej: g++)
+_PKG_NAME_RE: Final[re.Pattern[str]] = re.compile(r"^[\w.+-]+$")
+_PACKAGES_MAX_BATCH: Final[int] = 512
+
+# Límites del probe en lote
+_PROBE_MAX_BINARIES: Final[int] = 64
+_PROBE_WORKERS: Final[int] = 4
+_PROBE_DEFAULT_TIMEOUT: Final[float] = 2.0
+_PROBE_MAX_TIMEOUT: Final[float] = 10.0
+
+# Pool compartido y acotado: aunque lleguen varios probes a la vez no
+# se lanzan más de ``_PROBE_WORKERS`` subprocesos simultáneos
+_PROBE_POOL: Final[ThreadPoolExecutor] = ThreadPoolExecutor(
+    max_workers=_PROBE_WORKERS,
+    thread_name_prefix="bin-probe",
+)
+
+# Caches: nombre -> ruta resuelta, (ruta, mtime) -> versión. La versión
+# se indexa por mtime para invalidarse sola si el binario se actualiza.
+_PATH_CACHE: Final[TTLCache[str, Optional[str]]] = TTLCache(
+    maxsize=256, ttl=300.0
+)
+_VERSION_CACHE: Final[TTLCache[tuple[str, int], str]] = TTLCache(
+    maxsize=256, ttl=3600.0
+)
+
+
+# region helpers
+def valid_bin_name(bin_name: str) -> bool:
+    """
+    Verifica que el nombre del binario sea seguro.
+
+    :param bin_name: Nombre del comando
+    :return type: bool
+    """
+    return bool(_BIN_NAME_RE.match(bin_name))
+
+
+def resolve_binary(bin_name: str) -> Optional[str]:
+    """
+    Resuelve un binario en ``$PATH`` sin lanzar subprocesos.
+
+    :param bin_name: Nombre del comando (ya validado)
+    :return: Ruta absoluta o ``None`` si no existe
+    """
+    return _PATH_CACHE.get_or_set(bin_name, lambda: shutil.which(bin_name))
+
+
+def _version_key(path: str) -> Optional[tuple[str, int]]:
+    """Llave de cache para la versión: ruta + mtime del binario."""
+    try:
+        return (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def cached_version(path: str) -> Optional[str]:
+    """
+    Devuelve la versión cacheada de un binario si está vigente.
+
+    :param path: Ruta absoluta del binario
+    :return: Versión o ``None`` si no está en cache
+    """
+    key = _version_key(path)
+    return _VERSION_CACHE.get(key) if key else None
+
+
+def binary_version_of(path: str, timeout: float = 5.0) -> str:
+    """
+    Obtiene la primera línea de ``<binario> --version``.
+
+    Usa la cache si el binario no cambió. Los timeouts no se cachean
+    para poder reintentar en la próxima consulta.
+
+    :param path: Ruta absoluta del binario
+    :param timeout: Tiempo máximo (s) del subproceso
+    :return: Versión o "error"
+    """
+    key = _version_key(path)
+    if key is not None:
+        hit = _VERSION_CACHE.get(key)
+        if hit is not None:
+            return hit
+
+    try:
+        # Algunos binarios (python2, java) escriben la versión a stderr
+        out = subprocess.run(
+            [path, "--version"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=timeout,
+            check=False,
+        ).stdout.decode("utf-8", errors="replace")
+    except subprocess.TimeoutExpired:
+        return "error"
+    except OSError:
+        out = ""
+
+    # Primera línea no vacía
+    version = next(
+        (line.strip() for line in out.splitlines() if line.strip()),
+        "error",
+    )
+    if key is not None:
+        _VERSION_CACHE.set(key, version)
+    return version
+# endregion
+
 
 @bp.route("/version/<string:bin_name>", methods=["GET"])
 def binary_version(
@@ -34,27 +155,24 @@ def binary_version(
     :return type: Response
     """
     # Verifica si los parametros son validos
-    if not re.match(r"^[\w.-]+$", bin_name):
+    if not valid_bin_name(bin_name):
         return jsonify({
             "binary": bin_name,
             "error": "Nombre inválido"
         }), 400
 
-    # Modifica el parametro para que sea seguro
-    safe_bin: str = shlex.quote(bin_name)
-
     # Verifica si el binario existe
-    exists: str = run_cmd(f"which {safe_bin}")
+    path: Optional[str] = resolve_binary(bin_name)
 
     # Si no existe, devuelve un error
-    if exists == "error" or not exists:
+    if not path:
         return jsonify({
             "binary": bin_name,
             "error": "El binario no está instalado o no está en $PATH"
         }), 404
 
     # Obtiene la versión
-    version_output = run_cmd(f"{bin_name} --version 2>&1 | head -n 1")
+    version_output = binary_version_of(path)
 
     # Devuelve la respuesta
     return jsonify({
@@ -69,19 +187,159 @@ def binary_exists(bin_name: str) -> Union[Response, tuple[Response, Literal[400]
     Verifica si un binario está disponible en el sistema ($PATH).
     """
     # Verifica si los parametros son validos
-    if not re.match(r"^[\w.-]+$", bin_name):
+    if not valid_bin_name(bin_name):
         return jsonify({"error": "Nombre inválido"}), 400
 
-    # Modifica el parametro para que sea seguro
-    safe_bin = shlex.quote(bin_name)
+    # Devuelve la respuesta
+    return jsonify({
+        "binary": bin_name,
+        "exists": resolve_binary(bin_name) is not None
+    })
 
-    # Verifica si el binario existe
-    result = run_cmd(f"command -v {safe_bin}")
+
+@bp.route("/probe", methods=["POST"])
+def probe_binaries() -> Union[Response, tuple[Response, Literal[400]]]:
+    """
+    Verifica existencia, ruta y versión de varios binarios a la vez.
+
+    Body JSON: ``{"binaries": ["git", "ffmpeg"], "timeout": 2.0}``.
+    Las versiones se obtienen en paralelo con un pool acotado y un
+    timeout por binario; lo que ya está en cache no lanza subprocesos.
+
+    :return type: Response
+    """
+    # Obtiene los datos
+    data: Any = request.get_json(silent=True) or {}
+    names: Any = data.get("binaries") if isinstance(data, dict) else None
+
+    # Verifica el formato
+    if (
+        not isinstance(names, list)
+        or not names
+        or not all(isinstance(n, str) for n in names)
+    ):
+        return jsonify(
+            {"error": "Formato inválido. Se requiere 'binaries': List[str]"}
+        ), 400
+    if len(names) > _PROBE_MAX_BINARIES:
+        return jsonify({
+            "error": f"Máximo {_PROBE_MAX_BINARIES} binarios por consulta"
+        }), 400
+
+    # Timeout por binario, acotado
+    try:
+        timeout = float(data.get("timeout", _PROBE_DEFAULT_TIMEOUT))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'timeout' debe ser numérico"}), 400
+    timeout = min(max(timeout, 0.1), _PROBE_MAX_TIMEOUT)
+
+    # Resuelve rutas (barato) y lanza solo las versiones no cacheadas
+    results: list[dict[str, Any]] = []
+    pending: dict[int, Future[str]] = {}
+    for idx, name in enumerate(dict.fromkeys(names)):
+        if not valid_bin_name(name):
+            results.append({"binary": name, "error": "Nombre inválido"})
+            continue
+
+        path = resolve_binary(name)
+        entry: dict[str, Any] = {
+            "binary": name,
+            "exists": path is not None,
+            "path": path,
+            "version": None,
+            "cached": False,
+        }
+        if path:
+            hit = cached_version(path)
+            if hit is not None:
+                entry["version"] = hit
+                entry["cached"] = True
+            else:
+                pending[idx] = _PROBE_POOL.submit(
+                    binary_version_of, path, timeout
+                )
+        results.append(entry)
+
+    # Espera los probes pendientes
+    for idx, future in pending.items():
+        results[idx]["version"] = future.result()
+
+    # Devuelve la respuesta
+    return jsonify({"results": results})
+
+
+@bp.route("/packages", methods=["GET"])
+def list_packages() -> Union[Response, tuple[Response, Literal[400, 500]]]:
+    """
+    Consulta paquetes instalados sin lanzar ``dpkg``.
+
+    Query: ``name`` (exacto) o ``prefix``; sin ninguno lista todos.
+
+    :return type: Response
+    """
+    name: str = request.args.get("name", "")
+    prefix: str = request.args.get("prefix", "")
+
+    # Verifica si los parametros son validos
+    for value in (name, prefix):
+        if value and not _PKG_NAME_RE.match(value):
+            return jsonify({"error": "Nombre inválido"}), 400
+
+    try:
+        found = (
+            dpkg_index.lookup(name) if name
+            else dpkg_index.search_prefix(prefix)
+        )
+    except OSError as e:
+        return jsonify({"error": f"No se pudo leer dpkg: {e}"}), 500
 
     # Devuelve la respuesta
     return jsonify({
-        "binary": bin_name,
-        "exists": bool(result and result != "error")
+        "count": len(found),
+        "packages": [pkg.to_dict() for pkg in found],
+    })
+
+
+@bp.route("/packages", methods=["POST"])
+def lookup_packages() -> Union[Response, tuple[Response, Literal[400, 500]]]:
+    """
+    Consulta varios paquetes en una sola llamada.
+
+    Body JSON: ``{"packages": ["nmap", "curl"]}``. Los que no estén
+    instalados vuelven con ``null``.
+
+    :return type: Response
+    """
+    # Obtiene los datos
+    data: Any = request.get_json(silent=True) or {}
+    names: Any = data.get("packages") if isinstance(data, dict) else None
+
+    # Verifica el formato
+    if (
+        not isinstance(names, list)
+        or not all(isinstance(n, str) for n in names)
+    ):
+        return jsonify(
+            {"error": "Formato inválido. Se requiere 'packages': List[str]"}
+        ), 400
+    if len(names) > _PACKAGES_MAX_BATCH:
+        return jsonify({
+            "error": f"Máximo {_PACKAGES_MAX_BATCH} paquetes por consulta"
+        }), 400
+    if not all(_PKG_NAME_RE.match(n) for n in names):
+        return jsonify({"error": "Nombre inválido"}), 400
+
+    try:
+        found = dpkg_index.lookup_many(names)
+    except OSError as e:
+        return jsonify({"error": f"No se pudo leer dpkg: {e}"}), 500
+
+    # Devuelve la respuesta
+    return jsonify({
+        "packages": {
+            name: [pkg.to_dict() for pkg in pkgs] or None
+            for name, pkgs in found.items()
+        }
     })
 
 # @bp.route("/exists/<string:bin_name>")
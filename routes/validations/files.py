@@ -2,12 +2,15 @@
 """
 Rutas de validación de archivos y directorios.
 
-Dos endpoints:
+Endpoints:
 
 - ``GET /validations/directory/<path:dir_path>``:
   retorna ``{"exists": true|false}`` para directorios.
 - ``GET /validations/file/<path:file_path>``:
   retorna ``{"exists": true|false}`` para archivos.
+- ``POST /validations/exists``:
+  valida una lista de rutas en una sola consulta, con ``stat`` por
+  entrada.
 
 Las rutas se resuelven contra un *chroot lógico* (``BASE_DIR``) para
 evitar *path traversal* y accesos fuera del árbol permitido.
@@ -15,9 +18,10 @@ evitar *path traversal* y accesos fuera del árbol permitido.
 
 from __future__ import annotations
 import os
+import stat
 from pathlib import Path
-from typing import Final, Literal, Optional, Union
-from flask import Blueprint, Response, jsonify
+from typing import Any, Final, Literal, Optional, Union
+from flask import Blueprint, Response, jsonify, request
 
 # Se crea el blueprint
 bp: Blueprint = Blueprint("validations", __name__)
@@ -25,6 +29,16 @@ bp: Blueprint = Blueprint("validations", __name__)
 # Directorio base permitido (chroot lógico). Usa CWD del proceso,
 BASE_DIR: Final[Path] = Path.cwd().resolve()
 
+# Máximo de rutas por consulta en lote
+_BATCH_MAX_PATHS: Final[int] = 256
+
+# Tipos aceptados en el lote y su verificación sobre ``st_mode``
+_KIND_CHECKS: Final[dict[str, Any]] = {
+    "file": stat.S_ISREG,
+    "dir": stat.S_ISDIR,
+    "any": lambda _mode: True,
+}
+
 # region helpers
 def resolve_safe_path(raw_path: str) -> Optional[Path]:
     """
@@ -47,6 +61,74 @@ def resolve_safe_path(raw_path: str) -> Optional[Path]:
         ``Path()`` (vacío) si es *no autorizada* (fora de scope).
         ``None`` si es *inválida* (input mal formado).
     """
+    candidate: Optional[Path] = _candidate(raw_path)
+    if candidate is None:
+        return None
+
+    try:
+        # realpath resuelve symlinks y '..' a su destino final
+        real: Path = Path(os.path.realpath(candidate))
+    except OSError:
+        # errores del FS se tratan como input inválido
+        return None
+
+    return _confine(real)
+
+
+def resolve_safe_paths(raw_paths: list[str]) -> list[Optional[Path]]:
+    """
+    Igual que :func:`resolve_safe_path` pero para varias rutas.
+
+    El ``realpath`` de cada directorio padre se calcula una sola vez y
+    se reutiliza para todas las rutas que lo comparten; por cada
+    entrada solo queda un ``lstat`` para ver si el último componente es
+    un symlink (en cuyo caso se resuelve completo).
+
+    :param raw_paths:
+        Rutas crudas provistas por el cliente.
+    :returns:
+        Lista con el mismo orden y la misma semántica que
+        :func:`resolve_safe_path` por entrada.
+    """
+    parents: dict[str, str] = {}
+    resolved: list[Optional[Path]] = []
+
+    for raw_path in raw_paths:
+        candidate = _candidate(raw_path)
+        if candidate is None:
+            resolved.append(None)
+            continue
+
+        parent, name = os.path.split(str(candidate))
+        try:
+            if name in ("", ".", ".."):
+                # casos raros, se resuelven completos
+                real = os.path.realpath(candidate)
+            else:
+                # realpath(padre) memoizado + último componente
+                parent_real = parents.get(parent)
+                if parent_real is None:
+                    parent_real = os.path.realpath(parent)
+                    parents[parent] = parent_real
+                real = os.path.join(parent_real, name)
+                if os.path.islink(real):
+                    real = os.path.realpath(real)
+        except OSError:
+            resolved.append(None)
+            continue
+
+        resolved.append(_confine(Path(real)))
+
+    return resolved
+
+
+def _candidate(raw_path: str) -> Optional[Path]:
+    """
+    Valida el formato y arma la ruta absoluta candidata.
+
+    :param raw_path: Ruta cruda provista por el cliente.
+    :returns: Ruta absoluta sin resolver o ``None`` si es inválida.
+    """
     # valida formato basico y tamaño razonable
     if not raw_path or len(raw_path) > 1024 or "\x00" in raw_path:
         return None
@@ -55,14 +137,16 @@ def resolve_safe_path(raw_path: str) -> Optional[Path]:
     candidate: Path = Path(raw_path)
     if not candidate.is_absolute():
         candidate = BASE_DIR / candidate
+    return candidate
 
-    try:
-        # realpath resuelve symlinks y '..' a su destino final
-        real: Path = Path(os.path.realpath(candidate))
-    except OSError:
-        # errores del FS se tratan como input inválido
-        return None
 
+def _confine(real: Path) -> Path:
+    """
+    Verifica que una ruta ya resuelta quede bajo ``BASE_DIR``.
+
+    :param real: Ruta resuelta (sin symlinks ni ``..``).
+    :returns: La misma ruta o ``Path()`` si está fuera del scope.
+    """
     try:
         # commonpath garantiza que 'real' permanezca bajo BASE_DIR
         base = str(BASE_DIR)
@@ -77,6 +161,27 @@ def resolve_safe_path(raw_path: str) -> Optional[Path]:
     return real
 
 
+def stat_to_dict(st: os.stat_result) -> dict[str, Any]:
+    """
+    Serializa los campos útiles de ``os.stat``.
+
+    :param st: Resultado de ``os.stat``.
+    :returns: Dict apto para JSON.
+    """
+    return {
+        "type": (
+            "dir" if stat.S_ISDIR(st.st_mode)
+            else "file" if stat.S_ISREG(st.st_mode)
+            else "other"
+        ),
+        "size": st.st_size,
+        "mode": oct(stat.S_IMODE(st.st_mode)),
+        "mtime": st.st_mtime,
+        "uid": st.st_uid,
+        "gid": st.st_gid,
+    }
+
+
 # region endpoints
 @bp.route("/directory/<path:dir_path>", methods=["GET"])
 def directory_exists(
@@ -136,3 +241,71 @@ def file_exists(
 
     # responde de forma uniforme
     return jsonify({"exists": exists})
+
+
+@bp.route("/exists", methods=["POST"])
+def paths_exist() -> Union[Response, tuple[Response, Literal[400]]]:
+    """
+    Verifica varias rutas dentro de ``BASE_DIR`` en una sola consulta.
+
+    Body JSON::
+
+        {"paths": [{"path": "logs/app.log", "kind": "file"},
+                   {"path": "logs", "kind": "dir"},
+                   "config.py"]}
+
+    ``kind`` puede ser ``file``, ``dir`` o ``any`` (default). Cada
+    entrada responde por separado, así un error no invalida el lote.
+
+    :returns:
+        JSON ``{"results": [...]}`` con ``exists`` y ``stat`` por
+        entrada, o error ``{"error": str}`` si el body es inválido.
+    """
+    # Obtiene los datos
+    data: Any = request.get_json(silent=True) or {}
+    entries: Any = data.get("paths") if isinstance(data, dict) else None
+
+    # Verifica el formato
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Se requiere 'paths': List"}), 400
+    if len(entries) > _BATCH_MAX_PATHS:
+        return jsonify(
+            {"error": f"Máximo {_BATCH_MAX_PATHS} rutas por consulta"}
+        ), 400
+
+    # Normaliza entradas a (ruta, tipo)
+    wanted: list[tuple[str, str]] = []
+    for entry in entries:
+        if isinstance(entry, str):
+            wanted.append((entry, "any"))
+        elif isinstance(entry, dict) and isinstance(entry.get("path"), str):
+            wanted.append((entry["path"], str(entry.get("kind", "any"))))
+        else:
+            return jsonify({"error": "Entrada inválida en 'paths'"}), 400
+
+    # Resuelve todas las rutas en una pasada
+    resolved = resolve_safe_paths([raw for raw, _ in wanted])
+
+    results: list[dict[str, Any]] = []
+    for (raw, kind), real in zip(wanted, resolved):
+        result: dict[str, Any] = {"path": raw, "kind": kind}
+        check = _KIND_CHECKS.get(kind)
+
+        if check is None:
+            result["error"] = "Tipo inválido"
+        elif real is None:
+            result["error"] = "Ruta inválida"
+        elif real == Path():
+            result["error"] = "Ruta no autorizada"
+        else:
+            try:
+                st = os.stat(real)
+            except OSError:
+                st = None
+            result["exists"] = st is not None and bool(check(st.st_mode))
+            result["stat"] = stat_to_dict(st) if st is not None else None
+        results.append(result)
+
+    # responde de forma uniforme
+    return jsonify({"results": results})
+
@@ -5,11 +5,14 @@ Comandos para obtener e interactuar con servicios.
 - /<service_name>/restart: Reinicia el servicio
 - /<service_name>/start: Inicia el servicio
 - /<service_name>/stop: Detiene el servicio
+
+Las acciones (POST) respetan el header ``Idempotency-Key``.
 """
 
 from typing import Literal, Union
 from flask import Blueprint, jsonify
 from flask.wrappers import Response
+from utils.idempotency import idempotent
 from utils.utils import run_cmd, require_token
 
 # Inicializa el blueprint
@@ -83,6 +86,7 @@ def get_service_status(service_name: str) -> Union[Response, tuple[Response, Lit
 
 # region Post
 @bp.route("/<string:service_name>/restart", methods=["POST"])
+@idempotent
 def restart_service(service_name: str) -> Union[Response, tuple[Response, Literal[404]]]:
     """
     Reinicia un servicio usando systemctl.
@@ -120,6 +124,7 @@ def restart_service(service_name: str) -> Union[Response, tuple[Response, Litera
 
 
 @bp.route("/<string:service_name>/start", methods=["POST"])
+@idempotent
 def start_service(service_name: str) -> Union[Response, tuple[Response, Literal[404]]]:
     """
     Inicia un servicio usando systemctl.
@@ -157,6 +162,7 @@ def start_service(service_name: str) -> Union[Response, tuple[Response, Literal[
 
 
 @bp.route("/<string:service_name>/stop", methods=["POST"])
+@idempotent
 def stop_service(service_name: str) -> Union[Response, tuple[Response, Literal[404]]]:
     """
     Detiene un servicio usando systemctl.
@@ -196,6 +202,7 @@ def stop_service(service_name: str) -> Union[Response, tuple[Response, Literal[4
 
 
 @bp.route("/<string:service_name>/enable", methods=["POST"])
+@idempotent
 def enable_service(service_name: str) -> Union[Response, tuple[Response, Literal[404]]]:
     """
     Habilita un servicio para que se inicie al arrancar el sistema.
@@ -235,6 +242,7 @@ def enable_service(service_name: str) -> Union[Response, tuple[Response, Literal
 
 
 @bp.route("/<string:service_name>/disable", methods=["POST"])
+@idempotent
 def disable_service(service_name: str) -> Union[Response, tuple[Response, Literal[404]]]:
     """
     Deshabilita un servicio para que no se inicie al arrancar el sistema.
@@ -8,8 +8,9 @@ from flask import Flask
 
 from routes.getters import (
     storage, system, network, hardware, gpio, events, guardian_scroll,
+    filesystem, logs, batch,
 )
-from routes.actions import gpiocontrol, power
+from routes.actions import gpiocontrol, power, files_upload, schedules
 from routes.validations import services, files, binaries
 
 
@@ -25,6 +26,9 @@ def register_getters_blueprints(app: Flask) -> None:
     app.register_blueprint(hardware.bp, url_prefix="/hardware")
     app.register_blueprint(gpio.bp, url_prefix="/gpio")
     app.register_blueprint(events.bp, url_prefix="/events")
+    app.register_blueprint(filesystem.bp, url_prefix="/files")
+    app.register_blueprint(logs.bp, url_prefix="/logs")
+    app.register_blueprint(batch.bp, url_prefix="/batch")
 
     # VALIDATIONS
     app.register_blueprint(files.bp, url_prefix="/files")
@@ -34,3 +38,5 @@ def register_getters_blueprints(app: Flask) -> None:
     # ACTIONS
     app.register_blueprint(gpiocontrol.bp, url_prefix="/gpiocontrol")
     app.register_blueprint(power.bp, url_prefix="/power")
+    app.register_blueprint(files_upload.bp, url_prefix="/files")
+    app.register_blueprint(schedules.bp, url_prefix="/schedules")
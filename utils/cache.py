@@ -0,0 +1,141 @@
+"""
+Cache en memoria acotada y segura entre threads.
+
+Se usa para no repetir trabajo caro (subprocesos, hashes, lecturas de
+``/proc``) entre requests. Cada entrada expira pasado ``ttl`` segundos
+(si se define) y, al llenarse, se descarta la menos usada (LRU).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Centinela para distinguir "no está" de un ``None`` cacheado
+_MISSING: object = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Cache LRU acotada con expiración opcional por entrada.
+
+    :ivar maxsize: Cantidad máxima de entradas.
+    :ivar ttl: Segundos de vida de cada entrada (``None`` = sin expirar).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None) -> None:
+        """
+        :param maxsize: Cantidad máxima de entradas (>= 1).
+        :param ttl: Segundos de vida de cada entrada, ``None`` no expira.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize debe ser >= 1.")
+        self.maxsize: int = maxsize
+        self.ttl: Optional[float] = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def _expired(self, stamp: float, now: float) -> bool:
+        """Indica si una entrada guardada en ``stamp`` ya venció."""
+        return self.ttl is not None and now - stamp >= self.ttl
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Obtiene un valor si existe y no venció.
+
+        :param key: Llave buscada.
+        :param default: Valor a devolver si no hay entrada válida.
+        :returns: Valor cacheado o ``default``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            stamp, value = item  # type: ignore[misc]
+            if self._expired(stamp, now):
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Guarda un valor, descartando el menos usado si está lleno.
+
+        :param key: Llave.
+        :param value: Valor a guardar.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def setdefault(self, key: K, value: V) -> V:
+        """
+        Guarda ``value`` solo si no hay una entrada válida (atómico).
+
+        :param key: Llave.
+        :param value: Valor a guardar si no existe.
+        :returns: El valor que quedó en la cache (el previo o ``value``).
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and not self._expired(item[0], now):  # type: ignore[index]
+                self._data.move_to_end(key)
+                return item[1]  # type: ignore[index]
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Elimina y devuelve una entrada (vencida o no).
+
+        :param key: Llave.
+        :param default: Valor si no existe.
+        :returns: Valor eliminado o ``default``.
+        """
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        if item is _MISSING:
+            return default
+        return item[1]  # type: ignore[index]
+
+    def get_or_set(self, key: K, factory: Callable[[], V]) -> V:
+        """
+        Devuelve el valor cacheado o lo calcula con ``factory``.
+
+        El cálculo se hace fuera del lock, así un ``factory`` lento no
+        bloquea lecturas de otras llaves. Si dos threads calculan la
+        misma llave a la vez, gana el último en guardar.
+
+        :param key: Llave.
+        :param factory: Función que produce el valor si no está.
+        :returns: Valor cacheado o recién calculado.
+        """
+        value = self.get(key, _MISSING)  # type: ignore[arg-type]
+        if value is not _MISSING:
+            return value  # type: ignore[return-value]
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Vacía la cache."""
+        with self._lock:
+            self._data.clear()
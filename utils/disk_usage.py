@@ -0,0 +1,274 @@
+"""
+Uso de disco por directorio con cache incremental.
+
+Cada directorio escaneado guarda la suma de sus archivos directos y la
+lista de subdirectorios, indexado por su ``st_mtime_ns``. En consultas
+siguientes solo se vuelve a leer (``scandir`` + ``lstat``) un directorio
+si su mtime cambió; el resto se suma desde la cache.
+
+Ojo: el mtime de un directorio cambia al crear, borrar o renombrar
+entradas, pero *no* cuando un archivo existente crece. Para eso está
+``refresh`` (rescanea todo ignorando la cache).
+
+El escaneo tiene un presupuesto de entradas y de tiempo, y cede la CPU
+cada cierto número de entradas, para no acaparar la tarjeta SD. Si el
+presupuesto se acaba el resultado se marca ``complete=False`` y la
+próxima consulta continúa desde lo que quedó en cache.
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Final, Optional
+
+# Presupuesto por consulta
+DEFAULT_MAX_ENTRIES: Final[int] = 20_000
+DEFAULT_MAX_SECONDS: Final[float] = 2.0
+
+# Cada cuántas entradas se cede la CPU/IO y por cuánto
+_YIELD_EVERY: Final[int] = 256
+_YIELD_SLEEP: Final[float] = 0.002
+
+# Tope de directorios en cache (si se supera, se vacía)
+_MAX_NODES: Final[int] = 100_000
+
+
+@dataclass
+class _DirNode:
+    """Resultado cacheado del escaneo de un directorio."""
+
+    mtime_ns: int
+    files_bytes: int
+    files_count: int
+    subdirs: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Frame:
+    """Directorio pendiente en la pila de :meth:`DiskUsageCache._walk`."""
+
+    path: str
+    depth: int
+    result: dict[str, Any]
+    subdirs: Optional[list[str]]
+    children: list[dict[str, Any]] = field(default_factory=list)
+    next: int = 0
+
+
+@dataclass
+class _Budget:
+    """Presupuesto de IO de una consulta."""
+
+    entries_left: int
+    deadline: float
+    scanned_dirs: int = 0
+    scanned_entries: int = 0
+    exhausted: bool = False
+
+    def take(self, n: int) -> None:
+        """Descuenta ``n`` entradas y cede la CPU si corresponde."""
+        before = self.scanned_entries
+        self.entries_left -= n
+        self.scanned_entries += n
+        if before // _YIELD_EVERY != self.scanned_entries // _YIELD_EVERY:
+            time.sleep(_YIELD_SLEEP)
+
+    def available(self) -> bool:
+        """Indica si queda presupuesto para escanear otro directorio."""
+        if self.exhausted:
+            return False
+        if self.entries_left <= 0 or time.monotonic() >= self.deadline:
+            self.exhausted = True
+        return not self.exhausted
+
+
+class DiskUsageCache:
+    """Árbol de uso de disco con cache por mtime de directorio."""
+
+    def __init__(self) -> None:
+        self._nodes: dict[str, _DirNode] = {}
+        # Un solo escaneo a la vez: evita duplicar IO sobre la SD
+        self._lock = threading.Lock()
+
+    def _scan_dir(self, path: str, dev: int, mtime_ns: int) -> _DirNode:
+        """
+        Lee un directorio: suma archivos directos y lista subdirectorios.
+
+        No sigue symlinks ni cruza a otros filesystems (como ``du -x``).
+        """
+        files_bytes = 0
+        files_count = 0
+        subdirs: list[str] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    if st.st_dev == dev:
+                        subdirs.append(entry.name)
+                    continue
+                # Uso real en disco (bloques), no tamaño aparente
+                files_bytes += st.st_blocks * 512
+                files_count += 1
+        return _DirNode(mtime_ns, files_bytes, files_count, subdirs)
+
+    def _open(
+        self,
+        path: str,
+        dev: int,
+        budget: _Budget,
+        refresh: bool,
+    ) -> tuple[dict[str, Any], Optional[list[str]]]:
+        """
+        Totales directos de ``path`` (desde la cache o escaneando).
+
+        :returns: Nodo sin hijos ``{"path", "size", "files", "complete"}``
+            y sus subdirectorios (``None`` si no se pudo leer).
+        """
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return {"path": path, "size": 0, "files": 0, "complete": True}, None
+
+        node = self._nodes.get(path)
+        complete = True
+        stale = node is None or refresh or node.mtime_ns != st.st_mtime_ns
+        if stale:
+            if budget.available():
+                try:
+                    node = self._scan_dir(path, dev, st.st_mtime_ns)
+                except OSError:
+                    node = _DirNode(st.st_mtime_ns, 0, 0)
+                budget.take(node.files_count + len(node.subdirs) + 1)
+                budget.scanned_dirs += 1
+                if len(self._nodes) >= _MAX_NODES:
+                    self._nodes.clear()
+                self._nodes[path] = node
+            else:
+                # Sin presupuesto: se usa lo viejo (si hay) y se marca
+                complete = False
+                if node is None:
+                    return {
+                        "path": path, "size": 0, "files": 0,
+                        "complete": False,
+                    }, None
+
+        assert node is not None
+        return {
+            "path": path,
+            "size": node.files_bytes + st.st_blocks * 512,
+            "files": node.files_count,
+            "complete": complete,
+        }, node.subdirs
+
+    def _walk(
+        self,
+        path: str,
+        dev: int,
+        depth: int,
+        budget: _Budget,
+        refresh: bool,
+    ) -> dict[str, Any]:
+        """
+        Calcula el total de ``path`` reutilizando la cache.
+
+        Recorre con una pila explícita (en post-orden): un árbol profundo
+        no agota el límite de recursión de Python.
+
+        :returns: Nodo del árbol ``{"path", "size", "files", "complete",
+            "children"?}`` con hijos hasta ``depth`` niveles.
+        """
+        result, subdirs = self._open(path, dev, budget, refresh)
+        stack = [_Frame(path, depth, result, subdirs)]
+        while True:
+            frame = stack[-1]
+            if frame.subdirs and frame.next < len(frame.subdirs):
+                child_path = os.path.join(frame.path, frame.subdirs[frame.next])
+                frame.next += 1
+                result, subdirs = self._open(child_path, dev, budget, refresh)
+                stack.append(_Frame(child_path, frame.depth - 1, result, subdirs))
+                continue
+
+            stack.pop()
+            result = frame.result
+            if frame.depth > 0 and frame.subdirs is not None:
+                frame.children.sort(key=lambda c: c["size"], reverse=True)
+                result["children"] = frame.children
+            if not stack:
+                return result
+
+            parent = stack[-1]
+            parent.result["size"] += result["size"]
+            parent.result["files"] += result["files"]
+            parent.result["complete"] = parent.result["complete"] and result["complete"]
+            if parent.depth > 0:
+                parent.children.append(result)
+
+    def usage(
+        self,
+        path: str,
+        depth: int = 1,
+        refresh: bool = False,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_seconds: float = DEFAULT_MAX_SECONDS,
+        base: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Devuelve el árbol de uso de disco de ``path``.
+
+        :param path: Directorio raíz (ya validado).
+        :param depth: Niveles de hijos a incluir en la respuesta.
+        :param refresh: Ignora la cache y rescanea todo.
+        :param max_entries: Máximo de entradas a leer en esta consulta.
+        :param max_seconds: Tiempo máximo de escaneo.
+        :param base: Si se indica, los ``path`` del árbol se devuelven
+            relativos a este directorio.
+        :returns: Árbol con tamaños en bytes y estadísticas del escaneo.
+        :raises NotADirectoryError: Si ``path`` no es un directorio.
+        """
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode):
+            raise NotADirectoryError(path)
+
+        started = time.monotonic()
+        budget = _Budget(
+            entries_left=max_entries,
+            deadline=started + max_seconds,
+        )
+        with self._lock:
+            tree = self._walk(path, st.st_dev, depth, budget, refresh)
+        if base is not None:
+            _relativize(tree, base)
+
+        tree["scan"] = {
+            "dirs_scanned": budget.scanned_dirs,
+            "entries_scanned": budget.scanned_entries,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "budget_exhausted": budget.exhausted,
+        }
+        return tree
+
+    def clear(self) -> None:
+        """Descarta la cache."""
+        with self._lock:
+            self._nodes.clear()
+
+
+def _relativize(tree: dict[str, Any], base: str) -> None:
+    """Cambia los ``path`` del árbol a rutas relativas a ``base``."""
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        node["path"] = os.path.relpath(node["path"], base)
+        pending.extend(node.get("children", ()))
+
+
+# Instancia compartida del proceso
+disk_usage_cache: Final[DiskUsageCache] = DiskUsageCache()
+
@@ -0,0 +1,181 @@
+"""
+Índice de paquetes instalados leído desde la base de datos de dpkg.
+
+En vez de lanzar ``dpkg -s`` por cada paquete, se parsea una sola vez
+``/var/lib/dpkg/status`` y se mantiene un índice en memoria que solo se
+reconstruye cuando cambia el mtime del archivo (es decir, cuando apt o
+dpkg instalan/quitan algo).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Final, Iterable, Optional
+
+# Ruta de la base de datos de dpkg
+DPKG_STATUS_PATH: Final[Path] = Path("/var/lib/dpkg/status")
+
+# Campos del stanza que interesan
+_FIELDS: Final[dict[bytes, str]] = {
+    b"Package": "name",
+    b"Version": "version",
+    b"Status": "status",
+    b"Architecture": "architecture",
+}
+
+
+@dataclass(frozen=True)
+class PackageInfo:
+    """
+    Datos de un paquete según dpkg.
+
+    :ivar name: Nombre del paquete.
+    :ivar version: Versión instalada (o vacía si no aplica).
+    :ivar status: Campo ``Status`` crudo (ej: ``install ok installed``).
+    :ivar architecture: Arquitectura (ej: ``armhf``, ``all``).
+    """
+
+    name: str
+    version: str
+    status: str
+    architecture: str
+
+    @property
+    def installed(self) -> bool:
+        """Indica si dpkg lo considera instalado."""
+        return self.status.endswith(" installed")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serializa a dict apto para JSON."""
+        data = asdict(self)
+        data["installed"] = self.installed
+        return data
+
+
+def parse_status(raw: bytes) -> dict[str, list[PackageInfo]]:
+    """
+    Parsea el contenido de ``/var/lib/dpkg/status``.
+
+    Un mismo nombre puede aparecer varias veces (multiarch), por eso el
+    índice guarda una lista por nombre.
+
+    :param raw: Contenido del archivo.
+    :returns: Índice nombre -> lista de paquetes.
+    """
+    index: dict[str, list[PackageInfo]] = {}
+    current: dict[str, str] = {}
+
+    def _flush() -> None:
+        name = current.get("name")
+        if name:
+            index.setdefault(name, []).append(PackageInfo(
+                name=name,
+                version=current.get("version", ""),
+                status=current.get("status", ""),
+                architecture=current.get("architecture", ""),
+            ))
+        current.clear()
+
+    for line in raw.split(b"\n"):
+        # Línea vacía separa stanzas
+        if not line.strip():
+            _flush()
+            continue
+        # Las continuaciones (Description, Conffiles...) no interesan
+        if line[:1] in (b" ", b"\t"):
+            continue
+        key, sep, value = line.partition(b":")
+        if not sep:
+            continue
+        field = _FIELDS.get(key)
+        if field:
+            current[field] = value.strip().decode("utf-8", errors="replace")
+    _flush()
+    return index
+
+
+class DpkgIndex:
+    """
+    Índice en memoria de paquetes, reconstruido por mtime.
+
+    Es seguro entre threads: la reconstrucción ocurre bajo lock y las
+    lecturas usan la referencia vigente del índice.
+    """
+
+    def __init__(self, path: Path = DPKG_STATUS_PATH) -> None:
+        """
+        :param path: Ruta del archivo ``status`` de dpkg.
+        """
+        self.path: Path = path
+        # (índice, nombres ordenados), se reemplaza entero al reconstruir
+        self._snapshot: tuple[dict[str, list[PackageInfo]], list[str]] = (
+            {}, []
+        )
+        self._mtime_ns: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _refresh(
+        self,
+    ) -> tuple[dict[str, list[PackageInfo]], list[str]]:
+        """
+        Reconstruye el índice si el archivo cambió.
+
+        :returns: Índice vigente y sus nombres ordenados.
+        :raises OSError: Si el archivo no se puede leer.
+        """
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return self._snapshot
+
+        with self._lock:
+            # Otro thread pudo reconstruirlo mientras se esperaba
+            if mtime_ns != self._mtime_ns:
+                index = parse_status(self.path.read_bytes())
+                self._snapshot = (index, sorted(index))
+                self._mtime_ns = mtime_ns
+            return self._snapshot
+
+    def lookup(self, name: str) -> list[PackageInfo]:
+        """
+        Busca un paquete por nombre exacto.
+
+        :param name: Nombre del paquete.
+        :returns: Lista (vacía si no existe).
+        """
+        return list(self._refresh()[0].get(name, ()))
+
+    def lookup_many(
+        self, names: Iterable[str]
+    ) -> dict[str, list[PackageInfo]]:
+        """
+        Busca varios paquetes con una sola verificación del archivo.
+
+        :param names: Nombres de paquetes.
+        :returns: Dict nombre -> lista (vacía si no existe).
+        """
+        index = self._refresh()[0]
+        return {name: list(index.get(name, ())) for name in names}
+
+    def search_prefix(self, prefix: str) -> list[PackageInfo]:
+        """
+        Lista paquetes cuyo nombre empieza con ``prefix``.
+
+        :param prefix: Prefijo (vacío = todos).
+        :returns: Paquetes ordenados por nombre.
+        """
+        index, names = self._refresh()
+        result: list[PackageInfo] = []
+        # Los nombres están ordenados: se salta directo al prefijo
+        for name in names[bisect_left(names, prefix):]:
+            if not name.startswith(prefix):
+                break
+            result.extend(index[name])
+        return result
+
+
+# Instancia compartida del proceso
+dpkg_index: Final[DpkgIndex] = DpkgIndex()
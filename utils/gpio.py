@@ -3,7 +3,11 @@ Controlador GPIO para Raspberry Pi.
 
 Este módulo permite el control de pines GPIO mediante encendido,
 apagado, reinicio y test. 
-Incluye mecanismos de bloqueo para evitar ejecuciones simultáneas.
+Los pines se configuran una sola vez por proceso y se reservan de a
+uno: dos requests sobre pines distintos corren en paralelo, y uno que
+pida un pin ya tomado recibe error en vez de esperar.
+El hardware se maneja a través de un backend intercambiable
+(``GPIO_BACKEND``, ver :mod:`utils.gpio_backends`).
 Está hecho para ser usado como contexto.
 """
 
@@ -12,34 +16,184 @@ Está hecho para ser usado como contexto.
 
 
 # Librerias
+import atexit
+import fcntl
+import os
 from os import environ
+import threading
 import time
 import logging
-import subprocess
 import types
-from typing import List, Literal, Optional
+from typing import Dict, Iterable, List, Literal, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
+from utils.gpio_backends import GPIOBackend, load_backend
+from utils.jobs import Job, JobCancelled
+
 # Carga las variables de entorno
 load_dotenv()
 
+# Backend de hardware del proceso (numeración BOARD)
+backend: GPIOBackend = load_backend(
+    environ.get("GPIO_BACKEND", "auto"),
+    chip=environ.get("GPIO_CHIP") or None,
+)
+logging.info("Backend GPIO: %s", backend.name)
+
 
-# Revisa si el módulo RPi.GPIO esta instalado, caso contrario lo
-# instala
-try:
-    from RPi import GPIO  # type: ignore
-except ModuleNotFoundError:
-    logging.info("Instalando RPi.GPIO...")
-    subprocess.check_call(["python3", "-m", "pip", "install", "RPi.GPIO"])
-    from RPi import GPIO  # type: ignore
+class PinRegistry:
+    """
+    Registro de pines del proceso: configuración única y dueños.
 
+    Cada pin tiene un ``threading.Lock`` (exclusión entre threads del
+    proceso) y un lock ``fcntl`` de un byte en ``LOCK_FILE_PATH`` en el
+    offset igual al número de pin (exclusión entre procesos). El kernel
+    suelta los locks ``fcntl`` si el proceso muere, así que no quedan
+    archivos de lock huérfanos.
+    """
 
-# Configura el módulo GPIO, desactiva los warnings que ensuciam la
-# consola y establece el modo de numeración de pines a BOARD que es
-# el que se usa en Raspberry Pi.
-GPIO.setwarnings(False)
-GPIO.setmode(GPIO.BOARD)
+    def __init__(self, lock_path: Path, gpio: GPIOBackend) -> None:
+        """
+        :param lock_path: Archivo usado para los locks entre procesos.
+        :param gpio: Backend que configura los pines.
+        """
+        self.lock_path: Path = lock_path
+        self.gpio: GPIOBackend = gpio
+        self._guard = threading.Lock()
+        self._locks: Dict[int, threading.Lock] = {}
+        self._owners: Dict[int, str] = {}
+        self._configured: set[int] = set()
+        self._fd: Optional[int] = None
+
+    def _lock_fd(self) -> int:
+        """
+        Abre (una sola vez) el archivo de locks.
+
+        Se mantiene abierto toda la vida del proceso: cerrar cualquier
+        descriptor del archivo soltaría todos los locks ``fcntl``.
+        """
+        if self._fd is None:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(
+                self.lock_path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644
+            )
+        return self._fd
+
+    def _pin_lock(self, pin: int) -> threading.Lock:
+        """Lock en memoria del pin (se crea al primer uso)."""
+        with self._guard:
+            return self._locks.setdefault(pin, threading.Lock())
+
+    def acquire(self, pins: Iterable[int], owner: str) -> None:
+        """
+        Reserva todos los pines o ninguno, sin esperar.
+
+        :param pins: Pines a reservar.
+        :param owner: Dueño de la reserva; se debe pasar el mismo a
+            :meth:`release`.
+        :raises RuntimeError: Si algún pin está en uso.
+        """
+        taken: List[int] = []
+        fd = self._lock_fd()
+        try:
+            # Orden fijo para no generar deadlocks entre reservas
+            for pin in sorted(set(pins)):
+                lock = self._pin_lock(pin)
+                if not lock.acquire(blocking=False):
+                    with self._guard:
+                        current = self._owners.get(pin)
+                    raise RuntimeError(f"GPIO en uso: pin {pin} ({current}).")
+                try:
+                    fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, pin)
+                except OSError as e:
+                    lock.release()
+                    raise RuntimeError(
+                        f"GPIO en uso por otro proceso: pin {pin}."
+                    ) from e
+                with self._guard:
+                    self._owners[pin] = owner
+                taken.append(pin)
+        except RuntimeError:
+            self.release(taken, owner)
+            raise
+
+    def release(self, pins: Iterable[int], owner: str) -> None:
+        """
+        Libera pines reservados con :meth:`acquire`.
+
+        Solo suelta los pines que siguen a nombre de ``owner``: una
+        liberación tardía o repetida no puede soltar la reserva de otro.
+
+        :param pins: Pines a liberar.
+        :param owner: Dueño con el que se reservaron.
+        """
+        fd = self._lock_fd()
+        for pin in set(pins):
+            with self._guard:
+                lock = self._locks.get(pin)
+                if lock is None or self._owners.get(pin) != owner:
+                    continue
+                del self._owners[pin]
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_UN, 1, pin)
+            except OSError:
+                pass
+            lock.release()
+
+    def setup_outputs(self, pins: Iterable[int]) -> None:
+        """
+        Configura como salida los pines que aún no lo están.
+
+        :param pins: Pines a configurar.
+        """
+        with self._guard:
+            pending = [p for p in pins if p not in self._configured]
+            if pending:
+                self.gpio.setup_outputs(pending)
+                self._configured.update(pending)
+        if pending:
+            logging.info("Pines configurados: %s", pending)
+
+    def forget(self, pins: Iterable[int]) -> None:
+        """
+        Suelta pines configurados como salida.
+
+        Se usa antes de que un pin pase a ser entrada: el backend deja
+        de retenerlo como salida y la próxima vez que se use como salida
+        se vuelve a configurar.
+
+        :param pins: Pines a olvidar.
+        :raises OSError: Si el backend no pudo volver a pedir las demás
+            salidas.
+        """
+        with self._guard:
+            gone = [p for p in pins if p in self._configured]
+            if gone:
+                self.gpio.release_outputs(gone)
+                self._configured.difference_update(gone)
+        if gone:
+            logging.info("Pines soltados como salida: %s", gone)
+
+    def owners(self) -> Dict[int, str]:
+        """Copia del mapa pin -> dueño actual."""
+        with self._guard:
+            return dict(self._owners)
+
+    def cleanup(self) -> None:
+        """Deja los pines en estado seguro al terminar el proceso."""
+        with self._guard:
+            if self._configured:
+                self.gpio.cleanup()
+                self._configured.clear()
+
+
+# Registro compartido del proceso
+registry: PinRegistry = PinRegistry(
+    Path(environ.get("LOCK_FILE_PATH", "./gpio.lock")),
+    backend,
+)
+atexit.register(registry.cleanup)
 
 
 class GPIOController:
@@ -47,29 +201,37 @@ class GPIOController:
     Controlador de pines GPIO de Raspberry Pi.
 
     Este controlador permite operaciones sobre GPIOs como encendido,
-    apagado, reinicio y testeo. Utiliza archivos de lock para evitar
-    colisiones en tiempo de ejecución.
+    apagado, reinicio y testeo. Reserva sus pines en el ``registry``
+    del proceso para evitar colisiones en tiempo de ejecución.
     """
 
-    def __init__(self, pins: List[int]) -> None:
+    def __init__(
+        self,
+        pins: List[int],
+        job: Optional[Job] = None,
+        reserve: bool = True,
+    ) -> None:
         """
         Inicializa el controlador y configura los GPIOs.
 
         :param pins: Lista de pines a controlar
         :type pins: List[int]
+        :param job: Trabajo en el que corre; sus esperas se cortan si
+            el trabajo se cancela
+        :param reserve: ``False`` si el llamador ya reservó los pines
+            en el ``registry`` (y los liberará él)
         """
         # Obtiene los pines con los que se va a trabajar
         self.pins: List[int] = pins
         if not self.pins:
             raise ValueError("Debes proporcionar al menos un pin.")
+        self.job: Optional[Job] = job
+        self._reserve: bool = reserve
 
         # Paths
         self.logs_path: Path = Path(
             environ.get("LOGS_PATH", "./logs")
         )
-        self.lock_path: Path = Path(
-            environ.get("LOCK_FILE_PATH", "./gpio.lock")
-        )
 
         # Configuraciones
         self._check_and_create_log_dir()
@@ -126,35 +288,50 @@ class GPIOController:
 
 
     def _acquire_lock(self) -> None:
-        """Crea archivo de lock para ejecución exclusiva."""
-        if self.lock_path.exists():
-            raise RuntimeError("GPIO en uso por otro proceso.")
-        self.lock_path.write_text("Lock activo", encoding="utf-8")
-        logging.info("Lock creado: %s", self.lock_path)
+        """Reserva los pines del controlador para uso exclusivo."""
+        if not self._reserve:
+            return
+        self._owner: str = f"thread {threading.get_ident()}"
+        registry.acquire(self.pins, owner=self._owner)
+        self._locked: bool = True
+        logging.info("Pines reservados: %s", self.pins)
 
 
     def _release_lock(self) -> None:
-        """Elimina el archivo de lock si existe."""
-        if self.lock_path.exists():
-            self.lock_path.unlink()
-            logging.info("Lock liberado.")
+        """Libera los pines reservados."""
+        if getattr(self, "_locked", False):
+            registry.release(self.pins, self._owner)
+            self._locked = False
+            logging.info("Pines liberados: %s", self.pins)
 
 
     def _setup_gpio(self) -> Optional[bool]:
         """
-        Configura los pines en modo salida.
+        Configura los pines en modo salida (solo la primera vez).
 
         :raises Exception: Si no se pueden configurar los pines
         """
         try:
-            for pin in self.pins:
-                GPIO.setup(pin, GPIO.OUT)
-            logging.info("Pines configurados: %s", self.pins)
+            registry.setup_outputs(self.pins)
         except Exception as e:
             logging.error("Error al configurar GPIOs: %s", e)
             return False
 
 
+    def _sleep(self, seconds: float) -> None:
+        """
+        Espera entre cambios de estado.
+
+        Si corre dentro de un trabajo, la espera se corta al cancelarlo.
+
+        :raises JobCancelled: Si el trabajo fue cancelado
+        """
+        if self.job is not None:
+            self.job.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+
     def change_state(
         self,
         state: Literal["on", "off"],
@@ -168,18 +345,37 @@ class GPIOController:
         :return: True si fue exitoso, False si falló
         :rtype: bool
         """
-        value = GPIO.HIGH if state == "on" else GPIO.LOW
+        value = state == "on"
         try:
             for pin in self.pins:
-                GPIO.output(pin, value)
+                backend.write({pin: value})
                 logging.info("Pin %d => %s", pin, state.upper())
-                time.sleep(delay)
+                self._sleep(delay)
             return True
+        except JobCancelled:
+            raise
         except Exception as e:
             logging.error("Fallo cambio de estado: %s", e)
             return False
 
 
+    def apply(self, values: Dict[int, bool]) -> None:
+        """
+        Escribe varios pines en una sola escritura del backend.
+
+        A diferencia de :meth:`change_state`, no hay esperas entre pines:
+        todos cambian en el mismo paso.
+
+        :param values: Pin -> estado (``True`` = HIGH)
+        :raises ValueError: Si algún pin no pertenece al controlador
+        """
+        extra = set(values) - set(self.pins)
+        if extra:
+            raise ValueError(f"Pines no reservados: {sorted(extra)}")
+        backend.write(values)
+        logging.info("Pines => %s", {p: int(v) for p, v in values.items()})
+
+
     def reboot(self) -> bool:
         """
         Reinicia los GPIOs apagándolos y encendiéndolos luego.
@@ -190,10 +386,12 @@ class GPIOController:
         try:
             logging.info("Reiniciando pines: %s", self.pins)
             self.change_state("off")
-            time.sleep(3)
+            self._sleep(3)
             self.change_state("on")
             logging.info("Reinicio completo.")
             return True
+        except JobCancelled:
+            raise
         except Exception as e:
             logging.error("Error reiniciando GPIOs: %s", e)
             return False
@@ -211,8 +409,10 @@ class GPIOController:
         try:
             logging.info("Testeando pin: %d", pin)
             self.change_state("off")
-            time.sleep(15)
+            self._sleep(15)
             return self.change_state("on")
+        except JobCancelled:
+            raise
         except Exception as e:
             logging.error("Fallo test de pin %d: %s", pin, e)
             return False
@@ -220,9 +420,10 @@ class GPIOController:
 
     def cleanup(self) -> None:
         """
-        Libera el lock y limpia la configuración de GPIO.
+        Libera los pines reservados.
 
-        Siempre debe llamarse al terminar el uso del controlador.
+        Siempre debe llamarse al terminar el uso del controlador. Los
+        pines quedan configurados (y en su último estado) para el
+        próximo uso; el backend se libera al salir del proceso.
         """
         self._release_lock()
-        GPIO.cleanup()
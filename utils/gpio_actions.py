@@ -0,0 +1,101 @@
+"""
+Acciones GPIO encolables.
+
+Arma las funciones de trabajo de cada acción (on, off, reboot, test y
+secuencias) y las encola en ``gpio_jobs`` con sus pines reservados.
+Lo usan tanto las rutas HTTP como el planificador.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Final, List, Optional
+
+from utils.gpio import GPIOController, registry
+from utils.gpio_sequence import SequenceStep, run_sequence
+from utils.jobs import Job, gpio_jobs, new_job_id
+
+# Acciones simples sobre una lista de pines
+ACTIONS: Final[tuple[str, ...]] = ("on", "off", "reboot", "test")
+
+
+class PinsBusy(RuntimeError):
+    """Algún pin pedido ya está reservado."""
+
+
+def action_func(action: str, pins: List[int]) -> Callable[[Job], bool]:
+    """
+    Arma la función que ejecuta una acción dentro de un trabajo.
+
+    Los pines ya vienen reservados por :func:`submit`, por eso el
+    controlador se crea con ``reserve=False``.
+
+    :param action: Acción validada (on, off, reboot, test)
+    :param pins: Pines a controlar
+    """
+    def _run(job: Job) -> bool:
+        with GPIOController(pins, job=job, reserve=False) as gpio:
+            if action in ("on", "off"):
+                success = gpio.change_state(action)  # type: ignore[arg-type]
+            elif action == "reboot":
+                success = gpio.reboot()
+            else:
+                success = gpio.test(pins[0])
+        if not success:
+            raise RuntimeError("Fallo la operación")
+        return success
+    return _run
+
+
+def sequence_func(
+    pins: List[int], steps: List[SequenceStep],
+) -> Callable[[Job], Dict[str, Any]]:
+    """
+    Arma la función que ejecuta una secuencia dentro de un trabajo.
+
+    :param pins: Todos los pines de la secuencia
+    :param steps: Pasos validados
+    """
+    def _run(job: Job) -> Dict[str, Any]:
+        with GPIOController(pins, job=job, reserve=False) as gpio:
+            return run_sequence(gpio, steps, job)
+    return _run
+
+
+def submit(
+    action: str,
+    pins: List[int],
+    func: Callable[[Job], Any],
+    owner: Optional[str] = None,
+) -> Job:
+    """
+    Reserva los pines y encola el trabajo.
+
+    Los pines se reservan antes de encolar (si están ocupados se avisa
+    de inmediato) y el trabajo los libera al terminar.
+
+    :param action: Nombre de la acción
+    :param pins: Pines a reservar
+    :param func: Función del trabajo
+    :param owner: Descripción del dueño (default: el id del trabajo)
+    :returns: Trabajo encolado
+    :raises PinsBusy: Si algún pin está en uso
+    :raises RuntimeError: Si la cola de trabajos está llena
+    """
+    job_id = new_job_id()
+    owner = owner or f"job {job_id}"
+    try:
+        registry.acquire(pins, owner=owner)
+    except RuntimeError as e:
+        raise PinsBusy(str(e)) from e
+
+    try:
+        return gpio_jobs.submit(
+            action,
+            pins,
+            func,
+            job_id=job_id,
+            on_finish=lambda: registry.release(pins, owner),
+        )
+    except RuntimeError:
+        registry.release(pins, owner)
+        raise
@@ -0,0 +1,669 @@
+"""
+Backends de GPIO intercambiables.
+
+El resto del código usa la numeración BOARD (pin físico del header de
+40 pines) y habla con el hardware solo a través de :class:`GPIOBackend`.
+
+Implementaciones:
+
+- ``rpi``: ``RPi.GPIO`` (sysfs/mmap, el histórico de la Raspberry Pi).
+- ``gpiod``: dispositivo de caracteres ``/dev/gpiochipN`` vía ``libgpiod``
+  (API v2). Todas las salidas van en un único *line request*, así una
+  escritura de varios pines es una sola llamada ``ioctl``.
+- ``mock``: en memoria, registra cada escritura con su timestamp y su
+  duración para probar la lógica y medir latencias fuera de una Pi, y
+  permite inyectar flancos en las entradas.
+
+Las entradas avisan cada flanco a un callback ``(pin, nivel, ts_ns)``
+con ``ts_ns`` en el reloj ``CLOCK_MONOTONIC`` (en ``gpiod`` es el
+timestamp que pone el kernel al detectar el flanco).
+
+Se elige con ``GPIO_BACKEND=auto|rpi|gpiod|mock``; ``auto`` prueba
+``rpi``, luego ``gpiod`` y por último ``mock``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Final, Iterable, List, Optional
+
+# Mapa pin físico (BOARD) -> GPIO del SoC (BCM) del header de 40 pines
+BOARD_TO_BCM: Final[Dict[int, int]] = {
+    3: 2, 5: 3, 7: 4, 8: 14, 10: 15, 11: 17, 12: 18, 13: 27,
+    15: 22, 16: 23, 18: 24, 19: 10, 21: 9, 22: 25, 23: 11, 24: 8,
+    26: 7, 27: 0, 28: 1, 29: 5, 31: 6, 32: 12, 33: 13, 35: 19,
+    36: 16, 37: 26, 38: 20, 40: 21,
+}
+
+# Chip por defecto para ``gpiod`` (el header de la Pi 5 es otro chip)
+DEFAULT_CHIP: Final[str] = "/dev/gpiochip0"
+
+# Espera de flancos por ciclo del lector ``gpiod`` y margen para que
+# termine al detenerlo (s)
+_EDGE_WAIT: Final[float] = 0.1
+_READER_JOIN_TIMEOUT: Final[float] = 2.0
+
+# Escrituras recordadas por el backend ``mock``
+_MOCK_HISTORY: Final[int] = 10_000
+
+# Flancos y resistencias aceptados para entradas
+EDGES: Final[frozenset[str]] = frozenset({"rising", "falling", "both"})
+PULLS: Final[frozenset[str]] = frozenset({"up", "down", "off"})
+
+# Callback de flancos: (pin BOARD, nivel nuevo, timestamp monotónico ns)
+EdgeCallback = Callable[[int, bool, int], None]
+
+
+class GPIOBackend(ABC):
+    """Interfaz mínima que usa ``utils.gpio`` para manejar pines."""
+
+    #: Nombre del backend (``rpi``, ``gpiod``, ``mock``)
+    name: str = ""
+
+    @abstractmethod
+    def setup_outputs(self, pins: Iterable[int]) -> None:
+        """
+        Configura pines como salida.
+
+        :param pins: Pines BOARD.
+        """
+
+    @abstractmethod
+    def release_outputs(self, pins: Iterable[int]) -> None:
+        """
+        Suelta pines configurados con :meth:`setup_outputs`.
+
+        Se usa antes de reconfigurarlos como entrada: mientras el
+        proceso los retenga como salida no se pueden volver a pedir.
+
+        :param pins: Pines BOARD.
+        """
+
+    @abstractmethod
+    def write(self, values: Dict[int, bool]) -> None:
+        """
+        Escribe varios pines de una vez.
+
+        :param values: Pin BOARD -> estado (``True`` = HIGH).
+        """
+
+    @abstractmethod
+    def read(self, pins: Iterable[int]) -> Dict[int, bool]:
+        """
+        Lee el nivel actual de varios pines.
+
+        :param pins: Pines BOARD ya configurados.
+        :returns: Pin -> nivel.
+        """
+
+    @abstractmethod
+    def status(self, pins: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Dirección y nivel de varios pines en una sola lectura.
+
+        No configura ni modifica ningún pin: los que el proceso no usa
+        se informan sin valor.
+
+        :param pins: Pines BOARD.
+        :returns: Pin -> ``{"direction": "in"|"out"|"alt"|None,
+            "value": bool|None}``.
+        """
+
+    @abstractmethod
+    def setup_inputs(
+        self,
+        pins: Iterable[int],
+        edge: str,
+        debounce_ms: int,
+        pull: str,
+        callback: EdgeCallback,
+    ) -> None:
+        """
+        Configura pines como entrada con detección de flancos.
+
+        :param pins: Pines BOARD.
+        :param edge: ``rising``, ``falling`` o ``both``.
+        :param debounce_ms: Tiempo de antirrebote (0 = sin filtro).
+        :param pull: Resistencia interna: ``up``, ``down`` u ``off``.
+        :param callback: Se llama (desde otro thread) en cada flanco.
+        """
+
+    @abstractmethod
+    def remove_inputs(self, pins: Iterable[int]) -> None:
+        """
+        Deja de observar entradas configuradas con :meth:`setup_inputs`.
+
+        Al volver, los pines ya están libres para pedirse de nuevo.
+
+        :param pins: Pines BOARD.
+        """
+
+    @abstractmethod
+    def cleanup(self) -> None:
+        """Libera los pines (al terminar el proceso)."""
+
+
+# region RPi.GPIO
+class RPiBackend(GPIOBackend):
+    """Backend sobre ``RPi.GPIO`` en modo BOARD."""
+
+    name = "rpi"
+
+    def __init__(self) -> None:
+        """
+        :raises ImportError: Si ``RPi.GPIO`` no está instalado.
+        """
+        from RPi import GPIO  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        self._gpio: Any = GPIO
+        # Desactiva los warnings que ensucian la consola y usa la
+        # numeración física de pines
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BOARD)
+
+    def setup_outputs(self, pins: Iterable[int]) -> None:
+        for pin in pins:
+            self._gpio.setup(pin, self._gpio.OUT)
+
+    def release_outputs(self, pins: Iterable[int]) -> None:
+        pins = list(pins)
+        if pins:
+            self._gpio.cleanup(pins)
+
+    def write(self, values: Dict[int, bool]) -> None:
+        pins = list(values)
+        # RPi.GPIO acepta listas de canales y de valores
+        self._gpio.output(
+            pins,
+            [self._gpio.HIGH if values[p] else self._gpio.LOW for p in pins],
+        )
+
+    def read(self, pins: Iterable[int]) -> Dict[int, bool]:
+        return {pin: bool(self._gpio.input(pin)) for pin in pins}
+
+    def status(self, pins: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        gpio = self._gpio
+        out: Dict[int, Dict[str, Any]] = {}
+        for pin in pins:
+            try:
+                func = gpio.gpio_function(pin)
+            except (RuntimeError, ValueError):
+                out[pin] = {"direction": None, "value": None}
+                continue
+            direction = {gpio.IN: "in", gpio.OUT: "out"}.get(func, "alt")
+            value: Optional[bool] = None
+            if direction != "alt":
+                try:
+                    value = bool(gpio.input(pin))
+                except RuntimeError:
+                    # Pin no configurado por este proceso
+                    pass
+            out[pin] = {"direction": direction, "value": value}
+        return out
+
+    def setup_inputs(
+        self,
+        pins: Iterable[int],
+        edge: str,
+        debounce_ms: int,
+        pull: str,
+        callback: EdgeCallback,
+    ) -> None:
+        gpio = self._gpio
+        pud = {"up": gpio.PUD_UP, "down": gpio.PUD_DOWN, "off": gpio.PUD_OFF}
+        kind = {"rising": gpio.RISING, "falling": gpio.FALLING, "both": gpio.BOTH}
+
+        def _on_edge(pin: int) -> None:
+            # RPi.GPIO no entrega el timestamp del kernel: se toma al
+            # entrar al callback
+            ts = time.monotonic_ns()
+            callback(pin, bool(gpio.input(pin)), ts)
+
+        for pin in pins:
+            gpio.setup(pin, gpio.IN, pull_up_down=pud[pull])
+            extra = {"bouncetime": debounce_ms} if debounce_ms > 0 else {}
+            gpio.add_event_detect(pin, kind[edge], callback=_on_edge, **extra)
+
+    def remove_inputs(self, pins: Iterable[int]) -> None:
+        for pin in pins:
+            self._gpio.remove_event_detect(pin)
+            self._gpio.cleanup(pin)
+
+    def cleanup(self) -> None:
+        self._gpio.cleanup()
+# endregion
+
+
+# region libgpiod
+class GpiodBackend(GPIOBackend):
+    """
+    Backend sobre ``/dev/gpiochipN`` con ``libgpiod`` (v2).
+
+    Las salidas se mantienen en un único *line request*; al agregar
+    pines nuevos se vuelve a pedir conservando los valores actuales.
+    """
+
+    name = "gpiod"
+
+    def __init__(self, chip: str = DEFAULT_CHIP) -> None:
+        """
+        :param chip: Dispositivo del chip GPIO.
+        :raises ImportError: Si no está el módulo ``gpiod`` v2.
+        :raises OSError: Si el chip no existe o no hay permisos.
+        """
+        import gpiod  # type: ignore  # pylint: disable=import-outside-toplevel
+        from gpiod.line import Direction, Value  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        self._gpiod: Any = gpiod
+        self._direction: Any = Direction
+        self._value: Any = Value
+        self.chip: str = chip
+        # Valida el chip ahora y no en la primera escritura
+        with gpiod.Chip(chip):
+            pass
+        self._lock = threading.Lock()
+        self._request: Any = None
+        self._values: Dict[int, bool] = {}
+        # Entradas: pin -> (evento de parada, thread lector dueño del request)
+        self._inputs: Dict[int, tuple[threading.Event, threading.Thread]] = {}
+
+    @staticmethod
+    def _offset(pin: int) -> int:
+        """Pin BOARD -> línea del chip."""
+        try:
+            return BOARD_TO_BCM[pin]
+        except KeyError as e:
+            raise ValueError(f"Pin {pin} no es un GPIO del header") from e
+
+    def _request_outputs(self, values: Dict[int, bool]) -> None:
+        """
+        Vuelve a pedir el *line request* de salidas con ``values``.
+
+        Se llama con ``self._lock`` tomado. Sin pines solo suelta el
+        request anterior.
+
+        :param values: Pin -> estado inicial de cada salida.
+        """
+        if self._request is not None:
+            self._request.release()
+            self._request = None
+        if values:
+            config = {
+                self._offset(pin): self._gpiod.LineSettings(
+                    direction=self._direction.OUTPUT,
+                    output_value=self._value.ACTIVE if v else self._value.INACTIVE,
+                )
+                for pin, v in values.items()
+            }
+            self._request = self._gpiod.request_lines(
+                self.chip, consumer="rpi_api", config=config
+            )
+        self._values = values
+
+    def setup_outputs(self, pins: Iterable[int]) -> None:
+        with self._lock:
+            new = [p for p in pins if p not in self._values]
+            if not new:
+                return
+            offsets = [self._offset(p) for p in new]
+            values = dict(self._values)
+            values.update({p: False for p in new})
+            self._request_outputs(values)
+            logging.debug("gpiod: líneas pedidas %s", offsets)
+
+    def release_outputs(self, pins: Iterable[int]) -> None:
+        with self._lock:
+            gone = set(pins) & set(self._values)
+            if not gone:
+                return
+            # Las demás salidas conservan su nivel actual
+            self._request_outputs(
+                {p: v for p, v in self._values.items() if p not in gone}
+            )
+            logging.debug("gpiod: líneas soltadas %s", sorted(gone))
+
+    def write(self, values: Dict[int, bool]) -> None:
+        with self._lock:
+            if self._request is None:
+                raise RuntimeError("No hay pines configurados")
+            # Una sola llamada para todos los pines
+            self._request.set_values({
+                self._offset(pin): self._value.ACTIVE if v else self._value.INACTIVE
+                for pin, v in values.items()
+            })
+            self._values.update(values)
+
+    def read(self, pins: Iterable[int]) -> Dict[int, bool]:
+        pins = list(pins)
+        with self._lock:
+            if self._request is None:
+                return {}
+            raw = self._request.get_values([self._offset(p) for p in pins])
+        return {pin: v == self._value.ACTIVE for pin, v in zip(pins, raw)}
+
+    def status(self, pins: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        pins = list(pins)
+        # Niveles de las líneas propias en una sola llamada
+        owned = [p for p in pins if p in self._values]
+        levels = self.read(owned) if owned else {}
+
+        out: Dict[int, Dict[str, Any]] = {}
+        with self._gpiod.Chip(self.chip) as chip:
+            for pin in pins:
+                offset = BOARD_TO_BCM.get(pin)
+                if offset is None:
+                    out[pin] = {"direction": None, "value": None}
+                    continue
+                info = chip.get_line_info(offset)
+                out[pin] = {
+                    "direction": (
+                        "out" if info.direction == self._direction.OUTPUT
+                        else "in"
+                    ),
+                    "value": levels.get(pin),
+                    "consumer": info.consumer if info.used else None,
+                }
+        return out
+
+    def setup_inputs(
+        self,
+        pins: Iterable[int],
+        edge: str,
+        debounce_ms: int,
+        pull: str,
+        callback: EdgeCallback,
+    ) -> None:
+        from gpiod.line import Bias, Clock, Edge  # type: ignore  # pylint: disable=import-outside-toplevel
+        from gpiod import EdgeEvent  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        pins = list(pins)
+        settings = self._gpiod.LineSettings(
+            direction=self._direction.INPUT,
+            edge_detection={
+                "rising": Edge.RISING, "falling": Edge.FALLING, "both": Edge.BOTH,
+            }[edge],
+            bias={"up": Bias.PULL_UP, "down": Bias.PULL_DOWN, "off": Bias.DISABLED}[pull],
+            # El antirrebote lo hace el kernel
+            debounce_period=timedelta(milliseconds=debounce_ms),
+            event_clock=Clock.MONOTONIC,
+        )
+        by_offset = {self._offset(p): p for p in pins}
+        request = self._gpiod.request_lines(
+            self.chip,
+            consumer="rpi_api",
+            config={tuple(by_offset): settings},
+        )
+        stop = threading.Event()
+
+        def _reader() -> None:
+            try:
+                while not stop.is_set():
+                    if not request.wait_edge_events(timedelta(seconds=_EDGE_WAIT)):
+                        continue
+                    for ev in request.read_edge_events():
+                        callback(
+                            by_offset[ev.line_offset],
+                            ev.event_type == EdgeEvent.Type.RISING_EDGE,
+                            ev.timestamp_ns,
+                        )
+            finally:
+                request.release()
+
+        reader = threading.Thread(
+            target=_reader, name=f"gpiod-edges-{pins[0]}", daemon=True
+        )
+        with self._lock:
+            for pin in pins:
+                self._inputs[pin] = (stop, reader)
+        reader.start()
+
+    @staticmethod
+    def _stop_readers(entries: Iterable[tuple[threading.Event, threading.Thread]]) -> None:
+        """
+        Detiene lectores y espera a que suelten su request.
+
+        El request lo suelta el propio lector (nunca mientras espera
+        eventos sobre él); esperarlo garantiza que las líneas queden
+        libres al volver.
+        """
+        entries = list(entries)
+        for stop, _ in entries:
+            stop.set()
+        for _, reader in entries:
+            if reader is not threading.current_thread():
+                reader.join(timeout=_READER_JOIN_TIMEOUT)
+
+    def remove_inputs(self, pins: Iterable[int]) -> None:
+        done = []
+        with self._lock:
+            for pin in pins:
+                entry = self._inputs.pop(pin, None)
+                # El request se suelta cuando ningún pin lo usa
+                if entry and all(e[0] is not entry[0] for e in self._inputs.values()):
+                    done.append(entry)
+        # Fuera del lock: el lector puede tardar hasta un ciclo de espera
+        self._stop_readers(done)
+
+    def cleanup(self) -> None:
+        with self._lock:
+            if self._request is not None:
+                self._request.release()
+                self._request = None
+            self._values.clear()
+            entries = {id(e[0]): e for e in self._inputs.values()}
+            self._inputs.clear()
+        self._stop_readers(entries.values())
+# endregion
+
+
+# region mock
+@dataclass(frozen=True)
+class WriteRecord:
+    """
+    Escritura registrada por :class:`MockBackend`.
+
+    :ivar at: ``time.monotonic`` al comenzar la escritura.
+    :ivar duration: Segundos que tomó la escritura.
+    :ivar values: Pin -> estado escrito.
+    """
+
+    at: float
+    duration: float
+    values: Dict[int, bool]
+
+
+class MockBackend(GPIOBackend):
+    """
+    Backend en memoria para pruebas y benchmarks.
+
+    Guarda el nivel de cada pin y un historial acotado de escrituras
+    con su timestamp monotónico, para medir tiempos entre pasos. Los
+    flancos de entrada se simulan con :meth:`inject`.
+    """
+
+    name = "mock"
+
+    def __init__(
+        self,
+        write_delay: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param write_delay: Latencia simulada por escritura (segundos).
+        :param clock: Reloj usado para los timestamps.
+        """
+        self.write_delay: float = write_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.levels: Dict[int, bool] = {}
+        self.outputs: set[int] = set()
+        self.writes: "deque[WriteRecord]" = deque(maxlen=_MOCK_HISTORY)
+        # pin -> (flanco, antirrebote ns, callback, último flanco ns)
+        self.inputs: Dict[int, List[Any]] = {}
+
+    def setup_outputs(self, pins: Iterable[int]) -> None:
+        with self._lock:
+            for pin in pins:
+                self.outputs.add(pin)
+                self.levels.setdefault(pin, False)
+
+    def release_outputs(self, pins: Iterable[int]) -> None:
+        with self._lock:
+            self.outputs.difference_update(pins)
+
+    def write(self, values: Dict[int, bool]) -> None:
+        start = self._clock()
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        with self._lock:
+            missing = set(values) - self.outputs
+            if missing:
+                raise RuntimeError(f"Pines no configurados: {sorted(missing)}")
+            self.levels.update(values)
+            self.writes.append(
+                WriteRecord(start, self._clock() - start, dict(values))
+            )
+
+    def read(self, pins: Iterable[int]) -> Dict[int, bool]:
+        with self._lock:
+            return {pin: self.levels.get(pin, False) for pin in pins}
+
+    def status(self, pins: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            return {
+                pin: (
+                    {"direction": "out", "value": self.levels.get(pin, False)}
+                    if pin in self.outputs
+                    else {"direction": "in", "value": self.levels.get(pin, False)}
+                    if pin in self.inputs
+                    else {"direction": None, "value": None}
+                )
+                for pin in pins
+            }
+
+    def setup_inputs(
+        self,
+        pins: Iterable[int],
+        edge: str,
+        debounce_ms: int,
+        pull: str,
+        callback: EdgeCallback,
+    ) -> None:
+        with self._lock:
+            for pin in pins:
+                self.outputs.discard(pin)
+                self.levels[pin] = pull == "up"
+                self.inputs[pin] = [edge, debounce_ms * 1_000_000, callback, None]
+
+    def remove_inputs(self, pins: Iterable[int]) -> None:
+        with self._lock:
+            for pin in pins:
+                self.inputs.pop(pin, None)
+
+    def inject(
+        self, pin: int, level: bool, timestamp_ns: Optional[int] = None,
+    ) -> bool:
+        """
+        Simula un cambio de nivel en una entrada.
+
+        Aplica el mismo filtro de flanco y antirrebote que el hardware.
+
+        :param pin: Pin BOARD configurado como entrada.
+        :param level: Nivel nuevo.
+        :param timestamp_ns: Instante del flanco (default: ahora).
+        :returns: ``True`` si el flanco se entregó al callback.
+        :raises RuntimeError: Si el pin no es una entrada.
+        """
+        ts = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        with self._lock:
+            entry = self.inputs.get(pin)
+            if entry is None:
+                raise RuntimeError(f"Pin {pin} no es una entrada")
+            edge, debounce_ns, callback, last = entry
+            if self.levels.get(pin) == level:
+                return False
+            self.levels[pin] = level
+            if last is not None and ts - last < debounce_ns:
+                return False
+            if edge != "both" and (edge == "rising") != level:
+                return False
+            entry[3] = ts
+        callback(pin, level, ts)
+        return True
+
+    def cleanup(self) -> None:
+        with self._lock:
+            self.outputs.clear()
+            self.levels.clear()
+            self.inputs.clear()
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """
+        Historial de escrituras relativo a la primera.
+
+        :returns: ``[{"offset", "duration", "values"}]`` en segundos.
+        """
+        with self._lock:
+            records = list(self.writes)
+        if not records:
+            return []
+        first = records[0].at
+        return [
+            {
+                "offset": r.at - first,
+                "duration": r.duration,
+                "values": r.values,
+            }
+            for r in records
+        ]
+
+    def reset(self) -> None:
+        """Borra el historial de escrituras."""
+        with self._lock:
+            self.writes.clear()
+# endregion
+
+
+_BACKENDS: Final[Dict[str, Callable[[], GPIOBackend]]] = {
+    "rpi": RPiBackend,
+    "gpiod": GpiodBackend,
+    "mock": MockBackend,
+}
+
+
+def load_backend(name: str = "auto", chip: Optional[str] = None) -> GPIOBackend:
+    """
+    Crea el backend pedido.
+
+    :param name: ``auto``, ``rpi``, ``gpiod`` o ``mock``.
+    :param chip: Dispositivo para ``gpiod`` (por defecto ``DEFAULT_CHIP``).
+    :returns: Backend listo para usar.
+    :raises ValueError: Si el nombre no es válido.
+    :raises ImportError | OSError: Si el backend pedido explícitamente
+        no está disponible.
+    """
+    name = name.strip().lower() or "auto"
+    if name not in _BACKENDS and name != "auto":
+        raise ValueError(f"GPIO_BACKEND inválido: {name!r}")
+
+    def _make(kind: str) -> GPIOBackend:
+        if kind == "gpiod":
+            return GpiodBackend(chip or DEFAULT_CHIP)
+        return _BACKENDS[kind]()
+
+    if name != "auto":
+        return _make(name)
+
+    for kind in ("rpi", "gpiod"):
+        try:
+            return _make(kind)
+        except (ImportError, OSError, RuntimeError) as e:
+            logging.info("Backend GPIO %s no disponible: %s", kind, e)
+    logging.warning("Sin hardware GPIO: usando backend mock")
+    return MockBackend()
@@ -0,0 +1,260 @@
+"""
+Captura de flancos en entradas GPIO.
+
+Las entradas registradas (sensores de puerta, aviso de corte de luz...)
+entregan cada flanco desde el thread del backend a un buffer circular
+acotado. Cada evento lleva un número de secuencia creciente, así un
+cliente puede pedir "todo lo posterior a N" y saber si se perdió algo
+porque el buffer ya lo descartó.
+
+El backend entrega el timestamp del flanco en ``CLOCK_MONOTONIC``; se
+convierte a epoch al guardarlo para que sea útil fuera del equipo.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Final, List, Optional
+
+from utils.gpio import backend, registry
+from utils.gpio_backends import EDGES, PULLS, GPIOBackend
+
+# Eventos que se guardan en memoria
+RING_SIZE: Final[int] = 4096
+
+# Antirrebote máximo aceptado (ms)
+MAX_DEBOUNCE_MS: Final[int] = 10_000
+
+# Dueño de las reservas de entradas en el ``registry``
+_INPUT_OWNER: Final[str] = "input"
+
+
+@dataclass(frozen=True)
+class EdgeEvent:
+    """
+    Flanco detectado en una entrada.
+
+    :ivar seq: Número de secuencia (empieza en 1).
+    :ivar pin: Pin BOARD.
+    :ivar edge: ``rising`` o ``falling``.
+    :ivar timestamp_ns: Instante del flanco en ``CLOCK_MONOTONIC``.
+    :ivar time: Mismo instante en epoch (s).
+    """
+
+    seq: int
+    pin: int
+    edge: str
+    timestamp_ns: int
+    time: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa a dict apto para JSON."""
+        return {
+            "seq": self.seq,
+            "pin": self.pin,
+            "edge": self.edge,
+            "timestamp_ns": self.timestamp_ns,
+            "time": self.time,
+        }
+
+
+class EventRing:
+    """
+    Buffer circular de eventos con espera de nuevos.
+
+    Los eventos se agregan desde los threads del backend; la sección
+    crítica es solo el ``append`` y el aviso a quienes esperan.
+    """
+
+    def __init__(self, size: int = RING_SIZE) -> None:
+        """
+        :param size: Cantidad máxima de eventos guardados.
+        """
+        self._events: "deque[EdgeEvent]" = deque(maxlen=size)
+        self._seq = itertools.count(1)
+        self._last: int = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_seq(self) -> int:
+        """Secuencia del último evento (0 si no hubo ninguno)."""
+        return self._last
+
+    def push(self, pin: int, level: bool, timestamp_ns: int) -> EdgeEvent:
+        """
+        Agrega un flanco.
+
+        :param pin: Pin BOARD.
+        :param level: Nivel después del flanco.
+        :param timestamp_ns: Instante monotónico del flanco.
+        :returns: Evento guardado.
+        """
+        # Convierte el reloj monotónico a epoch
+        epoch = time.time() - (time.monotonic_ns() - timestamp_ns) / 1e9
+        with self._cond:
+            event = EdgeEvent(
+                seq=next(self._seq),
+                pin=pin,
+                edge="rising" if level else "falling",
+                timestamp_ns=timestamp_ns,
+                time=epoch,
+            )
+            self._events.append(event)
+            self._last = event.seq
+            self._cond.notify_all()
+        return event
+
+    def since(
+        self, seq: int, limit: int = RING_SIZE,
+    ) -> tuple[List[EdgeEvent], bool]:
+        """
+        Eventos con secuencia mayor a ``seq``.
+
+        :param seq: Última secuencia ya vista por el cliente.
+        :param limit: Máximo de eventos a devolver.
+        :returns: ``(eventos, perdidos)``; ``perdidos`` indica que hubo
+            eventos posteriores a ``seq`` que ya salieron del buffer.
+        """
+        with self._cond:
+            if not self._events:
+                return [], False
+            first = self._events[0].seq
+            start = max(seq - first + 1, 0)
+            events = list(
+                itertools.islice(self._events, start, start + max(limit, 0))
+            )
+            return events, seq < first - 1
+
+    def wait(self, seq: int, timeout: float) -> bool:
+        """
+        Espera a que haya eventos posteriores a ``seq``.
+
+        :returns: ``True`` si los hay.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._last > seq, timeout=max(timeout, 0.0)
+            )
+
+
+@dataclass(frozen=True)
+class InputConfig:
+    """
+    Entrada registrada.
+
+    :ivar pin: Pin BOARD.
+    :ivar edge: ``rising``, ``falling`` o ``both``.
+    :ivar debounce_ms: Antirrebote.
+    :ivar pull: Resistencia interna.
+    """
+
+    pin: int
+    edge: str
+    debounce_ms: int
+    pull: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa a dict apto para JSON."""
+        return {
+            "pin": self.pin,
+            "edge": self.edge,
+            "debounce_ms": self.debounce_ms,
+            "pull": self.pull,
+        }
+
+
+class InputManager:
+    """Registro de entradas con detección de flancos."""
+
+    def __init__(self, gpio: GPIOBackend, ring: EventRing) -> None:
+        """
+        :param gpio: Backend que detecta los flancos.
+        :param ring: Buffer donde se guardan los eventos.
+        """
+        self.gpio: GPIOBackend = gpio
+        self.ring: EventRing = ring
+        self._lock = threading.Lock()
+        self._inputs: Dict[int, InputConfig] = {}
+
+    def register(
+        self,
+        pins: List[int],
+        edge: str = "both",
+        debounce_ms: int = 0,
+        pull: str = "off",
+    ) -> List[InputConfig]:
+        """
+        Configura pines como entradas y empieza a capturar flancos.
+
+        Los pines quedan reservados en el ``registry`` (ninguna acción
+        de salida puede tomarlos) hasta :meth:`unregister`.
+
+        :param pins: Pines BOARD.
+        :param edge: ``rising``, ``falling`` o ``both``.
+        :param debounce_ms: Antirrebote en ms.
+        :param pull: ``up``, ``down`` u ``off``.
+        :returns: Configuración aplicada.
+        :raises ValueError: Si algún parámetro es inválido.
+        :raises RuntimeError: Si algún pin está en uso.
+        :raises OSError: Si el backend no pudo pedir las líneas.
+        """
+        if edge not in EDGES:
+            raise ValueError(f"'edge' debe ser uno de {sorted(EDGES)}")
+        if pull not in PULLS:
+            raise ValueError(f"'pull' debe ser uno de {sorted(PULLS)}")
+        if not 0 <= debounce_ms <= MAX_DEBOUNCE_MS:
+            raise ValueError(f"'debounce_ms' debe estar entre 0 y {MAX_DEBOUNCE_MS}")
+
+        with self._lock:
+            registry.acquire(pins, owner=_INPUT_OWNER)
+            try:
+                # Si fueron salidas, el backend las retiene hasta soltarlas
+                registry.forget(pins)
+                self.gpio.setup_inputs(
+                    pins, edge, debounce_ms, pull, self.ring.push
+                )
+            except Exception:
+                registry.release(pins, _INPUT_OWNER)
+                raise
+            configs = [InputConfig(p, edge, debounce_ms, pull) for p in pins]
+            for cfg in configs:
+                self._inputs[cfg.pin] = cfg
+        logging.info("Entradas registradas: %s (%s)", pins, edge)
+        return configs
+
+    def unregister(self, pin: int) -> bool:
+        """
+        Deja de capturar una entrada y libera el pin.
+
+        :param pin: Pin BOARD.
+        :returns: ``False`` si el pin no estaba registrado.
+        """
+        with self._lock:
+            if self._inputs.pop(pin, None) is None:
+                return False
+            try:
+                self.gpio.remove_inputs([pin])
+            finally:
+                registry.release([pin], _INPUT_OWNER)
+        logging.info("Entrada liberada: %d", pin)
+        return True
+
+    def list(self) -> List[InputConfig]:
+        """Entradas registradas, ordenadas por pin."""
+        with self._lock:
+            return [self._inputs[p] for p in sorted(self._inputs)]
+
+    def get(self, pin: int) -> Optional[InputConfig]:
+        """Configuración de una entrada (o ``None``)."""
+        with self._lock:
+            return self._inputs.get(pin)
+
+
+# Instancias compartidas del proceso
+edge_events: Final[EventRing] = EventRing()
+inputs: Final[InputManager] = InputManager(backend, edge_events)
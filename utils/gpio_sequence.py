@@ -0,0 +1,148 @@
+"""
+Secuencias de GPIO con tiempos relativos.
+
+Una secuencia es una lista de pasos; cada paso fija el estado de un
+grupo de pines a la vez (una sola escritura) en un instante relativo al
+paso anterior (``after``) o al inicio (``at``). Los instantes se
+calculan como *deadlines* sobre ``time.monotonic`` desde el inicio, así
+los retrasos de un paso no se acumulan en los siguientes.
+
+Ejemplo (apagar 8 relés juntos y prenderlos 5 s después)::
+
+    {"steps": [
+        {"set": {"11": "off", "13": "off", ...}},
+        {"set": {"11": "on", "13": "on", ...}, "after": 5}
+    ]}
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Final, List
+
+from utils.gpio import GPIOController
+from utils.jobs import Job
+
+# Límites de una secuencia
+MAX_STEPS: Final[int] = 256
+MAX_DURATION: Final[float] = 3600.0
+
+# Valores aceptados para el estado de un pin
+_STATES: Final[Dict[Any, bool]] = {
+    "on": True, "off": False,
+    "high": True, "low": False,
+    1: True, 0: False,
+    True: True, False: False,
+}
+
+
+@dataclass(frozen=True)
+class SequenceStep:
+    """
+    Paso de una secuencia ya validado.
+
+    :ivar offset: Segundos desde el inicio de la secuencia.
+    :ivar values: Pin -> estado (``True`` = HIGH).
+    """
+
+    offset: float
+    values: Dict[int, bool]
+
+
+def parse_steps(raw: Any) -> List[SequenceStep]:
+    """
+    Valida y normaliza los pasos recibidos por la API.
+
+    :param raw: Lista de pasos ``{"set": {...}, "after"|"at": float}``.
+    :returns: Pasos con offsets absolutos, en orden de ejecución.
+    :raises ValueError: Si el formato es inválido.
+    """
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("Se requiere 'steps': List")
+    if len(raw) > MAX_STEPS:
+        raise ValueError(f"Máximo {MAX_STEPS} pasos por secuencia")
+
+    steps: List[SequenceStep] = []
+    offset = 0.0
+    for idx, item in enumerate(raw):
+        if not isinstance(item, dict) or not isinstance(item.get("set"), dict):
+            raise ValueError(f"Paso {idx}: se requiere 'set': {{pin: estado}}")
+        if not item["set"]:
+            raise ValueError(f"Paso {idx}: 'set' vacío")
+
+        values: Dict[int, bool] = {}
+        for pin, state in item["set"].items():
+            try:
+                pin_n = int(pin)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Paso {idx}: pin inválido {pin!r}") from e
+            key = state.lower() if isinstance(state, str) else state
+            if key not in _STATES:
+                raise ValueError(f"Paso {idx}: estado inválido {state!r}")
+            values[pin_n] = _STATES[key]
+
+        try:
+            if "at" in item:
+                at = float(item["at"])
+                # NaN pasaría todas las comparaciones e inf no termina nunca
+                if not math.isfinite(at):
+                    raise ValueError(f"Paso {idx}: 'at' debe ser finito")
+                if at < offset:
+                    raise ValueError(f"Paso {idx}: 'at' debe ser creciente")
+                offset = at
+            else:
+                after = float(item.get("after", 0.0))
+                if not math.isfinite(after):
+                    raise ValueError(f"Paso {idx}: 'after' debe ser finito")
+                if after < 0:
+                    raise ValueError(f"Paso {idx}: 'after' debe ser >= 0")
+                offset += after
+        except TypeError as e:
+            raise ValueError(f"Paso {idx}: tiempo inválido") from e
+
+        if offset > MAX_DURATION:
+            raise ValueError(f"La secuencia supera {MAX_DURATION:.0f} s")
+        steps.append(SequenceStep(offset=offset, values=values))
+
+    return steps
+
+
+def sequence_pins(steps: List[SequenceStep]) -> List[int]:
+    """Todos los pines que toca la secuencia, ordenados."""
+    return sorted({pin for step in steps for pin in step.values})
+
+
+def run_sequence(
+    gpio: GPIOController, steps: List[SequenceStep], job: Job,
+) -> Dict[str, Any]:
+    """
+    Ejecuta la secuencia con deadlines monotónicos.
+
+    :param gpio: Controlador con los pines de la secuencia.
+    :param steps: Pasos validados por :func:`parse_steps`.
+    :param job: Trabajo en curso (para cancelación).
+    :returns: Resumen con el retraso real de cada paso.
+    :raises JobCancelled: Si se cancela el trabajo.
+    """
+    timings: List[Dict[str, float]] = []
+    start = time.monotonic()
+    for step in steps:
+        # Espera hasta el deadline absoluto del paso
+        job.sleep(start + step.offset - time.monotonic())
+        job.check_cancelled()
+        fired = time.monotonic() - start
+        gpio.apply(step.values)
+        timings.append({
+            "at": step.offset,
+            "fired": round(fired, 4),
+            "lag_ms": round((fired - step.offset) * 1000, 2),
+        })
+
+    return {
+        "steps": len(steps),
+        "duration": round(time.monotonic() - start, 4),
+        "max_lag_ms": max(t["lag_ms"] for t in timings),
+        "timings": timings,
+    }
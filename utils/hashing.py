@@ -0,0 +1,72 @@
+"""
+Hash de contenido de archivos con cache por identidad del archivo.
+
+El SHA-256 se calcula leyendo el archivo en bloques grandes (sin
+cargarlo entero en memoria) y se guarda indexado por
+``(st_dev, st_ino, st_size, st_mtime_ns)``: mientras el archivo no
+cambie, no se vuelve a leer del disco.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import stat
+from typing import Final
+
+from utils.cache import TTLCache
+
+# Tamaño del bloque de lectura (1 MiB rinde bien en tarjetas SD)
+HASH_CHUNK_SIZE: Final[int] = 1024 * 1024
+
+# Cache: identidad del archivo -> hexdigest
+_HASH_CACHE: Final[TTLCache[tuple[int, int, int, int], str]] = TTLCache(
+    maxsize=2048
+)
+
+
+def _file_key(st: os.stat_result) -> tuple[int, int, int, int]:
+    """Identidad del contenido según ``stat``."""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def sha256_file(path: str | os.PathLike[str]) -> tuple[str, bool]:
+    """
+    Calcula (o recupera de cache) el SHA-256 de un archivo regular.
+
+    La llave se toma del ``fstat`` del descriptor abierto, así se hashea
+    exactamente el archivo que se leyó aunque lo reemplacen entre medio.
+
+    :param path: Ruta del archivo (ya validada).
+    :returns: ``(hexdigest, cached)``.
+    :raises OSError: Si no se puede abrir o leer.
+    :raises ValueError: Si no es un archivo regular.
+    """
+    with open(path, "rb", buffering=0) as fh:
+        st = os.fstat(fh.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            raise ValueError("Solo se pueden hashear archivos regulares.")
+
+        key = _file_key(st)
+        hit = _HASH_CACHE.get(key)
+        if hit is not None:
+            return hit, True
+
+        # Lectura por bloques reutilizando el mismo buffer
+        digest = hashlib.sha256()
+        buf = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = fh.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+
+    # Si cambió durante la lectura, el hash no es confiable para cache
+    hexdigest = digest.hexdigest()
+    try:
+        if _file_key(os.stat(path)) == key:
+            _HASH_CACHE.set(key, hexdigest)
+    except OSError:
+        pass
+    return hexdigest, False
@@ -0,0 +1,156 @@
+"""
+Soporte del header ``Idempotency-Key`` para endpoints de acción.
+
+Si el router reintenta un request que tardó (timeout del lado del
+cliente), el reintento con la misma llave no vuelve a ejecutar la
+acción: recibe la respuesta original o, si la original aún está en
+curso, espera a que termine y recibe esa misma respuesta.
+
+Las respuestas se guardan en una cache acotada con TTL. Solo se guardan
+las ``2xx`` y los errores deterministas del request (400, 404...); las
+transitorias (409, 423 pines ocupados, 429, ``5xx``) y las excepciones
+no: el reintento con la misma llave vuelve a ejecutar.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Final, Optional
+
+from flask import Response, jsonify, make_response, request
+
+from utils.cache import TTLCache
+
+# Header del cliente y de respuesta repetida
+HEADER: Final[str] = "Idempotency-Key"
+REPLAYED_HEADER: Final[str] = "Idempotent-Replayed"
+
+# Largo máximo de la llave
+_MAX_KEY_LEN: Final[int] = 255
+
+# Cuánto se recuerda una llave y cuántas se guardan
+_TTL: Final[float] = 24 * 3600.0
+_MAX_KEYS: Final[int] = 1024
+
+# Cuánto espera un duplicado a que termine el original
+_ATTACH_TIMEOUT: Final[float] = 60.0
+
+# Errores que dependen solo del request: repetirlos es correcto
+_STORED_ERRORS: Final[frozenset[int]] = frozenset({400, 404, 405, 410, 413, 415, 422})
+
+# Headers de la respuesta original que se repiten
+_KEPT_HEADERS: Final[tuple[str, ...]] = ("Content-Type", "Location", "Retry-After")
+
+
+@dataclass(eq=False)
+class _Entry:
+    """Request registrado bajo una llave."""
+
+    fingerprint: str
+    done: threading.Event = field(default_factory=threading.Event)
+    status: Optional[int] = None
+    body: bytes = b""
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+    def replay(self) -> Response:
+        """Reconstruye la respuesta guardada."""
+        resp = Response(self.body, status=self.status, headers=self.headers)
+        resp.headers[REPLAYED_HEADER] = "true"
+        return resp
+
+
+class IdempotencyStore:
+    """Llaves recientes y sus respuestas."""
+
+    def __init__(self, maxsize: int = _MAX_KEYS, ttl: float = _TTL) -> None:
+        """
+        :param maxsize: Cantidad máxima de llaves recordadas.
+        :param ttl: Segundos que se recuerda cada llave.
+        """
+        self._entries: TTLCache[str, _Entry] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _fingerprint() -> str:
+        """Huella del request actual: método, ruta, query y body."""
+        digest = hashlib.sha256()
+        for part in (request.method, request.path, request.query_string):
+            digest.update(part if isinstance(part, bytes) else part.encode())
+            digest.update(b"\0")
+        digest.update(request.get_data(cache=True))
+        return digest.hexdigest()
+
+    def run(self, key: str, view: Callable[[], Any]) -> Response:
+        """
+        Ejecuta ``view`` una sola vez por llave.
+
+        :param key: Valor del header ``Idempotency-Key``.
+        :param view: Vista a ejecutar si la llave es nueva.
+        :returns: Respuesta original, repetida o de error.
+        """
+        fingerprint = self._fingerprint()
+        mine = _Entry(fingerprint)
+        entry = self._entries.setdefault(key, mine)
+
+        if entry is not mine:
+            if entry.fingerprint != fingerprint:
+                return make_response(jsonify({
+                    "error": f"{HEADER} ya usada con otro request",
+                }), 422)
+            # Se adjunta al request original
+            if not entry.done.wait(_ATTACH_TIMEOUT) or entry.status is None:
+                resp = make_response(jsonify({
+                    "error": "Request original aún en curso o fallido; reintentar",
+                }), 409)
+                resp.headers["Retry-After"] = "5"
+                return resp
+            return entry.replay()
+
+        try:
+            resp = make_response(view())
+        except BaseException:
+            self._entries.pop(key)
+            mine.done.set()
+            raise
+
+        status = resp.status_code
+        if not (200 <= status < 300 or status in _STORED_ERRORS) or resp.is_streamed:
+            # No se guarda: el próximo intento ejecuta de nuevo
+            self._entries.pop(key)
+        else:
+            mine.status = resp.status_code
+            mine.body = resp.get_data()
+            mine.headers = [
+                (name, resp.headers[name])
+                for name in _KEPT_HEADERS
+                if name in resp.headers
+            ]
+        mine.done.set()
+        return resp
+
+
+# Instancia compartida del proceso
+store: Final[IdempotencyStore] = IdempotencyStore()
+
+
+def idempotent(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorador: respeta ``Idempotency-Key`` en la vista.
+
+    Sin el header la vista se ejecuta normal.
+    """
+    @functools.wraps(view)
+    def _wrapper(*args: Any, **kwargs: Any) -> Any:
+        key = request.headers.get(HEADER, "").strip()
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > _MAX_KEY_LEN:
+            return jsonify({
+                "error": f"{HEADER} supera {_MAX_KEY_LEN} caracteres",
+            }), 400
+        return store.run(key, lambda: view(*args, **kwargs))
+    return _wrapper
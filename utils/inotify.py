@@ -0,0 +1,306 @@
+"""
+Observador de cambios de archivos basado en inotify (Linux).
+
+Un solo thread compartido lee el descriptor de inotify y reparte los
+eventos a las suscripciones activas. Cada directorio se observa una
+sola vez aunque tenga varias suscripciones (conteo de referencias).
+
+Para observar un archivo (que puede no existir todavía) se observa su
+directorio padre filtrando por nombre; así se detecta su creación.
+
+No depende de paquetes externos: usa ``ctypes`` sobre la libc.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Final, Optional
+
+# Flags de inotify (linux/inotify.h)
+IN_MODIFY: Final[int] = 0x00000002
+IN_ATTRIB: Final[int] = 0x00000004
+IN_CLOSE_WRITE: Final[int] = 0x00000008
+IN_MOVED_FROM: Final[int] = 0x00000040
+IN_MOVED_TO: Final[int] = 0x00000080
+IN_CREATE: Final[int] = 0x00000100
+IN_DELETE: Final[int] = 0x00000200
+IN_DELETE_SELF: Final[int] = 0x00000400
+IN_MOVE_SELF: Final[int] = 0x00000800
+IN_Q_OVERFLOW: Final[int] = 0x00004000
+IN_IGNORED: Final[int] = 0x00008000
+IN_ISDIR: Final[int] = 0x40000000
+IN_CLOEXEC: Final[int] = 0o2000000
+
+# Eventos que se observan y su nombre en la API
+WATCH_MASK: Final[int] = (
+    IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_DELETE
+    | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT_NAMES: Final[tuple[tuple[int, str], ...]] = (
+    (IN_CREATE, "create"),
+    (IN_MODIFY, "modify"),
+    (IN_CLOSE_WRITE, "close_write"),
+    (IN_DELETE, "delete"),
+    (IN_MOVED_FROM, "move_from"),
+    (IN_MOVED_TO, "move_to"),
+    (IN_DELETE_SELF, "delete_self"),
+    (IN_MOVE_SELF, "move_self"),
+    (IN_Q_OVERFLOW, "overflow"),
+)
+
+# struct inotify_event { int wd; uint32 mask, cookie, len; char name[]; }
+_EVENT_HEADER: Final[struct.Struct] = struct.Struct("iIII")
+
+# Tope de suscripciones simultáneas (cada long-poll ocupa un worker)
+MAX_SUBSCRIPTIONS: Final[int] = 64
+
+# Tope de eventos pendientes por suscripción
+_QUEUE_SIZE: Final[int] = 1024
+
+
+@dataclass(frozen=True)
+class FileEvent:
+    """
+    Evento de cambio sobre un archivo o directorio.
+
+    :ivar event: Tipo (``create``, ``modify``, ``delete``...).
+    :ivar path: Ruta afectada.
+    :ivar is_dir: Si la entrada afectada es un directorio.
+    :ivar timestamp: Epoch (s) en que el thread recibió el evento.
+    """
+
+    event: str
+    path: str
+    is_dir: bool
+    timestamp: float
+
+    def to_dict(self) -> dict[str, object]:
+        """Serializa a dict apto para JSON."""
+        return {
+            "event": self.event,
+            "path": self.path,
+            "is_dir": self.is_dir,
+            "timestamp": self.timestamp,
+        }
+
+
+@dataclass(eq=False)
+class Subscription:
+    """
+    Suscripción a los eventos de un directorio (o de un nombre en él).
+
+    :ivar directory: Directorio observado.
+    :ivar name: Si se define, solo eventos de esa entrada.
+    """
+
+    directory: str
+    name: Optional[str]
+    events: "queue.Queue[FileEvent]" = field(
+        default_factory=lambda: queue.Queue(maxsize=_QUEUE_SIZE)
+    )
+    _watcher: Optional["InotifyWatcher"] = None
+
+    def get(self, timeout: float) -> Optional[FileEvent]:
+        """
+        Espera el siguiente evento.
+
+        :param timeout: Segundos máximos de espera.
+        :returns: Evento o ``None`` si venció el timeout.
+        """
+        try:
+            return self.events.get(timeout=max(timeout, 0.0))
+        except queue.Empty:
+            return None
+
+    def drain(self) -> list[FileEvent]:
+        """Devuelve (sin esperar) todos los eventos pendientes."""
+        out: list[FileEvent] = []
+        while True:
+            try:
+                out.append(self.events.get_nowait())
+            except queue.Empty:
+                return out
+
+    def close(self) -> None:
+        """Cancela la suscripción."""
+        if self._watcher is not None:
+            self._watcher.unsubscribe(self)
+            self._watcher = None
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class InotifyWatcher:
+    """Thread único que lee inotify y reparte eventos."""
+
+    def __init__(self) -> None:
+        self._fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # wd -> directorio, directorio -> (wd, suscripciones)
+        self._wd_dirs: dict[int, str] = {}
+        self._dirs: dict[str, tuple[int, list[Subscription]]] = {}
+        self._libc: Optional[ctypes.CDLL] = None
+
+    # region internos
+    def _ensure_started(self) -> None:
+        """Inicializa inotify y el thread lector la primera vez."""
+        if self._fd is not None:
+            return
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify no disponible")
+        # Descriptor bloqueante: el thread duerme en read() sin polling
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._libc = libc
+        self._fd = fd
+        self._thread = threading.Thread(
+            target=self._run, name="inotify-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def _add_watch(self, directory: str) -> int:
+        """Registra un directorio en inotify."""
+        assert self._libc is not None and self._fd is not None
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), WATCH_MASK
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), directory)
+        return wd
+
+    def _run(self) -> None:
+        """Loop del thread: espera datos y despacha."""
+        assert self._fd is not None
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except InterruptedError:
+                continue
+            self._dispatch(data)
+
+    def _dispatch(self, data: bytes) -> None:
+        """Parsea un bloque de eventos y los entrega."""
+        now = time.time()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_IGNORED:
+                # El kernel quitó el watch (directorio borrado/desmontado)
+                with self._lock:
+                    directory = self._wd_dirs.pop(wd, None)
+                    if directory is not None:
+                        self._dirs.pop(directory, None)
+                continue
+            name = os.fsdecode(raw_name) if raw_name else ""
+            kind = next(
+                (label for bit, label in _EVENT_NAMES if mask & bit),
+                "other",
+            )
+
+            with self._lock:
+                directory = self._wd_dirs.get(wd)
+                subs = list(self._dirs[directory][1]) if directory else []
+            if directory is None and not mask & IN_Q_OVERFLOW:
+                continue
+
+            event = FileEvent(
+                event=kind,
+                path=os.path.join(directory, name) if directory else "",
+                is_dir=bool(mask & IN_ISDIR),
+                timestamp=now,
+            )
+            targets = subs
+            if mask & IN_Q_OVERFLOW:
+                with self._lock:
+                    targets = [s for _, ss in self._dirs.values() for s in ss]
+            for sub in targets:
+                # Los eventos del propio directorio llegan sin nombre
+                if sub.name and name and sub.name != name:
+                    continue
+                try:
+                    sub.events.put_nowait(event)
+                except queue.Full:
+                    pass
+    # endregion
+
+    def subscribe(self, path: str) -> Subscription:
+        """
+        Se suscribe a cambios de ``path``.
+
+        Si es un directorio se observan sus entradas; si no, se observa
+        el padre filtrando por nombre (sirve aunque aún no exista).
+
+        :param path: Ruta absoluta ya validada.
+        :returns: Suscripción (usar como contexto o llamar ``close``).
+        :raises OSError: Si inotify no está disponible o falla el watch.
+        :raises RuntimeError: Si se alcanzó ``MAX_SUBSCRIPTIONS``.
+        """
+        if os.path.isdir(path):
+            directory, name = path, None
+        else:
+            directory, name = os.path.split(path)
+
+        with self._lock:
+            self._ensure_started()
+            total = sum(len(subs) for _, subs in self._dirs.values())
+            if total >= MAX_SUBSCRIPTIONS:
+                raise RuntimeError("Demasiadas suscripciones activas.")
+
+            sub = Subscription(directory=directory, name=name, _watcher=self)
+            if directory in self._dirs:
+                self._dirs[directory][1].append(sub)
+            else:
+                wd = self._add_watch(directory)
+                self._wd_dirs[wd] = directory
+                self._dirs[directory] = (wd, [sub])
+            return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        """
+        Cancela una suscripción y quita el watch si nadie más lo usa.
+
+        :param sub: Suscripción devuelta por :meth:`subscribe`.
+        """
+        with self._lock:
+            entry = self._dirs.get(sub.directory)
+            if entry is None:
+                return
+            wd, subs = entry
+            if sub in subs:
+                subs.remove(sub)
+            if subs:
+                return
+            del self._dirs[sub.directory]
+            self._wd_dirs.pop(wd, None)
+            if self._libc is not None and self._fd is not None:
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def active(self) -> int:
+        """Cantidad de suscripciones activas."""
+        with self._lock:
+            return sum(len(subs) for _, subs in self._dirs.values())
+
+
+# Instancia compartida del proceso
+watcher: Final[InotifyWatcher] = InotifyWatcher()
@@ -0,0 +1,252 @@
+"""
+Cola de trabajos en segundo plano para acciones lentas (GPIO).
+
+Las acciones se encolan y se ejecutan en un pool chico de threads; el
+request HTTP responde de inmediato con el id del trabajo y el cliente
+consulta su estado después. Se guarda un historial acotado de los
+últimos trabajos y se pueden cancelar (los trabajos en curso lo notan
+en su próxima espera).
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Final, Optional
+
+# Estados posibles de un trabajo
+QUEUED: Final[str] = "queued"
+RUNNING: Final[str] = "running"
+SUCCEEDED: Final[str] = "succeeded"
+FAILED: Final[str] = "failed"
+CANCELLED: Final[str] = "cancelled"
+FINISHED: Final[frozenset[str]] = frozenset({SUCCEEDED, FAILED, CANCELLED})
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando se pidió su cancelación."""
+
+
+def new_job_id() -> str:
+    """Genera un id corto y único para un trabajo."""
+    return uuid.uuid4().hex[:12]
+
+
+@dataclass(eq=False)
+class Job:
+    """
+    Trabajo encolado.
+
+    :ivar id: Identificador.
+    :ivar action: Nombre de la acción (``reboot``, ``test``...).
+    :ivar pins: Pines involucrados.
+    :ivar status: Estado (``queued``, ``running``, ``succeeded``...).
+    :ivar result: Valor devuelto por la acción (si terminó bien).
+    :ivar error: Mensaje de error (si falló).
+    """
+
+    id: str
+    action: str
+    pins: list[int]
+    func: Callable[["Job"], Any] = field(repr=False)
+    on_finish: Optional[Callable[[], None]] = field(default=None, repr=False)
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(
+        default_factory=threading.Event, repr=False
+    )
+    done_event: threading.Event = field(
+        default_factory=threading.Event, repr=False
+    )
+
+    @property
+    def finished(self) -> bool:
+        """Indica si el trabajo ya terminó (bien, mal o cancelado)."""
+        return self.status in FINISHED
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Espera ``seconds`` pero despierta si se cancela el trabajo.
+
+        :raises JobCancelled: Si se pidió la cancelación.
+        """
+        if self.cancel_event.wait(max(seconds, 0.0)):
+            raise JobCancelled()
+
+    def check_cancelled(self) -> None:
+        """:raises JobCancelled: Si se pidió la cancelación."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serializa a dict apto para JSON."""
+        return {
+            "id": self.id,
+            "action": self.action,
+            "pins": self.pins,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Pool de workers con cola acotada e historial de trabajos."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 32,
+        history: int = 100,
+    ) -> None:
+        """
+        :param workers: Threads que ejecutan trabajos.
+        :param max_pending: Máximo de trabajos esperando en cola.
+        :param history: Trabajos terminados que se recuerdan.
+        """
+        self.workers: int = workers
+        self.history: int = history
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_pending)
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._counter = itertools.count(1)
+
+    def _ensure_workers(self) -> None:
+        """Levanta los workers la primera vez que se usan."""
+        if self._threads:
+            return
+        for _ in range(self.workers):
+            t = threading.Thread(
+                target=self._run,
+                name=f"job-worker-{next(self._counter)}",
+                daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+
+    def _trim(self) -> None:
+        """Descarta los trabajos terminados más viejos (con lock tomado)."""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:excess]:
+            del self._jobs[job_id]
+
+    def _finish(self, job: Job, status: str) -> None:
+        """Marca el fin del trabajo y corre su callback de cierre."""
+        job.status = status
+        job.finished_at = time.time()
+        if job.on_finish is not None:
+            try:
+                job.on_finish()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Error cerrando trabajo %s", job.id)
+        job.done_event.set()
+
+    def _run(self) -> None:
+        """Loop de un worker."""
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                # Cancelado mientras esperaba en cola
+                if job.finished:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                job.result = job.func(job)
+                status = SUCCEEDED
+            except JobCancelled:
+                status = CANCELLED
+            except Exception as e:  # pylint: disable=broad-except
+                logging.error("Trabajo %s falló: %s", job.id, e)
+                job.error = str(e)
+                status = FAILED
+            self._finish(job, status)
+
+    def submit(
+        self,
+        action: str,
+        pins: list[int],
+        func: Callable[[Job], Any],
+        job_id: Optional[str] = None,
+        on_finish: Optional[Callable[[], None]] = None,
+    ) -> Job:
+        """
+        Encola un trabajo.
+
+        ``func`` recibe el propio :class:`Job` para poder usar
+        :meth:`Job.sleep` y así responder a cancelaciones. Si ``func``
+        lanza excepción el trabajo queda ``failed`` con su mensaje.
+
+        :param action: Nombre de la acción.
+        :param pins: Pines involucrados.
+        :param func: Función a ejecutar.
+        :param job_id: Id a usar (por defecto se genera uno).
+        :param on_finish: Callback al terminar (siempre se llama).
+        :returns: Trabajo encolado.
+        :raises RuntimeError: Si la cola está llena.
+        """
+        job = Job(
+            id=job_id or new_job_id(),
+            action=action,
+            pins=list(pins),
+            func=func,
+            on_finish=on_finish,
+        )
+        with self._lock:
+            self._ensure_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full as e:
+                raise RuntimeError("Cola de trabajos llena.") from e
+            self._jobs[job.id] = job
+            self._trim()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Busca un trabajo por id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        """Trabajos conocidos, del más nuevo al más viejo."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Pide la cancelación de un trabajo.
+
+        Si aún estaba en cola se cancela al instante; si está corriendo
+        se corta en su próxima espera.
+
+        :param job_id: Id del trabajo.
+        :returns: El trabajo o ``None`` si no existe.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        with self._lock:
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+        return job
+
+
+# Cola compartida del proceso para acciones GPIO
+gpio_jobs: Final[JobQueue] = JobQueue()
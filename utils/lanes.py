@@ -0,0 +1,250 @@
+"""
+Carriles de prioridad para los requests.
+
+Cada request se clasifica en un carril con su propio límite de
+concurrencia y su cola acotada:
+
+- ``health``: ``/health``, ``/version`` y contadores; sin límite.
+- ``cheap``: lecturas de memoria (hardware, estado GPIO...).
+- ``expensive``: lecturas que lanzan subprocesos o leen disco
+  (system, network, journal, hashes...).
+- ``actions``: todo lo que modifica (POST/PATCH/DELETE).
+- ``long``: requests que retienen el thread (long-poll, SSE, ``/batch``,
+  ``/files/watch``).
+
+Con gunicorn ``gthread`` cada request ocupa un thread del worker; si
+los carriles pesados se llenan, sus requests esperan en su cola (o se
+rechazan con ``503``) en vez de tomar todos los threads. Límites y colas
+salen de ``ServerConfig.lanes``, que ``config`` valida para que dejen
+threads libres para ``health``.
+
+Los sub-requests de ``/batch`` no toman carril: el ``/batch`` externo ya
+ocupa uno de ``long`` y sus ítems corren en el pool propio del batch
+(acotado), así un batch no compite contra sí mismo por ``expensive``.
+
+El tiempo de espera en cola se mide por carril (``GET /lanes``).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Final, Optional
+
+from flask import Flask, Response, g, jsonify, request
+
+from config import LaneConfig
+from utils.utils import is_internal_request
+
+# Métodos de lectura; cualquier otro va al carril de acciones
+_SAFE_METHODS: Final[frozenset[str]] = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Endpoints que nunca esperan
+HEALTH_ENDPOINTS: Final[frozenset[str]] = frozenset({
+    "_health", "_version", "_ratelimit", "_lanes",
+})
+
+# Blueprints cuyas lecturas lanzan subprocesos o recorren disco
+# (nombres de ``Blueprint``, no prefijos de URL: ``/files`` son tres)
+EXPENSIVE_BLUEPRINTS: Final[frozenset[str]] = frozenset({
+    "guardian", "system", "network", "storage", "events", "logs",
+    "filesystem", "validations", "services", "binaries",
+})
+
+# Endpoints que retienen el thread siempre (long-poll o SSE)
+LONG_ENDPOINTS: Final[frozenset[str]] = frozenset({
+    "batch.run_batch", "gpio.gpio_events_stream", "filesystem.watch_path",
+})
+
+# Espera máxima en cola de cada carril (s)
+LANE_TIMEOUTS: Final[Dict[str, float]] = {
+    "cheap": 5.0,
+    "expensive": 15.0,
+    "actions": 15.0,
+    "long": 5.0,
+}
+
+# Muestras de espera que se guardan por carril
+_WAIT_SAMPLES: Final[int] = 256
+
+
+@dataclass
+class Lane:
+    """
+    Carril con concurrencia y cola acotadas.
+
+    :ivar name: Nombre del carril.
+    :ivar limit: Requests en ejecución a la vez (``None`` = sin límite).
+    :ivar queue: Requests que pueden esperar un lugar.
+    :ivar timeout: Segundos máximos de espera en cola.
+    """
+
+    name: str
+    limit: Optional[int]
+    queue: int = 0
+    timeout: float = 0.0
+    active: int = 0
+    waiting: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    waits_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=_WAIT_SAMPLES))
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    def acquire(self) -> Optional[float]:
+        """
+        Toma un lugar en el carril, esperando en cola si hace falta.
+
+        :returns: Milisegundos esperados, o ``None`` si la cola estaba
+            llena o se agotó el tiempo.
+        """
+        if self.limit is None:
+            with self._cond:
+                self.active += 1
+                self.admitted += 1
+            return 0.0
+
+        start = time.monotonic()
+        with self._cond:
+            if self.active >= self.limit:
+                if self.waiting >= self.queue:
+                    self.rejected += 1
+                    return None
+                self.waiting += 1
+                ok = self._cond.wait_for(
+                    lambda: self.active < self.limit,  # type: ignore[operator]
+                    timeout=self.timeout,
+                )
+                self.waiting -= 1
+                if not ok:
+                    self.rejected += 1
+                    return None
+            self.active += 1
+            self.admitted += 1
+            waited = (time.monotonic() - start) * 1000
+            self.waits_ms.append(waited)
+            return waited
+
+    def release(self) -> None:
+        """Libera el lugar tomado con ``acquire``."""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado y tiempos de espera del carril."""
+        with self._cond:
+            waits = sorted(self.waits_ms)
+            return {
+                "limit": self.limit,
+                "queue": self.queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                    "p95": round(waits[int(len(waits) * 0.95) - 1], 2) if waits else 0.0,
+                    "max": round(waits[-1], 2) if waits else 0.0,
+                },
+            }
+
+
+def classify() -> Optional[str]:
+    """
+    Carril del request actual.
+
+    :returns: Nombre del carril o ``None`` si no se pudo enrutar
+        (404/405: se contesta sin trabajo).
+    """
+    endpoint = request.endpoint
+    if endpoint is None:
+        return None
+    if endpoint in HEALTH_ENDPOINTS:
+        return "health"
+    if (
+        endpoint in LONG_ENDPOINTS
+        or (endpoint == "gpio.gpio_events" and request.args.get("wait", "0") not in ("", "0"))
+        or (endpoint == "logs.tail_log" and request.args.get("follow", "0").lower() in ("1", "true"))
+    ):
+        return "long"
+    if request.method not in _SAFE_METHODS:
+        return "actions"
+    if request.blueprint in EXPENSIVE_BLUEPRINTS:
+        return "expensive"
+    return "cheap"
+
+
+class LaneScheduler:
+    """Carriles del proceso y hooks de Flask que los aplican."""
+
+    def __init__(self, limits: Dict[str, LaneConfig]) -> None:
+        """
+        :param limits: Límite y cola de cada carril (``ServerConfig.lanes``).
+        """
+        self.lanes: Dict[str, Lane] = {"health": Lane("health", None)}
+        for name, cfg in limits.items():
+            self.lanes[name] = Lane(
+                name, limit=cfg.limit, queue=cfg.queue, timeout=LANE_TIMEOUTS[name]
+            )
+
+    def before(self) -> Optional[Response]:
+        """
+        Hook ``before_request``: espera lugar en el carril o ``503``.
+
+        :returns: Respuesta de rechazo o ``None`` para seguir.
+        """
+        if is_internal_request():
+            return None
+        name = classify()
+        if name is None:
+            return None
+        lane = self.lanes[name]
+        waited = lane.acquire()
+        if waited is None:
+            resp = jsonify({"error": f"Servidor ocupado (carril {name})", "lane": name})
+            resp.status_code = 503
+            resp.headers["Retry-After"] = "1"
+            return resp
+        g.lane = lane
+        g.lane_wait_ms = waited
+        return None
+
+    def after(self, resp: Response) -> Response:
+        """
+        Hook ``after_request``: los streams liberan el carril al cerrarse.
+        """
+        lane: Optional[Lane] = g.pop("lane", None)
+        if lane is None:
+            return resp
+        if resp.is_streamed:
+            resp.call_on_close(lane.release)
+        else:
+            lane.release()
+        resp.headers["X-Lane"] = lane.name
+        return resp
+
+    def teardown(self, _exc: Optional[BaseException]) -> None:
+        """Hook ``teardown_request``: libera si ``after`` no corrió."""
+        lane: Optional[Lane] = g.pop("lane", None)
+        if lane is not None:
+            lane.release()
+
+    @staticmethod
+    def check_blueprints(app: Flask) -> None:
+        """
+        Verifica que las clasificaciones nombren blueprints y endpoints
+        registrados (un typo dejaría rutas pesadas en ``cheap``).
+
+        :param app: Aplicación con todos los blueprints registrados.
+        :raises ValueError: Si algún nombre no existe en la app.
+        """
+        unknown = sorted(EXPENSIVE_BLUEPRINTS - set(app.blueprints))
+        unknown += sorted((LONG_ENDPOINTS | HEALTH_ENDPOINTS) - set(app.view_functions))
+        if unknown:
+            raise ValueError(f"Carriles con nombres inexistentes: {unknown}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado de todos los carriles."""
+        return {name: lane.stats() for name, lane in self.lanes.items()}
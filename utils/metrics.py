@@ -0,0 +1,355 @@
+"""
+Métricas del sistema compartidas entre procesos.
+
+Un proceso recolector lee ``/proc`` y ``/sys`` una vez por intervalo y
+escribe la última muestra en un segmento de memoria compartida de
+formato fijo. Los workers la leen directamente del segmento (sin copiar
+ni lanzar procesos), así el costo de recolección no crece con la
+cantidad de workers.
+
+El segmento usa un *seqlock*: el escritor pone la secuencia en impar,
+escribe y la pone en par; el lector reintenta si la vio impar o si
+cambió durante la lectura.
+
+Si no hay recolector (o su muestra está vieja) cada proceso muestrea
+por su cuenta con una cache corta.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import mmap
+import os
+import shutil
+import signal
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Final, Optional
+
+from utils.cache import TTLCache
+
+# Segmento compartido (tmpfs: nunca toca la SD)
+SHM_PATH: Final[Path] = Path(
+    os.getenv("METRICS_SHM_PATH", "/dev/shm/guardian_metrics")
+)
+
+# Intervalo de muestreo del recolector (s)
+SAMPLE_INTERVAL: Final[float] = 1.0
+
+# Una muestra más vieja que esto se considera muerta (s)
+STALE_AFTER: Final[float] = 5.0
+
+# Formato: magic, seq | muestra
+_MAGIC: Final[int] = 0x47554D32  # "GUM2"
+_HEADER: Final[struct.Struct] = struct.Struct("<IxxxxQ")
+# Enteros con signo: ``-1`` marca un valor desconocido
+_PAYLOAD: Final[struct.Struct] = struct.Struct("<7d5qi")
+_SIZE: Final[int] = _HEADER.size + _PAYLOAD.size
+
+# Reintentos de lectura del seqlock antes de rendirse
+_READ_RETRIES: Final[int] = 100
+
+_CPU_STAT: Final[str] = "/proc/stat"
+_MEMINFO: Final[str] = "/proc/meminfo"
+_UPTIME: Final[str] = "/proc/uptime"
+_TEMP0: Final[str] = "/sys/class/thermal/thermal_zone0/temp"
+_CPUFREQ_CUR: Final[str] = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"
+_CPUFREQ_MAX: Final[str] = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_max_freq"
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """
+    Muestra de métricas. Los valores desconocidos son ``-1``.
+
+    :ivar sampled_at: Epoch de la muestra.
+    :ivar cpu_usage: Uso de CPU (%) desde la muestra anterior.
+    :ivar cpu_freq_mhz: Frecuencia actual.
+    :ivar cpu_freq_max_mhz: Frecuencia máxima.
+    :ivar temp_c: Temperatura (°C).
+    :ivar uptime_s: Segundos desde el arranque.
+    :ivar load1: Carga promedio de 1 minuto.
+    :ivar ram_total: Bytes de RAM.
+    :ivar ram_available: Bytes de RAM disponibles.
+    :ivar disk_total: Bytes del filesystem raíz.
+    :ivar disk_used: Bytes usados.
+    :ivar disk_free: Bytes libres.
+    :ivar cpu_cores: Núcleos.
+    """
+
+    sampled_at: float
+    cpu_usage: float
+    cpu_freq_mhz: float
+    cpu_freq_max_mhz: float
+    temp_c: float
+    uptime_s: float
+    load1: float
+    ram_total: int
+    ram_available: int
+    disk_total: int
+    disk_used: int
+    disk_free: int
+    cpu_cores: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa a dict apto para JSON."""
+        return dict(self.__dict__)
+
+
+# region muestreo
+def _read_int(path: str, scale: float = 1.0) -> float:
+    """Lee un entero de ``/sys``; ``-1`` si no existe."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return int(fh.read().strip()) / scale
+    except (OSError, ValueError):
+        return -1.0
+
+
+def _cpu_times() -> tuple[int, int]:
+    """``(idle, total)`` acumulados de ``/proc/stat``."""
+    with open(_CPU_STAT, encoding="utf-8") as fh:
+        vals = [int(v) for v in fh.readline().split()[1:]]
+    return vals[3] + vals[4], sum(vals)
+
+
+def _meminfo() -> tuple[int, int]:
+    """``(total, disponible)`` en bytes."""
+    total = avail = -1
+    with open(_MEMINFO, encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith("MemTotal:"):
+                total = int(line.split()[1]) * 1024
+            elif line.startswith("MemAvailable:"):
+                avail = int(line.split()[1]) * 1024
+                break
+    return total, avail
+
+
+class Sampler:
+    """Toma muestras; el uso de CPU se calcula contra la anterior."""
+
+    def __init__(self) -> None:
+        self._prev_cpu: Optional[tuple[int, int]] = None
+
+    def sample(self) -> MetricsSnapshot:
+        """Lee todas las métricas (sin subprocesos)."""
+        cpu = _cpu_times()
+        if self._prev_cpu is None:
+            # Primera muestra: una ventana corta para tener un delta
+            time.sleep(0.1)
+            self._prev_cpu, cpu = cpu, _cpu_times()
+        didle = cpu[0] - self._prev_cpu[0]
+        dtotal = cpu[1] - self._prev_cpu[1]
+        self._prev_cpu = cpu
+        usage = 0.0 if dtotal <= 0 else (1.0 - didle / dtotal) * 100.0
+
+        ram_total, ram_avail = _meminfo()
+        disk = shutil.disk_usage("/")
+        try:
+            with open(_UPTIME, encoding="utf-8") as fh:
+                uptime = float(fh.read().split()[0])
+        except (OSError, ValueError):
+            uptime = -1.0
+
+        return MetricsSnapshot(
+            sampled_at=time.time(),
+            cpu_usage=usage,
+            cpu_freq_mhz=_read_int(_CPUFREQ_CUR, 1000.0),
+            cpu_freq_max_mhz=_read_int(_CPUFREQ_MAX, 1000.0),
+            temp_c=_read_int(_TEMP0, 1000.0),
+            uptime_s=uptime,
+            load1=os.getloadavg()[0],
+            ram_total=ram_total,
+            ram_available=ram_avail,
+            disk_total=disk.total,
+            disk_used=disk.used,
+            disk_free=disk.free,
+            cpu_cores=os.cpu_count() or 1,
+        )
+# endregion
+
+
+# region memoria compartida
+class SharedMetrics:
+    """Segmento de memoria compartida (``mmap`` de ``SHM_PATH``)."""
+
+    def __init__(self, mm: mmap.mmap) -> None:
+        self._mm = mm
+
+    @classmethod
+    def create(cls, path: Path = SHM_PATH) -> "SharedMetrics":
+        """
+        Crea (o reinicia) el segmento; lo usa el proceso maestro.
+
+        El archivo anterior se borra y se crea uno nuevo en vez de
+        truncarlo: si un maestro murió con ``SIGKILL`` su recolector
+        puede seguir escribiendo en el mapeo viejo hasta notarlo.
+        """
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        fd = os.open(
+            path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600
+        )
+        try:
+            os.ftruncate(fd, _SIZE)
+            mm = mmap.mmap(fd, _SIZE)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(mm, 0, _MAGIC, 0)
+        return cls(mm)
+
+    @classmethod
+    def attach(cls, path: Path = SHM_PATH) -> Optional["SharedMetrics"]:
+        """Se conecta (solo lectura) al segmento; ``None`` si no hay."""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            if os.fstat(fd).st_size < _SIZE:
+                return None
+            mm = mmap.mmap(fd, _SIZE, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        if _HEADER.unpack_from(mm, 0)[0] != _MAGIC:
+            mm.close()
+            return None
+        return cls(mm)
+
+    def write(self, snap: MetricsSnapshot) -> None:
+        """Publica una muestra (un solo escritor)."""
+        # Se empaqueta antes de marcar: un error no deja el seq impar
+        payload = _PAYLOAD.pack(*snap.__dict__.values())
+        _, seq = _HEADER.unpack_from(self._mm, 0)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, seq + 1)  # impar: escribiendo
+        self._mm[_HEADER.size:_SIZE] = payload
+        _HEADER.pack_into(self._mm, 0, _MAGIC, seq + 2)  # par: estable
+
+    def read(self) -> Optional[MetricsSnapshot]:
+        """
+        Lee la última muestra sin bloquear al escritor.
+
+        :returns: Muestra o ``None`` si aún no hay o no se pudo leer
+            una versión estable.
+        """
+        for _ in range(_READ_RETRIES):
+            _, seq1 = _HEADER.unpack_from(self._mm, 0)
+            if seq1 & 1:
+                continue
+            values = _PAYLOAD.unpack_from(self._mm, _HEADER.size)
+            _, seq2 = _HEADER.unpack_from(self._mm, 0)
+            if seq1 == seq2:
+                return MetricsSnapshot(*values) if seq1 else None
+        return None
+
+    def close(self) -> None:
+        """Libera el mapeo."""
+        self._mm.close()
+# endregion
+
+
+# region recolector
+def _collector_loop(shm: SharedMetrics, interval: float, owner: int) -> None:
+    """
+    Loop del proceso recolector.
+
+    Termina con ``SIGTERM`` o cuando el maestro ya no es su padre (murió
+    sin pasar por ``atexit``).
+
+    :param shm: Segmento donde publicar.
+    :param interval: Segundos entre muestras.
+    :param owner: PID del maestro.
+    """
+    running = True
+
+    def _stop(*_: Any) -> None:
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sampler = Sampler()
+    while running and os.getppid() == owner:
+        start = time.monotonic()
+        try:
+            shm.write(sampler.sample())
+        except (OSError, struct.error) as e:
+            logging.warning("Recolector de métricas: %s", e)
+        time.sleep(max(interval - (time.monotonic() - start), 0.0))
+
+
+def _stop_collector(owner: int, pid: int, path: Path) -> None:
+    """``atexit`` del maestro: detiene al recolector y borra el segmento."""
+    # Los workers heredan el atexit con el fork; solo actúa el maestro
+    if os.getpid() != owner:
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def start_collector(interval: float = SAMPLE_INTERVAL, path: Path = SHM_PATH) -> int:
+    """
+    Crea el segmento y lanza el proceso recolector con ``fork``.
+
+    Debe llamarse en el proceso maestro antes de crear los workers y
+    de levantar threads. Se detiene solo al salir el maestro.
+
+    :param interval: Segundos entre muestras.
+    :param path: Archivo del segmento.
+    :returns: PID del recolector.
+    """
+    shm = SharedMetrics.create(path)
+    owner = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _collector_loop(shm, interval, owner)
+        except BaseException:  # pylint: disable=broad-except
+            logging.exception("Recolector de métricas terminó con error")
+            code = 1
+        finally:
+            os._exit(code)  # pylint: disable=protected-access
+    shm.close()
+    atexit.register(_stop_collector, owner, pid, path)
+    logging.info("Recolector de métricas pid=%s (%s)", pid, path)
+    return pid
+# endregion
+
+
+# Lectura desde los workers
+_shared: Optional[SharedMetrics] = None
+_local_sampler: Final[Sampler] = Sampler()
+_LOCAL_CACHE: Final[TTLCache[str, MetricsSnapshot]] = TTLCache(
+    maxsize=1, ttl=SAMPLE_INTERVAL
+)
+
+
+def current() -> MetricsSnapshot:
+    """
+    Última muestra disponible.
+
+    Usa la memoria compartida si el recolector está vivo; si no,
+    muestrea en este proceso (cacheado ``SAMPLE_INTERVAL``).
+    """
+    global _shared  # pylint: disable=global-statement
+    if _shared is None:
+        _shared = SharedMetrics.attach()
+    if _shared is not None:
+        snap = _shared.read()
+        if snap is not None and time.time() - snap.sampled_at < STALE_AFTER:
+            return snap
+    return _LOCAL_CACHE.get_or_set("local", _local_sampler.sample)
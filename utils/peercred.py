@@ -0,0 +1,74 @@
+"""
+Credenciales del proceso cliente en conexiones por socket Unix.
+
+``PeerCredMiddleware`` consulta ``SO_PEERCRED`` sobre el socket de la
+conexión (gunicorn o el servidor de desarrollo lo exponen en el
+environ) y deja ``pid``, ``uid`` y ``gid`` del cliente en
+``environ[PEER_UID]`` etc. Por TCP no agrega nada.
+
+Las llaves del environ no pueden venir del cliente (los headers llegan
+como ``HTTP_*``), así que el guard de autenticación puede confiar en
+ellas.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+from typing import Any, Callable, Dict, Final, Iterable, Optional
+
+from flask import request
+
+# Llaves que se agregan al environ
+PEER_PID: Final[str] = "guardian.peer_pid"
+PEER_UID: Final[str] = "guardian.peer_uid"
+PEER_GID: Final[str] = "guardian.peer_gid"
+
+# Dónde deja cada servidor el socket de la conexión
+_SOCKET_KEYS: Final[tuple[str, ...]] = ("gunicorn.socket", "werkzeug.socket")
+
+# struct ucred de Linux: pid, uid, gid
+_UCRED: Final[struct.Struct] = struct.Struct("3i")
+
+
+def peer_credentials(sock: Any) -> Optional[tuple[int, int, int]]:
+    """
+    ``(pid, uid, gid)`` del otro extremo de un socket Unix.
+
+    :param sock: Socket de la conexión.
+    :returns: Credenciales o ``None`` si no es un socket Unix.
+    """
+    if not isinstance(sock, socket.socket) or sock.family != socket.AF_UNIX:
+        return None
+    try:
+        raw = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _UCRED.size)
+    except OSError:
+        return None
+    return _UCRED.unpack(raw)
+
+
+class PeerCredMiddleware:
+    """Middleware WSGI que agrega las credenciales del cliente local."""
+
+    def __init__(self, app: Callable[..., Iterable[bytes]]) -> None:
+        """
+        :param app: Aplicación WSGI envuelta (``app.wsgi_app``).
+        """
+        self.app = app
+
+    def __call__(
+        self,
+        environ: Dict[str, Any],
+        start_response: Callable[..., Any],
+    ) -> Iterable[bytes]:
+        for key in _SOCKET_KEYS:
+            creds = peer_credentials(environ.get(key))
+            if creds is not None:
+                environ[PEER_PID], environ[PEER_UID], environ[PEER_GID] = creds
+                break
+        return self.app(environ, start_response)
+
+
+def peer_uid() -> Optional[int]:
+    """Uid del cliente del request actual (``None`` si no es local)."""
+    return request.environ.get(PEER_UID)
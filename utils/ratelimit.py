@@ -0,0 +1,305 @@
+"""
+Admisión de requests con *token buckets*.
+
+Cada cliente (IP, o uid si llega por el socket Unix) tiene un bucket
+global y uno por ruta; un request descuenta su costo de ambos: las
+rutas que lanzan subprocesos o tocan GPIO cuestan más que una lectura
+de memoria. Si alguno no alcanza se rechaza con ``429`` y
+``Retry-After`` antes de autenticar ni ejecutar nada, así un poller mal
+configurado no se come la CPU de la Pi.
+
+Cada ruta tiene además un bucket compartido por todos los clientes
+(muchas IPs no pueden saturar una ruta cara). Ese se cobra recién
+después de autenticar (:meth:`RateLimiter.check_route`): si no, tráfico
+sin token podría vaciarlo y dejar afuera a los clientes válidos.
+
+Los buckets viven en memoria de cada worker: con N workers de gunicorn
+el límite efectivo es hasta N veces el configurado (``GET /ratelimit``
+informa los contadores del worker que atendió).
+
+Los sub-requests de ``/batch`` se cobran uno por uno al mismo cliente.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Final, Optional
+
+from flask import Flask, Response, jsonify, request
+
+from config import RateLimitConfig
+from utils.cache import TTLCache
+from utils.peercred import peer_uid
+
+# Costo por blueprint (subprocesos/GPIO pesan más); el resto cuesta 1.
+# Son nombres de ``Blueprint``, no prefijos de URL
+BLUEPRINT_COSTS: Final[Dict[str, float]] = {
+    "guardian": 4.0,
+    "system": 3.0,
+    "network": 3.0,
+    "storage": 3.0,
+    "services": 3.0,
+    "binaries": 3.0,
+    "filesystem": 2.0,
+    "validations": 2.0,
+    "files_upload": 2.0,
+    "logs": 2.0,
+    "gpiocontrol": 4.0,
+    "power": 4.0,
+}
+
+# Costo por endpoint (tiene prioridad sobre el del blueprint)
+ENDPOINT_COSTS: Final[Dict[str, float]] = {
+    "batch.run_batch": 1.0,
+    "gpio.gpio_status": 1.0,
+}
+
+# Endpoints que nunca se limitan (monitoreo)
+EXEMPT_ENDPOINTS: Final[frozenset[str]] = frozenset({"_health"})
+
+# Buckets recordados (LRU: los clientes inactivos se descartan)
+_MAX_BUCKETS: Final[int] = 2048
+
+# Cliente de los buckets compartidos por ruta
+_ALL_CLIENTS: Final[str] = "*"
+
+# Clientes con más rechazos que se informan
+_TOP_CLIENTS: Final[int] = 10
+
+
+@dataclass
+class TokenBucket:
+    """
+    Bucket de tokens con recarga continua.
+
+    :ivar rate: Tokens por segundo.
+    :ivar burst: Capacidad máxima.
+    """
+
+    rate: float
+    burst: float
+    tokens: float = field(init=False)
+    stamp: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.burst
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """
+        Segundos hasta poder pagar ``cost`` (0 si alcanza ya).
+
+        Un costo mayor que ``burst`` se admite con el bucket lleno y
+        queda como deuda.
+        """
+        self._refill(now)
+        need = min(cost, self.burst)
+        if self.tokens >= need:
+            return 0.0
+        return (need - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        """Descuenta ``cost`` (ya verificado con ``wait_time``)."""
+        self.tokens -= cost
+
+
+class RateLimiter:
+    """
+    Buckets por cliente y por ruta, con contadores de rechazos.
+
+    El estado es del proceso: cada worker tiene su propio limitador.
+    """
+
+    def __init__(self, cfg: RateLimitConfig) -> None:
+        """
+        :param cfg: Tasas y ráfagas configuradas.
+        """
+        self.cfg = cfg
+        self._lock = threading.Lock()
+        self._buckets: TTLCache[tuple[str, str], TokenBucket] = TTLCache(
+            maxsize=_MAX_BUCKETS
+        )
+        self._admitted = 0
+        self._rejected = 0
+        self._by_client: Counter[str] = Counter()
+        self._by_endpoint: Counter[str] = Counter()
+
+    @staticmethod
+    def client_id() -> str:
+        """Identidad del cliente del request actual."""
+        uid = peer_uid()
+        if uid is not None:
+            return f"uid:{uid}"
+        return request.remote_addr or "unknown"
+
+    @staticmethod
+    def cost(endpoint: str, blueprint: Optional[str]) -> float:
+        """Costo de un endpoint en tokens."""
+        if endpoint in ENDPOINT_COSTS:
+            return ENDPOINT_COSTS[endpoint]
+        return BLUEPRINT_COSTS.get(blueprint or "", 1.0)
+
+    @staticmethod
+    def check_blueprints(app: Flask) -> None:
+        """
+        Verifica que los costos nombren blueprints y endpoints
+        registrados (un typo dejaría una ruta cara costando 1).
+
+        :param app: Aplicación con todos los blueprints registrados.
+        :raises ValueError: Si algún nombre no existe en la app.
+        """
+        unknown = sorted(set(BLUEPRINT_COSTS) - set(app.blueprints))
+        unknown += sorted(
+            (set(ENDPOINT_COSTS) | EXEMPT_ENDPOINTS) - set(app.view_functions)
+        )
+        if unknown:
+            raise ValueError(f"Costos con nombres inexistentes: {unknown}")
+
+    def _bucket(self, key: tuple[str, str], rate: float, burst: float) -> TokenBucket:
+        return self._buckets.setdefault(key, TokenBucket(rate, burst))
+
+    def _pay(
+        self,
+        buckets: tuple[TokenBucket, ...],
+        client: str,
+        endpoint: str,
+        cost: float,
+    ) -> float:
+        """
+        Cobra ``cost`` de todos los buckets o de ninguno (con lock tomado).
+
+        :returns: ``0`` si se admite; si no, segundos a esperar.
+        """
+        now = time.monotonic()
+        wait = max(b.wait_time(cost, now) for b in buckets)
+        if wait > 0:
+            self._rejected += 1
+            if client in self._by_client or len(self._by_client) < _MAX_BUCKETS:
+                self._by_client[client] += 1
+            self._by_endpoint[endpoint] += 1
+            return wait
+        for bucket in buckets:
+            bucket.take(cost)
+        return 0.0
+
+    def admit(self, client: str, endpoint: str, cost: float) -> float:
+        """
+        Intenta admitir un request en los buckets del cliente.
+
+        :param client: Identidad del cliente.
+        :param endpoint: Endpoint de Flask.
+        :param cost: Tokens a descontar.
+        :returns: ``0`` si se admite; si no, segundos a esperar.
+        """
+        with self._lock:
+            per_client = self._bucket(("", client), self.cfg.rate, self.cfg.burst)
+            per_route = self._bucket(
+                (endpoint, client), self.cfg.route_rate, self.cfg.route_burst
+            )
+            return self._pay((per_client, per_route), client, endpoint, cost)
+
+    def admit_route(self, client: str, endpoint: str, cost: float) -> float:
+        """
+        Cobra el bucket de la ruta compartido por todos los clientes.
+
+        Solo para requests ya autenticados.
+
+        :param client: Identidad del cliente (para los contadores).
+        :param endpoint: Endpoint de Flask.
+        :param cost: Tokens a descontar.
+        :returns: ``0`` si se admite; si no, segundos a esperar.
+        """
+        with self._lock:
+            route_total = self._bucket(
+                (endpoint, _ALL_CLIENTS),
+                self.cfg.global_route_rate,
+                self.cfg.global_route_burst,
+            )
+            wait = self._pay((route_total,), client, endpoint, cost)
+            # Admitido = pasó los dos hooks (y la autenticación)
+            if wait <= 0:
+                self._admitted += 1
+            return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores de admisión del proceso.
+
+        ``scope`` y ``pid`` indican que los buckets y contadores son del
+        worker que atiende (no suman los demás workers).
+        """
+        with self._lock:
+            return {
+                "scope": "worker",
+                "pid": os.getpid(),
+                "enabled": self.cfg.enabled,
+                "rate": self.cfg.rate,
+                "burst": self.cfg.burst,
+                "route_rate": self.cfg.route_rate,
+                "route_burst": self.cfg.route_burst,
+                "global_route_rate": self.cfg.global_route_rate,
+                "global_route_burst": self.cfg.global_route_burst,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "rejected_by_client": dict(self._by_client.most_common(_TOP_CLIENTS)),
+                "rejected_by_endpoint": dict(self._by_endpoint),
+            }
+
+    def _applies(self) -> bool:
+        """Si el request actual se limita."""
+        endpoint = request.endpoint
+        return (
+            self.cfg.enabled
+            and endpoint is not None
+            and endpoint not in EXEMPT_ENDPOINTS
+        )
+
+    @staticmethod
+    def _too_many(wait: float) -> Response:
+        """Respuesta ``429`` con ``Retry-After``."""
+        retry_after = max(1, math.ceil(wait))
+        resp = jsonify({
+            "error": "Demasiados requests",
+            "retry_after": retry_after,
+        })
+        resp.status_code = 429
+        resp.headers["Retry-After"] = str(retry_after)
+        return resp
+
+    def check(self) -> Optional[Response]:
+        """
+        Hook ``before_request`` (antes de autenticar): ``429`` si el
+        cliente excede su cuota.
+
+        :returns: Respuesta de rechazo o ``None`` para seguir.
+        """
+        if not self._applies():
+            return None
+        endpoint: str = request.endpoint  # type: ignore[assignment]
+        wait = self.admit(
+            self.client_id(), endpoint, self.cost(endpoint, request.blueprint)
+        )
+        return self._too_many(wait) if wait > 0 else None
+
+    def check_route(self) -> Optional[Response]:
+        """
+        Hook ``before_request`` (después de autenticar): ``429`` si la
+        ruta excede su cuota compartida.
+
+        :returns: Respuesta de rechazo o ``None`` para seguir.
+        """
+        if not self._applies():
+            return None
+        endpoint: str = request.endpoint  # type: ignore[assignment]
+        wait = self.admit_route(
+            self.client_id(), endpoint, self.cost(endpoint, request.blueprint)
+        )
+        return self._too_many(wait) if wait > 0 else None
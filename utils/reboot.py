@@ -0,0 +1,236 @@
+"""
+Reinicio diferido del equipo con *flush* previo.
+
+El request de reinicio responde de inmediato; pasado el retardo pedido
+se ejecutan los *flush hooks* registrados (logs, planificaciones, caches
+a disco) con un presupuesto de tiempo total y luego se prueban los
+comandos de reinicio en orden.
+
+Cada etapa se escribe (con ``fsync``) en ``REBOOT_STATE_PATH``: después
+del arranque ``/power/last_reboot`` informa cómo terminó el último
+pedido y si el equipo efectivamente reinició.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, List, Optional
+
+from utils.utils import run_cmd_raiser
+
+# Presupuesto total para los flush hooks (s)
+FLUSH_BUDGET: Final[float] = 5.0
+
+# Timeout de cada comando de reinicio (s)
+COMMAND_TIMEOUT: Final[float] = 5.0
+
+# Hooks registrados: (nombre, función)
+_FLUSH_HOOKS: List[tuple[str, Callable[[], None]]] = []
+_HOOKS_LOCK = threading.Lock()
+
+
+def register_flush_hook(name: str, hook: Callable[[], None]) -> None:
+    """
+    Registra una función a ejecutar antes de reiniciar.
+
+    Debe ser rápida e idempotente; si no termina dentro del presupuesto
+    se informa como ``timeout`` y el reinicio sigue igual.
+
+    :param name: Nombre para el reporte.
+    :param hook: Función sin argumentos.
+    """
+    with _HOOKS_LOCK:
+        _FLUSH_HOOKS.append((name, hook))
+
+
+def run_flush_hooks(budget: float = FLUSH_BUDGET) -> List[Dict[str, Any]]:
+    """
+    Ejecuta los hooks en paralelo con un presupuesto de tiempo total.
+
+    :param budget: Segundos máximos para todos los hooks.
+    :returns: ``[{"name", "status", "elapsed_ms", "error"?}]``.
+    """
+    with _HOOKS_LOCK:
+        hooks = list(_FLUSH_HOOKS)
+    if not hooks:
+        return []
+
+    def _timed(hook: Callable[[], None]) -> float:
+        start = time.monotonic()
+        hook()
+        return (time.monotonic() - start) * 1000
+
+    pool = ThreadPoolExecutor(max_workers=len(hooks), thread_name_prefix="flush")
+    futures = [(name, pool.submit(_timed, hook)) for name, hook in hooks]
+    wait([f for _, f in futures], timeout=budget)
+    # No se espera a los que se colgaron
+    pool.shutdown(wait=False)
+
+    report: List[Dict[str, Any]] = []
+    for name, future in futures:
+        item: Dict[str, Any] = {"name": name}
+        if not future.done():
+            item["status"] = "timeout"
+        elif future.exception() is not None:
+            item["status"] = "error"
+            item["error"] = str(future.exception())
+        else:
+            item["status"] = "ok"
+            item["elapsed_ms"] = round(future.result(), 1)
+        report.append(item)
+    return report
+
+
+def boot_time() -> Optional[float]:
+    """Epoch del último arranque (``btime`` de ``/proc/stat``)."""
+    try:
+        with open("/proc/stat", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("btime "):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class RebootManager:
+    """Reinicio diferido y registro de su resultado."""
+
+    def __init__(self, state_path: Path, commands: List[str]) -> None:
+        """
+        :param state_path: Archivo donde se registra el último reinicio.
+        :param commands: Comandos a probar, en orden.
+        """
+        self.state_path: Path = state_path
+        self.commands: List[str] = commands
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._record: Optional[Dict[str, Any]] = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Guarda el registro de forma atómica y durable."""
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_name(f".{self.state_path.name}.tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(record, fh, indent=2)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logging.error("No se pudo guardar %s: %s", self.state_path, e)
+
+    def pending(self) -> Optional[Dict[str, Any]]:
+        """Reinicio programado y aún no ejecutado (o ``None``)."""
+        with self._lock:
+            return dict(self._record) if self._timer is not None else None
+
+    def schedule(self, delay: float, source: str = "") -> tuple[Dict[str, Any], bool]:
+        """
+        Programa el reinicio dentro de ``delay`` segundos.
+
+        :param delay: Retardo antes de empezar el flush.
+        :param source: Quién lo pidió (para el registro).
+        :returns: ``(registro, nuevo)``; ``nuevo`` es ``False`` si ya
+            había uno programado (se devuelve ese).
+        """
+        with self._lock:
+            if self._timer is not None and self._record is not None:
+                return dict(self._record), False
+            now = time.time()
+            self._record = {
+                "status": "scheduled",
+                "requested_at": now,
+                "reboot_at": now + delay,
+                "delay": delay,
+                "source": source,
+            }
+            self._timer = threading.Timer(delay, self._execute)
+            self._timer.daemon = True
+            self._timer.start()
+            self._write(self._record)
+            return dict(self._record), True
+
+    def cancel(self) -> bool:
+        """
+        Cancela el reinicio programado si todavía no empezó.
+
+        :returns: ``True`` si había uno y se canceló.
+        """
+        with self._lock:
+            if self._timer is None or self._record is None:
+                return False
+            self._timer.cancel()
+            self._timer = None
+            self._record["status"] = "cancelled"
+            self._record["cancelled_at"] = time.time()
+            self._write(self._record)
+            return True
+
+    def _execute(self) -> None:
+        """Flush + comandos de reinicio (corre en el thread del timer)."""
+        with self._lock:
+            if self._timer is None or self._record is None:
+                return
+            self._timer = None
+            record = self._record
+
+        record["status"] = "flushing"
+        record["flush"] = run_flush_hooks()
+        # Baja a disco todo lo escrito (incluido lo de los hooks)
+        os.sync()
+        record["attempts"] = []
+        record["status"] = "executing"
+        record["executed_at"] = time.time()
+        # Se guarda antes de los comandos: si el reinicio funciona,
+        # el proceso muere sin volver a escribir
+        self._write(record)
+
+        for command in self.commands:
+            try:
+                run_cmd_raiser(command, timeout=COMMAND_TIMEOUT)
+            except Exception as e:  # pylint: disable=broad-except
+                record["attempts"].append({"command": command, "error": str(e)})
+                logging.warning("Reinicio con %r falló: %s", command, e)
+                continue
+            record["attempts"].append({"command": command, "error": None})
+            record["status"] = "command_ok"
+            record["command"] = command
+            self._write(record)
+            logging.info("Reinicio en curso (%s)", command)
+            return
+
+        record["status"] = "failed"
+        self._write(record)
+        logging.error("Todos los métodos de reinicio fallaron.")
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """
+        Último reinicio registrado y si el equipo efectivamente reinició.
+
+        :returns: Registro + ``boot_time`` y ``rebooted``, o ``None``.
+        """
+        try:
+            record = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        booted = boot_time()
+        executed = record.get("executed_at")
+        record["boot_time"] = booted
+        record["rebooted"] = bool(booted and executed and booted > executed)
+        return record
+
+
+def _flush_logging() -> None:
+    """Vacía los buffers de todos los handlers de logging."""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+
+register_flush_hook("logging", _flush_logging)
@@ -0,0 +1,467 @@
+"""
+Planificador de acciones GPIO recurrentes.
+
+Las planificaciones usan expresiones tipo cron (``min hora día mes
+día_semana``, hora local) y se guardan en un JSON chico
+(``SCHEDULES_PATH``). Un único thread duerme hasta el próximo
+vencimiento (heap ordenado por instante) y encola la acción en
+``gpio_jobs``: no hay un thread por planificación ni polling por minuto.
+
+Si hay varios procesos de la API, solo el que toma el lock del archivo
+ejecuta las planificaciones; los demás solo editan el archivo y el
+ejecutor lo relee cuando cambia. Toda escritura (de cualquier proceso)
+relee el archivo bajo un lock ``fcntl`` antes de guardar, así ninguna
+pisa cambios hechos en otro worker.
+
+Las ejecuciones perdidas mientras la API estaba caída no se recuperan:
+al arrancar se calcula la próxima a partir de ahora.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, Iterator, List, Optional
+
+from utils.jobs import Job
+
+# Máximo de planificaciones guardadas
+MAX_SCHEDULES: Final[int] = 128
+
+# Cada cuánto se revisa si el archivo cambió (otro proceso lo editó)
+_RELOAD_EVERY: Final[float] = 30.0
+
+# Bytes del archivo de lock: el ejecutor retiene uno y las escrituras
+# se serializan con el otro
+_LEADER_BYTE: Final[int] = 0
+_WRITE_BYTE: Final[int] = 1
+
+# Alias aceptados
+_ALIASES: Final[Dict[str, str]] = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# (mínimo, máximo) de cada campo cron
+_CRON_FIELDS: Final[tuple[tuple[int, int], ...]] = (
+    (0, 59), (0, 23), (1, 31), (1, 12), (0, 6),
+)
+
+
+# region cron
+class CronExpr:
+    """
+    Expresión cron de 5 campos.
+
+    Soporta ``*``, listas (``1,15``), rangos (``1-5``), pasos
+    (``*/10``, ``0-30/5``) y los alias ``@daily``, ``@hourly``...
+    El día de la semana acepta 0-7 (0 y 7 = domingo). Si día del mes y
+    día de la semana están restringidos, vale cualquiera de los dos
+    (como en cron).
+    """
+
+    def __init__(self, expr: str) -> None:
+        """
+        :param expr: Expresión cron.
+        :raises ValueError: Si la expresión es inválida.
+        """
+        self.expr: str = expr.strip()
+        parts = _ALIASES.get(self.expr.lower(), self.expr).split()
+        if len(parts) != 5:
+            raise ValueError("La expresión cron debe tener 5 campos")
+
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(raw, lo, hi if i != 4 else 7)
+            for i, (raw, (lo, hi)) in enumerate(zip(parts, _CRON_FIELDS))
+        )
+        # 7 también es domingo
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self._any_day: bool = parts[2] == "*"
+        self._any_weekday: bool = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(raw: str, lo: int, hi: int) -> frozenset[int]:
+        """Expande un campo a su conjunto de valores."""
+        values: set[int] = set()
+        for item in raw.split(","):
+            base, _, step_raw = item.partition("/")
+            try:
+                step = int(step_raw) if step_raw else 1
+                if base == "*":
+                    start, end = lo, hi
+                elif "-" in base:
+                    a, b = base.split("-", 1)
+                    start, end = int(a), int(b)
+                else:
+                    start = int(base)
+                    end = hi if step_raw else start
+            except ValueError as e:
+                raise ValueError(f"Campo cron inválido: {raw!r}") from e
+            if step < 1 or not lo <= start <= end <= hi:
+                raise ValueError(f"Campo cron fuera de rango: {raw!r}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, dt: datetime) -> bool:
+        """Aplica la regla de cron para día del mes / de la semana."""
+        day_ok = dt.day in self.days
+        # datetime: lunes=0; cron: domingo=0
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """
+        Próximo instante (al minuto) estrictamente posterior a ``after``.
+
+        Avanza por campos (mes, día, hora, minuto) en vez de minuto a
+        minuto, así el peor caso son unas pocas miles de iteraciones.
+
+        :param after: Instante de referencia (hora local, naive).
+        :raises ValueError: Si la expresión nunca se cumple (ej: 31/2).
+        """
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                year = dt.year + (dt.month == 12)
+                month = dt.month % 12 + 1
+                dt = datetime(year, month, 1)
+                continue
+            if not self._day_matches(dt):
+                dt = datetime(dt.year, dt.month, dt.day) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+        raise ValueError(f"La expresión {self.expr!r} nunca se cumple")
+# endregion
+
+
+@dataclass
+class Schedule:
+    """
+    Planificación guardada.
+
+    :ivar id: Identificador.
+    :ivar name: Nombre descriptivo.
+    :ivar cron: Expresión cron.
+    :ivar action: ``on``, ``off``, ``reboot``, ``test`` o ``sequence``.
+    :ivar pins: Pines (acciones simples).
+    :ivar steps: Pasos crudos (``sequence``).
+    :ivar enabled: Si se ejecuta.
+    :ivar last_run: Epoch de la última ejecución.
+    :ivar last_status: Resultado de la última ejecución.
+    :ivar last_job: Id del último trabajo encolado.
+    :ivar run_count: Ejecuciones realizadas.
+    """
+
+    id: str
+    name: str
+    cron: str
+    action: str
+    pins: List[int] = field(default_factory=list)
+    steps: Optional[List[Dict[str, Any]]] = None
+    enabled: bool = True
+    created_at: float = field(default_factory=time.time)
+    last_run: Optional[float] = None
+    last_status: Optional[str] = None
+    last_job: Optional[str] = None
+    run_count: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Schedule":
+        """Crea desde un dict (ignora claves desconocidas)."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+# Función que encola una planificación: recibe la planificación y
+# devuelve el trabajo creado
+Dispatcher = Callable[[Schedule], Job]
+
+
+class Scheduler:
+    """Planificaciones persistidas con un thread temporizador."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        :param path: Archivo JSON de planificaciones.
+        """
+        self.path: Path = path
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._schedules: Dict[str, Schedule] = {}
+        self._next: Dict[str, float] = {}
+        self._heap: List[tuple[float, str]] = []
+        self._stamp: Optional[tuple[int, int]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock_fd: Optional[int] = None
+
+    # region persistencia
+    def _file_stamp(self) -> Optional[tuple[int, int]]:
+        # El inode cambia en cada guardado (rename): detecta escrituras
+        # de otro proceso dentro de la resolución del mtime
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def _open_lock(self) -> int:
+        """
+        Abre (una sola vez) el archivo de lock.
+
+        Se mantiene abierto toda la vida del proceso: cerrar cualquier
+        descriptor del archivo soltaría todos los locks ``fcntl``.
+        """
+        if self._lock_fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_fd = os.open(
+                self.path.with_name(f".{self.path.name}.lock"),
+                os.O_RDWR | os.O_CREAT | os.O_CLOEXEC,
+                0o644,
+            )
+        return self._lock_fd
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+        Lock entre procesos para leer-modificar-guardar el archivo.
+
+        Se usa con ``self._lock`` tomado y relee el archivo al entrar.
+        """
+        fd = self._open_lock()
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, _WRITE_BYTE)
+        try:
+            self._refresh()
+            yield
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, _WRITE_BYTE)
+
+    def _refresh(self) -> None:
+        """Relee el archivo si cambió (con lock tomado)."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        schedules: Dict[str, Schedule] = {}
+        if stamp is not None:
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                for item in raw.get("schedules", []):
+                    sch = Schedule.from_dict(item)
+                    schedules[sch.id] = sch
+            except (OSError, ValueError, TypeError) as e:
+                logging.error("No se pudo leer %s: %s", self.path, e)
+                return
+        self._schedules = schedules
+        self._stamp = stamp
+        self._rebuild()
+
+    def _save(self) -> None:
+        """Escribe el archivo de forma atómica (dentro de ``_writing``)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        data = {"schedules": [asdict(s) for s in self._schedules.values()]}
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+        self._stamp = self._file_stamp()
+    # endregion
+
+    # region temporizador
+    def _rebuild(self) -> None:
+        """Recalcula próximos vencimientos y el heap (con lock tomado)."""
+        now = datetime.now()
+        self._next.clear()
+        for sch in self._schedules.values():
+            if not sch.enabled:
+                continue
+            try:
+                self._next[sch.id] = CronExpr(sch.cron).next_after(now).timestamp()
+            except ValueError as e:
+                logging.error("Planificación %s inválida: %s", sch.id, e)
+        self._heap = [(ts, sid) for sid, ts in self._next.items()]
+        heapq.heapify(self._heap)
+        self._cond.notify_all()
+
+    @staticmethod
+    def _fire(sch: Schedule, dispatch: Dispatcher) -> None:
+        """Encola una planificación y registra el resultado."""
+        sch.last_run = time.time()
+        sch.run_count += 1
+        try:
+            job = dispatch(sch)
+            sch.last_job = job.id
+            sch.last_status = "queued"
+        except Exception as e:  # pylint: disable=broad-except
+            sch.last_job = None
+            sch.last_status = f"skipped: {e}"
+            logging.warning("Planificación %s omitida: %s", sch.id, e)
+
+    def _run(self, dispatch: Dispatcher) -> None:
+        """Loop del thread: duerme hasta el próximo vencimiento."""
+        with self._cond:
+            while True:
+                # Relee y guarda bajo el lock de escritura: las ediciones
+                # de otros workers no se pisan con la copia en memoria
+                with self._writing():
+                    now = time.time()
+                    due: List[str] = []
+                    while self._heap and self._heap[0][0] <= now:
+                        ts, sid = heapq.heappop(self._heap)
+                        # Entrada vieja (se editó o se borró)
+                        if self._next.get(sid) != ts:
+                            continue
+                        due.append(sid)
+
+                    for sid in due:
+                        sch = self._schedules[sid]
+                        self._fire(sch, dispatch)
+                        nxt = CronExpr(sch.cron).next_after(datetime.now()).timestamp()
+                        self._next[sid] = nxt
+                        heapq.heappush(self._heap, (nxt, sid))
+                    if due:
+                        self._save()
+
+                wait = _RELOAD_EVERY
+                if self._heap:
+                    wait = min(wait, max(self._heap[0][0] - time.time(), 0.0))
+                self._cond.wait(wait)
+
+    def start(self, dispatch: Dispatcher) -> bool:
+        """
+        Arranca el thread temporizador si este proceso es el ejecutor.
+
+        :param dispatch: Función que encola una planificación.
+        :returns: ``True`` si este proceso ejecuta las planificaciones.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return True
+            try:
+                fcntl.lockf(
+                    self._open_lock(), fcntl.LOCK_EX | fcntl.LOCK_NB, 1, _LEADER_BYTE
+                )
+            except OSError:
+                logging.info("Planificador activo en otro proceso")
+                return False
+            self._thread = threading.Thread(
+                target=self._run, args=(dispatch,), name="scheduler", daemon=True
+            )
+            self._thread.start()
+            return True
+    # endregion
+
+    # region CRUD
+    def _view(self, sch: Schedule) -> Dict[str, Any]:
+        """Planificación + próximo vencimiento."""
+        data = asdict(sch)
+        data["next_run"] = self._next.get(sch.id)
+        return data
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Planificaciones ordenadas por próximo vencimiento."""
+        with self._lock:
+            self._refresh()
+            views = [self._view(s) for s in self._schedules.values()]
+        return sorted(views, key=lambda v: (v["next_run"] is None, v["next_run"] or 0))
+
+    def get(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        """Una planificación (o ``None``)."""
+        with self._lock:
+            self._refresh()
+            sch = self._schedules.get(schedule_id)
+            return self._view(sch) if sch else None
+
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crea una planificación ya validada.
+
+        :param data: Campos de :class:`Schedule` (sin ``id``).
+        :raises RuntimeError: Si se alcanzó ``MAX_SCHEDULES``.
+        """
+        with self._lock, self._writing():
+            if len(self._schedules) >= MAX_SCHEDULES:
+                raise RuntimeError(f"Máximo {MAX_SCHEDULES} planificaciones")
+            sch = Schedule(id=uuid.uuid4().hex[:12], **data)
+            self._schedules[sch.id] = sch
+            self._save()
+            self._rebuild()
+            return self._view(sch)
+
+    def update(
+        self, schedule_id: str, data: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Modifica campos de una planificación.
+
+        :param data: Campos ya validados a reemplazar.
+        :returns: Planificación actualizada o ``None`` si no existe.
+        """
+        with self._lock, self._writing():
+            sch = self._schedules.get(schedule_id)
+            if sch is None:
+                return None
+            for key, value in data.items():
+                setattr(sch, key, value)
+            self._save()
+            self._rebuild()
+            return self._view(sch)
+
+    def delete(self, schedule_id: str) -> bool:
+        """Borra una planificación; ``False`` si no existía."""
+        with self._lock, self._writing():
+            if self._schedules.pop(schedule_id, None) is None:
+                return False
+            self._save()
+            self._rebuild()
+            return True
+
+    def run_now(
+        self, schedule_id: str, dispatch: Dispatcher,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ejecuta una planificación ya mismo (sin alterar el calendario).
+
+        :param dispatch: Función que encola la planificación.
+
+        :returns: Planificación con el resultado o ``None`` si no existe.
+        """
+        with self._lock, self._writing():
+            sch = self._schedules.get(schedule_id)
+            if sch is None:
+                return None
+            self._fire(sch, dispatch)
+            self._save()
+            return self._view(sch)
+    # endregion
+
+
+# Instancia compartida del proceso
+scheduler: Final[Scheduler] = Scheduler(
+    Path(os.environ.get("SCHEDULES_PATH", "./schedules.json"))
+)
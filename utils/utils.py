@@ -11,6 +11,15 @@ if not API_TOKEN:
     # Si no lo pilla, falla de una
     raise RuntimeError("API_TOKEN no definido en el entorno.")
 
+# Llave del environ que marca sub-requests despachados dentro del
+# proceso (``/batch``); el cliente no puede ponerla (headers = HTTP_*)
+INTERNAL_REQUEST: Final[str] = "guardian.internal_request"
+
+
+def is_internal_request() -> bool:
+    """Indica si el request actual fue despachado dentro del proceso."""
+    return bool(request.environ.get(INTERNAL_REQUEST))
+
 
 def require_token() -> None:
     """
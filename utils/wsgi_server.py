@@ -0,0 +1,159 @@
+"""
+Servidor WSGI de producción.
+
+Embebe gunicorn (workers ``gthread``) con la configuración de
+``config.load_settings``. La app se crea dentro de cada worker (no en
+el proceso maestro): los threads de fondo (planificador, inotify,
+lectores de GPIO) no sobreviven a un ``fork``.
+
+Apagado ordenado: con ``SIGTERM`` gunicorn deja de aceptar conexiones,
+espera hasta ``graceful_timeout`` a que terminen los requests en curso
+y al salir cada worker ejecuta los flush hooks.
+
+Si se configuró ``unix`` se escucha además en ese socket Unix (mismos
+blueprints; ver ``utils.peercred`` para la autenticación).
+
+Con ``shared_metrics`` el proceso maestro lanza un único recolector de
+métricas antes de crear los workers (ver ``utils.metrics``).
+
+Si gunicorn no está instalado (o ``GUARDIAN_API_SERVER=dev``) se usa
+el servidor de desarrollo de Flask con threads.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from config import NetworkConfig, UnixSocketConfig
+from utils.metrics import start_collector
+from utils.reboot import run_flush_hooks
+
+try:
+    from gunicorn.app.base import BaseApplication  # type: ignore
+except ImportError:  # pragma: no cover - depende del entorno
+    BaseApplication = None  # type: ignore[assignment,misc]
+
+
+def gunicorn_available() -> bool:
+    """Indica si gunicorn está instalado."""
+    return BaseApplication is not None
+
+
+def _worker_exit(_server: Any, worker: Any) -> None:
+    """Hook de gunicorn: flush al terminar un worker."""
+    report = run_flush_hooks()
+    logging.info("Worker %s terminado, flush: %s", worker.pid, report)
+
+
+def _chmod_socket(unix: UnixSocketConfig) -> None:
+    """Aplica los permisos configurados al socket Unix."""
+    try:
+        os.chmod(unix.path, unix.mode)
+    except OSError as e:
+        logging.error("No se pudo cambiar permisos de %s: %s", unix.path, e)
+
+
+def gunicorn_options(cfg: NetworkConfig) -> Dict[str, Any]:
+    """
+    Traduce la configuración a opciones de gunicorn.
+
+    :param cfg: Configuración validada.
+    :returns: Opciones para ``BaseApplication.cfg``.
+    """
+    server = cfg.server
+    bind = [f"{cfg.host}:{cfg.port}"]
+    options: Dict[str, Any] = {}
+    if cfg.unix is not None:
+        unix = cfg.unix
+        bind.append(f"unix:{unix.path}")
+        # El maestro crea el socket antes de estar listo
+        options["when_ready"] = lambda _server: _chmod_socket(unix)
+    return {
+        **options,
+        "bind": bind,
+        "workers": server.workers,
+        "worker_class": "gthread",
+        "threads": server.threads,
+        "keepalive": server.keepalive,
+        "timeout": server.timeout,
+        "graceful_timeout": server.graceful_timeout,
+        "backlog": server.backlog,
+        "preload_app": False,
+        "accesslog": None,
+        "worker_exit": _worker_exit,
+    }
+
+
+if BaseApplication is not None:
+
+    class GuardianApplication(BaseApplication):  # type: ignore[misc,valid-type]
+        """Aplicación gunicorn que crea la app Flask en cada worker."""
+
+        def __init__(
+            self,
+            factory: Callable[[], Flask],
+            options: Dict[str, Any],
+        ) -> None:
+            """
+            :param factory: Función que crea la app (``create_app``).
+            :param options: Opciones de gunicorn.
+            """
+            self.factory = factory
+            self.options = options
+            self._app: Optional[Flask] = None
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self) -> Flask:
+            if self._app is None:
+                self._app = self.factory()
+            return self._app
+
+
+def serve(factory: Callable[[], Flask], cfg: NetworkConfig) -> None:
+    """
+    Levanta la API con el servidor configurado (bloquea).
+
+    :param factory: Función que crea la app (``create_app``).
+    :param cfg: Configuración validada.
+    :raises SystemExit: Si se pidió gunicorn y no está instalado.
+    """
+    kind = cfg.server.kind
+    if kind == "auto":
+        kind = "gunicorn" if gunicorn_available() else "dev"
+    if kind == "gunicorn" and not gunicorn_available():
+        raise SystemExit("GUARDIAN_API_SERVER=gunicorn pero gunicorn no está instalado.")
+
+    if cfg.server.shared_metrics:
+        # Antes de los workers y de cualquier thread: usa fork
+        start_collector()
+
+    if kind == "gunicorn":
+        logging.info(
+            "Servidor gunicorn: %d worker(s) x %d thread(s)",
+            cfg.server.workers,
+            cfg.server.threads,
+        )
+        GuardianApplication(factory, gunicorn_options(cfg)).run()
+        return
+
+    logging.warning("Usando el servidor de desarrollo de Flask")
+    app = factory()
+    if cfg.unix is not None:
+        local = make_server(f"unix://{cfg.unix.path}", 0, app, threaded=True)
+        _chmod_socket(cfg.unix)
+        threading.Thread(
+            target=local.serve_forever, name="unix-listener", daemon=True
+        ).start()
+        logging.info("Escuchando también en unix://%s", cfg.unix.path)
+    app.run(host=cfg.host, port=cfg.port, threaded=True)